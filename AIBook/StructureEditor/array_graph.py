@@ -0,0 +1,467 @@
+"""
+ArrayDiGraph class for the Interactive Book Editor.
+An array-backed directed graph that BookGraph can use instead of networkx.DiGraph.
+Nodes are numbered, node and edge attributes are stored in columns, and out- and
+in-edges are indexed with CSR/CSC offset arrays. Implements the subset of the
+DiGraph API the editor uses, so code reading book_graph.graph works with either backend.
+"""
+
+from array import array
+from itertools import accumulate
+from collections.abc import Mapping, MutableMapping
+from node import intern_string, EMPTY_METADATA
+
+NO_CODE = -1 # String code of None
+NAN = float('nan') # Position of a node without one
+NO_INDEX = -1 # Source of a removed edge
+MIN_PENDING_EDGES = 1024 # Edges added since the last index rebuild are kept in small per-node lists until there are this many...
+PENDING_EDGE_RATIO = 0.25 # ...or this fraction of all edges
+MIN_COMPACT_COUNT = 1024 # Removed nodes/edges are compacted away once there are this many and they outnumber the live ones
+
+class _StringTable:
+    """Strings stored once and referred to by small integer codes."""
+    __slots__ = ("strings", "codes")
+
+    def __init__(self):
+        self.strings = []
+        self.codes = {}
+
+    def encode(self, value):
+        """Get the code of a value (adding it if new). None is NO_CODE."""
+        if value is None: return NO_CODE
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.strings)
+            self.strings.append(intern_string(value))
+        return code
+
+    def decode(self, code):
+        """Get the value of a code."""
+        return None if code == NO_CODE else self.strings[code]
+
+
+class _ArrayAttributes(MutableMapping):
+    """
+    Dict-like view of one node's or edge's attributes, reading and writing the
+    graph's columns directly. Known keys are always present (None when unset);
+    other keys are kept in a per-item dict. Stays valid across compaction by
+    looking its index up again when the graph's layout changed.
+    """
+    __slots__ = ("_graph", "_key", "_index", "_epoch")
+    KEYS = ()
+
+    def __init__(self, graph, key, index):
+        self._graph = graph; self._key = key; self._index = index; self._epoch = graph._epoch
+
+    def _resolve(self):
+        """Get the current column index, following a compaction."""
+        if self._epoch != self._graph._epoch:
+            self._index = self._lookup(); self._epoch = self._graph._epoch
+        return self._index
+
+    def __getitem__(self, key):
+        value = self._get(key, self)
+        if value is self: raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        """Like dict.get; a column holding None counts as unset."""
+        value = self._get(key, None)
+        return default if value is None else value
+
+    def __iter__(self):
+        yield from self.KEYS
+        yield from self._extra_dict() or ()
+
+    def __len__(self): return len(self.KEYS) + len(self._extra_dict() or ())
+    def __contains__(self, key): return key in self.KEYS or key in (self._extra_dict() or ())
+    def copy(self): return dict(self)
+    def __repr__(self): return f"{type(self).__name__}({dict(self)!r})"
+
+    def _set_extra(self, key, value):
+        self._extras().setdefault(self._resolve(), {})[key] = value
+
+    def _extra_dict(self):
+        return self._extras().get(self._resolve())
+
+    def __delitem__(self, key):
+        if key in self.KEYS: self[key] = None; return
+        extra = self._extra_dict()
+        if not extra or key not in extra: raise KeyError(key)
+        del extra[key]
+
+
+class ArrayNodeAttributes(_ArrayAttributes):
+    """Attributes of one node of an ArrayDiGraph."""
+    __slots__ = ()
+    KEYS = ("title", "node_type", "chapter", "file_path", "position", "metadata")
+
+    def _lookup(self): return self._graph._node_index[self._key]
+    def _extras(self): return self._graph._node_extra
+
+    def _get(self, key, missing):
+        """Read one attribute, or return missing if the node has no such key."""
+        graph = self._graph
+        index = self._index if self._epoch == graph._epoch else self._resolve()
+        if key == "title": return graph._titles[index]
+        if key == "node_type": return graph._strings.decode(graph._node_types[index])
+        if key == "chapter": return graph._strings.decode(graph._chapters[index])
+        if key == "position":
+            x = graph._xs[index]
+            return None if x != x else (x, graph._ys[index]) # NaN marks no position
+        if key == "file_path": return graph._file_paths[index]
+        if key == "metadata": return graph._node_metadata[index] or EMPTY_METADATA
+        extra = graph._node_extra.get(index)
+        return extra.get(key, missing) if extra else missing
+
+    def __setitem__(self, key, value):
+        graph = self._graph
+        if key in self.KEYS: graph._set_node_column(self._resolve(), key, value)
+        else: self._set_extra(key, value)
+
+
+class ArrayEdgeAttributes(_ArrayAttributes):
+    """Attributes of one edge of an ArrayDiGraph."""
+    __slots__ = ()
+    KEYS = ("edge_type", "metadata")
+
+    def _lookup(self):
+        edge_id = self._graph._find_edge(*self._key)
+        if edge_id is None: raise KeyError(self._key)
+        return edge_id
+    def _extras(self): return self._graph._edge_extra
+
+    def _get(self, key, missing):
+        """Read one attribute, or return missing if the edge has no such key."""
+        graph = self._graph
+        edge_id = self._index if self._epoch == graph._epoch else self._resolve()
+        if key == "edge_type": return graph._strings.decode(graph._edge_types[edge_id])
+        if key == "metadata": return graph._edge_metadata[edge_id] or EMPTY_METADATA
+        extra = graph._edge_extra.get(edge_id)
+        return extra.get(key, missing) if extra else missing
+
+    def __setitem__(self, key, value):
+        graph = self._graph; edge_id = self._resolve()
+        if key == "edge_type": graph._edge_types[edge_id] = graph._strings.encode(value)
+        elif key == "metadata": graph._edge_metadata[edge_id] = value or None
+        else: self._set_extra(key, value)
+
+
+class _NodesView:
+    """graph.nodes: node IDs in insertion order; nodes[n] gives its attributes; nodes(data=...) like networkx."""
+    __slots__ = ("_graph",)
+
+    def __init__(self, graph): self._graph = graph
+    def __iter__(self): return (node_id for node_id in self._graph._node_ids if node_id is not None)
+    def __len__(self): return len(self._graph._node_index)
+    def __contains__(self, node_id): return node_id in self._graph._node_index
+    def __getitem__(self, node_id): return ArrayNodeAttributes(self._graph, node_id, self._graph._node_index[node_id])
+
+    def __call__(self, data=False, default=None):
+        if data is False: return iter(self)
+        graph = self._graph
+        if data is True: return ((node_id, ArrayNodeAttributes(graph, node_id, index)) for index, node_id in enumerate(graph._node_ids) if node_id is not None)
+        column = graph._node_column(data)
+        if column is None: return ((node_id, ArrayNodeAttributes(graph, node_id, index).get(data, default)) for index, node_id in enumerate(graph._node_ids) if node_id is not None)
+        return ((node_id, default if value is None else value) for node_id, value in zip(graph._node_ids, column) if node_id is not None)
+
+
+class _EdgesView:
+    """graph.edges: (source, target) pairs in networkx order; edges[u, v] gives an edge's attributes; edges(data=...) like networkx."""
+    __slots__ = ("_graph",)
+
+    def __init__(self, graph): self._graph = graph
+    def __iter__(self): return self._graph._iter_edges(None, True, False, None)
+    def __len__(self): return self._graph._edge_count
+    def __contains__(self, edge): return self._graph.has_edge(*edge)
+
+    def __getitem__(self, edge):
+        source_id, target_id = edge
+        edge_id = self._graph._find_edge(source_id, target_id)
+        if edge_id is None: raise KeyError(edge)
+        return ArrayEdgeAttributes(self._graph, (source_id, target_id), edge_id)
+
+    def __call__(self, nbunch=None, data=False, default=None):
+        return self._graph._iter_edges(nbunch, True, data, default)
+
+
+class _AdjacencyView(Mapping):
+    """graph.succ[n] / graph.pred[n]: neighbour ID -> edge attributes."""
+    __slots__ = ("_graph", "_node_id", "_out")
+
+    def __init__(self, graph, node_id, out):
+        if node_id not in graph._node_index: raise KeyError(node_id)
+        self._graph = graph; self._node_id = node_id; self._out = out
+
+    def __iter__(self):
+        graph = self._graph
+        ends = graph._targets if self._out else graph._sources
+        return (graph._node_ids[ends[edge_id]] for edge_id in graph._edge_ids(graph._node_index[self._node_id], self._out))
+
+    def __len__(self): return sum(1 for _ in self)
+
+    def __getitem__(self, neighbour_id):
+        edge = (self._node_id, neighbour_id) if self._out else (neighbour_id, self._node_id)
+        edge_id = self._graph._find_edge(*edge)
+        if edge_id is None: raise KeyError(neighbour_id)
+        return ArrayEdgeAttributes(self._graph, edge, edge_id)
+
+
+class _AdjacencyCollection:
+    """graph.succ / graph.pred."""
+    __slots__ = ("_graph", "_out")
+
+    def __init__(self, graph, out): self._graph = graph; self._out = out
+    def __getitem__(self, node_id): return _AdjacencyView(self._graph, node_id, self._out)
+    def __contains__(self, node_id): return node_id in self._graph._node_index
+    def __iter__(self): return iter(self._graph.nodes)
+    def __len__(self): return len(self._graph._node_index)
+
+
+class ArrayDiGraph:
+    """
+    Directed graph stored in flat arrays, for large books.
+
+    Responsible for:
+    - Numbering nodes and keeping their attributes in columns: node_type and chapter
+      as codes into a shared string table, positions as two float arrays, titles,
+      file paths and metadata as lists (metadata None when empty)
+    - Keeping edges in source/target/edge_type code arrays, indexed by CSR (out-edges)
+      and CSC (in-edges) offset arrays; edges added since the last rebuild sit in
+      small per-node lists until enough accumulate to rebuild the index
+    - Marking removed nodes and edges and compacting them away in bulk
+    - Iterating nodes and edges in the same order as networkx.DiGraph, so the
+      editor saves identical files with either backend
+    """
+
+    def __init__(self):
+        """Initialize a new, empty ArrayDiGraph."""
+        self._epoch = 0 # Bumped whenever indexes are renumbered by compaction
+        self._strings = _StringTable()
+        # Nodes
+        self._node_index = {} # node_id -> index
+        self._node_ids = [] # index -> node_id, None once removed
+        self._titles = []; self._file_paths = []; self._node_metadata = []
+        self._node_types = array('i'); self._chapters = array('i')
+        self._xs = array('d'); self._ys = array('d')
+        self._node_extra = {} # index -> dict of attributes other than the columns
+        # Edges
+        self._sources = array('i'); self._targets = array('i'); self._edge_types = array('i'); self._edge_metadata = []
+        self._edge_extra = {} # edge id -> dict of attributes other than the columns
+        self._edge_count = 0 # Live edges
+        # CSR/CSC index over the edges that existed at the last rebuild
+        self._indexed_nodes = 0
+        self._out_offsets = array('i', [0]); self._out_edges = array('i')
+        self._in_offsets = array('i', [0]); self._in_edges = array('i')
+        self._pending_out = {}; self._pending_in = {}; self._pending_count = 0 # Edges added since
+        self.nodes = _NodesView(self)
+        self.edges = _EdgesView(self)
+        self.succ = self.adj = _AdjacencyCollection(self, True)
+        self.pred = _AdjacencyCollection(self, False)
+
+    def __contains__(self, node_id): return node_id in self._node_index
+    def __iter__(self): return iter(self.nodes)
+    def __len__(self): return len(self._node_index)
+    def number_of_nodes(self): return len(self._node_index)
+    def number_of_edges(self): return self._edge_count
+    def has_node(self, node_id): return node_id in self._node_index
+
+    # --- Nodes ---
+
+    def _node_column(self, key):
+        """Get a node attribute's values as a sequence by index, or None for attributes kept per node."""
+        strings = self._strings.strings
+        if key == "node_type": return [None if code == NO_CODE else strings[code] for code in self._node_types]
+        if key == "chapter": return [None if code == NO_CODE else strings[code] for code in self._chapters]
+        if key == "title": return self._titles
+        if key == "file_path": return self._file_paths
+        return None
+
+    def add_node(self, node_id, **attributes):
+        """Add a node, or update the attributes of an existing one."""
+        index = self._node_index.get(node_id)
+        if index is None:
+            index = self._node_index[node_id] = len(self._node_ids)
+            self._node_ids.append(node_id)
+            self._titles.append(None); self._file_paths.append(None); self._node_metadata.append(None)
+            self._node_types.append(NO_CODE); self._chapters.append(NO_CODE)
+            self._xs.append(NAN); self._ys.append(NAN)
+        for key, value in attributes.items():
+            if key in ArrayNodeAttributes.KEYS: self._set_node_column(index, key, value)
+            else: ArrayNodeAttributes(self, node_id, index)[key] = value
+
+    def _set_node_column(self, index, key, value):
+        """Write one of the column attributes of the node at index."""
+        if key == "title": self._titles[index] = value
+        elif key == "node_type": self._node_types[index] = self._strings.encode(value)
+        elif key == "chapter": self._chapters[index] = self._strings.encode(value)
+        elif key == "position":
+            try: self._xs[index], self._ys[index] = float(value[0]), float(value[1])
+            except (TypeError, ValueError, IndexError): self._xs[index] = self._ys[index] = NAN
+        elif key == "file_path": self._file_paths[index] = value
+        elif key == "metadata": self._node_metadata[index] = value or None
+
+    def remove_node(self, node_id):
+        """Remove a node and its edges. Raises KeyError if the node does not exist."""
+        index = self._node_index[node_id]
+        for edge_id in list(self._edge_ids(index, True)) + list(self._edge_ids(index, False)):
+            if self._sources[edge_id] != NO_INDEX: self._remove_edge_id(edge_id)
+        del self._node_index[node_id]
+        self._node_ids[index] = None
+        self._titles[index] = self._file_paths[index] = self._node_metadata[index] = None
+        self._node_extra.pop(index, None)
+        self._compact_if_sparse()
+
+    # --- Edges ---
+
+    def _edge_ids(self, index, out):
+        """Iterate the live out- (or in-) edge IDs of a node, in insertion order."""
+        sources = self._sources
+        if index < self._indexed_nodes:
+            offsets, edge_ids = (self._out_offsets, self._out_edges) if out else (self._in_offsets, self._in_edges)
+            for edge_id in edge_ids[offsets[index]:offsets[index + 1]]:
+                if sources[edge_id] != NO_INDEX: yield edge_id
+        for edge_id in (self._pending_out if out else self._pending_in).get(index, ()):
+            if sources[edge_id] != NO_INDEX: yield edge_id
+
+    def _find_edge(self, source_id, target_id):
+        """Get the ID of the edge source_id -> target_id, or None."""
+        source = self._node_index.get(source_id)
+        target = self._node_index.get(target_id)
+        if source is None or target is None: return None
+        sources = self._sources; targets = self._targets
+        if source < self._indexed_nodes:
+            out_edges = self._out_edges
+            for position in range(self._out_offsets[source], self._out_offsets[source + 1]):
+                edge_id = out_edges[position]
+                if targets[edge_id] == target and sources[edge_id] != NO_INDEX: return edge_id
+        for edge_id in self._pending_out.get(source, ()):
+            if targets[edge_id] == target and sources[edge_id] != NO_INDEX: return edge_id
+        return None
+
+    def has_edge(self, source_id, target_id): return self._find_edge(source_id, target_id) is not None
+
+    def add_edge(self, source_id, target_id, **attributes):
+        """Add an edge (creating missing nodes, as networkx does), or update an existing edge's attributes."""
+        edge_id = self._find_edge(source_id, target_id)
+        if edge_id is None:
+            if source_id not in self._node_index: self.add_node(source_id)
+            if target_id not in self._node_index: self.add_node(target_id)
+            source = self._node_index[source_id]; target = self._node_index[target_id]
+            edge_id = len(self._sources)
+            self._sources.append(source); self._targets.append(target)
+            self._edge_types.append(NO_CODE); self._edge_metadata.append(None)
+            self._edge_count += 1
+            self._pending_out.setdefault(source, []).append(edge_id)
+            self._pending_in.setdefault(target, []).append(edge_id)
+            self._pending_count += 1
+        if attributes:
+            edge_data = ArrayEdgeAttributes(self, (source_id, target_id), edge_id)
+            for key, value in attributes.items(): edge_data[key] = value
+        if self._pending_count > max(MIN_PENDING_EDGES, self._edge_count * PENDING_EDGE_RATIO): self._rebuild_index()
+
+    def remove_edge(self, source_id, target_id):
+        """Remove an edge. Raises KeyError if it does not exist."""
+        edge_id = self._find_edge(source_id, target_id)
+        if edge_id is None: raise KeyError((source_id, target_id))
+        self._remove_edge_id(edge_id)
+        self._compact_if_sparse()
+
+    def _remove_edge_id(self, edge_id):
+        """Mark an edge as removed."""
+        self._sources[edge_id] = NO_INDEX
+        self._edge_metadata[edge_id] = None
+        self._edge_extra.pop(edge_id, None)
+        self._edge_count -= 1
+
+    def _iter_edges(self, nbunch, out, data, default):
+        """Iterate (source, target[, data]) for the out- (or in-) edges of nbunch (a node, nodes, or None for all)."""
+        if nbunch is None and out and data in (False, "edge_type"):
+            yield from self._iter_all_edges(data == "edge_type"); return
+        if nbunch is None: indexes = (index for index, node_id in enumerate(self._node_ids) if node_id is not None)
+        elif nbunch in self._node_index: indexes = (self._node_index[nbunch],)
+        else: indexes = [self._node_index[node_id] for node_id in nbunch if node_id in self._node_index]
+        node_ids = self._node_ids; sources = self._sources; targets = self._targets
+        for index in indexes:
+            for edge_id in self._edge_ids(index, out):
+                source_id = node_ids[sources[edge_id]]; target_id = node_ids[targets[edge_id]]
+                if data is False: yield source_id, target_id
+                elif data == "edge_type": yield source_id, target_id, self._strings.decode(self._edge_types[edge_id])
+                else:
+                    edge_data = ArrayEdgeAttributes(self, (source_id, target_id), edge_id)
+                    yield (source_id, target_id, edge_data) if data is True else (source_id, target_id, edge_data.get(data, default))
+
+    def _iter_all_edges(self, with_type):
+        """Iterate every edge straight from the CSR array (rebuilt first if edges are pending)."""
+        if self._pending_count: self._rebuild_index()
+        node_ids = self._node_ids; sources = self._sources; targets = self._targets
+        edge_types = self._edge_types; strings = self._strings.strings + [None] # Code -1 decodes to the trailing None
+        for edge_id in self._out_edges:
+            source = sources[edge_id]
+            if source == NO_INDEX: continue
+            if with_type: yield node_ids[source], node_ids[targets[edge_id]], strings[edge_types[edge_id]]
+            else: yield node_ids[source], node_ids[targets[edge_id]]
+
+    def edges_of_type(self, edge_type):
+        """Get (source, target) pairs of the edges of one type, in the order they were added, by scanning the type column."""
+        code = NO_CODE if edge_type is None else self._strings.codes.get(edge_type)
+        if code is None: return []
+        node_ids = self._node_ids; sources = self._sources; targets = self._targets
+        return [(node_ids[sources[edge_id]], node_ids[targets[edge_id]]) for edge_id, edge_code in enumerate(self._edge_types)
+                if edge_code == code and sources[edge_id] != NO_INDEX]
+
+    def out_edges(self, nbunch=None, data=False, default=None): return self._iter_edges(nbunch, True, data, default)
+    def in_edges(self, nbunch=None, data=False, default=None): return self._iter_edges(nbunch, False, data, default)
+    def successors(self, node_id): return iter(self.succ[node_id])
+    def predecessors(self, node_id): return iter(self.pred[node_id])
+
+    # --- Index maintenance ---
+
+    def _rebuild_index(self):
+        """Rebuild the CSR/CSC offset arrays over every live edge and clear the pending lists."""
+        node_count = len(self._node_ids)
+        sources = self._sources; targets = self._targets
+        live = [edge_id for edge_id in range(len(sources)) if sources[edge_id] != NO_INDEX]
+        for offsets_name, edges_name, ends in (("_out_offsets", "_out_edges", sources), ("_in_offsets", "_in_edges", targets)):
+            counts = [0] * (node_count + 1)
+            for edge_id in live: counts[ends[edge_id] + 1] += 1
+            offsets = array('i', accumulate(counts))
+            slots = list(offsets)
+            edge_ids = array('i', bytes(4 * len(live)))
+            for edge_id in live: # Counting sort by node; edge IDs stay in insertion order within a node
+                end = ends[edge_id]
+                edge_ids[slots[end]] = edge_id; slots[end] += 1
+            setattr(self, offsets_name, offsets); setattr(self, edges_name, edge_ids)
+        self._indexed_nodes = node_count
+        self._pending_out = {}; self._pending_in = {}; self._pending_count = 0
+
+    def _compact_if_sparse(self):
+        """Renumber nodes and edges without the removed ones once they outnumber the live ones."""
+        dead_nodes = len(self._node_ids) - len(self._node_index)
+        dead_edges = len(self._sources) - self._edge_count
+        if (dead_nodes >= MIN_COMPACT_COUNT and dead_nodes > len(self._node_index)) or \
+           (dead_edges >= MIN_COMPACT_COUNT and dead_edges > self._edge_count): self.compact()
+
+    def compact(self):
+        """Drop removed nodes and edges from the columns, keeping the order of the rest."""
+        keep = [index for index, node_id in enumerate(self._node_ids) if node_id is not None]
+        remap = array('i', [NO_INDEX]) * len(self._node_ids)
+        for new_index, index in enumerate(keep): remap[index] = new_index
+        self._node_ids = [self._node_ids[index] for index in keep]
+        self._node_index = {node_id: index for index, node_id in enumerate(self._node_ids)}
+        self._titles = [self._titles[index] for index in keep]
+        self._file_paths = [self._file_paths[index] for index in keep]
+        self._node_metadata = [self._node_metadata[index] for index in keep]
+        for name in ("_node_types", "_chapters", "_xs", "_ys"):
+            column = getattr(self, name)
+            setattr(self, name, array(column.typecode, (column[index] for index in keep)))
+        self._node_extra = {remap[index]: extra for index, extra in self._node_extra.items()}
+        edge_keep = [edge_id for edge_id in range(len(self._sources)) if self._sources[edge_id] != NO_INDEX]
+        edge_remap = {edge_id: new_id for new_id, edge_id in enumerate(edge_keep)}
+        self._sources = array('i', (remap[self._sources[edge_id]] for edge_id in edge_keep))
+        self._targets = array('i', (remap[self._targets[edge_id]] for edge_id in edge_keep))
+        self._edge_types = array('i', (self._edge_types[edge_id] for edge_id in edge_keep))
+        self._edge_metadata = [self._edge_metadata[edge_id] for edge_id in edge_keep]
+        self._edge_extra = {edge_remap[edge_id]: extra for edge_id, extra in self._edge_extra.items()}
+        self._epoch += 1
+        self._rebuild_index()
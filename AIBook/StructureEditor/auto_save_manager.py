@@ -1,137 +1,292 @@
 """
 SimplifiedAutoSaveManager class for the Interactive Book Editor.
 REVISED: Ensures book_graph.update_node/update_edge is called *before* updating files or saving structure.
+REVISED: Changes are collected into ChangeSets and can be debounced and flushed
+         from a background worker via AutoSaveScheduler.
+ADDED: on_nodes_updated saves a batch of node updates (e.g. a multi-select drag) as one
+       change; position-only batches skip content files and navigation.
+REVISED: Changes are classified: a node update that only moves the node, or a batch
+         move, only rewrites the node-positions.json sidecar.
+REVISED: In a sharded project only the structure shards touched by a change are written.
+ADDED: The structure, node file and navigation managers can be passed in and shared with DataManager.
+REVISED: Works with the ProjectSession of its structure manager: queued changes mark the
+         session dirty, and a successful flush marks the revision it wrote as saved.
+REVISED: A failed write aborts the save's transaction, so no file of a failed save lands.
 """
 
 import os
-import json
 import traceback # For detailed error logging
 from path_manager import PathManager
 from character_pov_manager import CharacterPOVManager
 from book_structure_manager import BookStructureManager
 from node_file_manager import NodeFileManager
-from node_content_updater import SimplifiedNodeContentUpdater 
+from node_content_updater import SimplifiedNodeContentUpdater, NAVIGATION_WORKERS
+from auto_save_scheduler import AutoSaveScheduler, ChangeSet
+from json_file_manager import JsonFileManager
+from editor_log import get_logger
+
+log = get_logger(__name__)
 
 class SimplifiedAutoSaveManager:
     """
     Manages automatic saving of book graph changes. Updates the BookGraph model
     before triggering saves or file updates.
+    
+    By default every change is saved synchronously. After set_save_delay() the
+    changes are merged into one dirty set and written by a worker thread once
+    no new change has arrived for the given quiet period.
     """
     
-    def __init__(self, path_manager=None, character_pov_manager=None):
-        """Initialize a new SimplifiedAutoSaveManager instance."""
+    def __init__(self, path_manager=None, character_pov_manager=None, json_file_manager=None,
+                 book_structure_manager=None, node_file_manager=None, node_content_updater=None):
+        """Initialize a new SimplifiedAutoSaveManager instance. Pass the owner's managers to share their state."""
         self.path_manager = path_manager or PathManager()
         self.character_pov_manager = character_pov_manager or CharacterPOVManager()
-        self.book_structure_manager = BookStructureManager(self.path_manager, self.character_pov_manager)
-        self.node_file_manager = NodeFileManager(self.path_manager, self.character_pov_manager)
-        self.node_content_updater = SimplifiedNodeContentUpdater(self.path_manager) 
+        self.json_file_manager = json_file_manager or JsonFileManager()
+        self.book_structure_manager = book_structure_manager or BookStructureManager(self.path_manager, self.character_pov_manager, self.json_file_manager)
+        self.node_file_manager = node_file_manager or NodeFileManager(self.path_manager, self.character_pov_manager, self.json_file_manager)
+        self.node_content_updater = node_content_updater or SimplifiedNodeContentUpdater(self.path_manager, self.json_file_manager) 
+        self.session = self.book_structure_manager.session # Structure snapshot and dirty state, shared with the owner
         self.book_graph = None
         self.auto_save_enabled = True
+        self.scheduler = None # AutoSaveScheduler when saves are debounced, None for synchronous saves
+        self.lock = self.session.model_lock # Guards the BookGraph while a flush reads it
     
     def set_book_graph(self, book_graph):
-        """Set the book graph to monitor."""
+        """Set the book graph to monitor. Pending changes for the previous graph are flushed first."""
+        self.flush()
         self.book_graph = book_graph
 
     def enable_auto_save(self, enabled=True):
         """Enable or disable auto-saving."""
         self.auto_save_enabled = enabled
-        print(f"Auto-save {'enabled' if enabled else 'disabled'}.")
+        log.info("Auto-save %s.", 'enabled' if enabled else 'disabled')
+
+    def set_save_delay(self, quiet_period):
+        """
+        Configure debounced background saving.
+        
+        Args:
+            quiet_period (float | None): Seconds without new changes before a flush.
+                None (or a negative value) restores synchronous saving.
+        """
+        if quiet_period is None or quiet_period < 0:
+            if self.scheduler: self.scheduler.shutdown(flush=True); self.scheduler = None
+            log.info("AutoSave: Saving synchronously.")
+            return
+        if self.scheduler: self.scheduler.quiet_period = quiet_period
+        else: self.scheduler = AutoSaveScheduler(self._flush_changes, quiet_period)
+        log.info("AutoSave: Saving in background after %.2fs without changes.", quiet_period)
+
+    def flush(self):
+        """
+        Write out any pending debounced changes on the calling thread.
+        
+        Returns:
+            bool: True if there was nothing to save or the save succeeded.
+        """
+        if not self.scheduler: return True
+        return self.scheduler.flush()
+
+    def shutdown(self):
+        """Flush pending changes and stop the background worker (e.g. on window close)."""
+        if not self.scheduler: return True
+        success = self.scheduler.shutdown(flush=True)
+        self.scheduler = None
+        return success
+
+    def _queue_changes(self, changes):
+        """Save a ChangeSet now, or hand it to the scheduler when saves are debounced."""
+        self.session.mark_dirty()
+        if self.scheduler:
+            self.scheduler.schedule(changes)
+            return True
+        return self._flush_changes(changes)
 
-    def _save_structure(self, context=""):
-        """Internal helper to save the main book structure."""
-        if not self.book_graph:
-            print(f"AutoSave ({context}): Cannot save structure, book_graph not set.")
+    def _flush_changes(self, changes):
+        """
+        Write out a ChangeSet: node content files, affected navigation and the book structure.
+        The graph is only read while holding self.lock; all file I/O happens after
+        it is released so the GUI thread is never blocked on disk.
+        """
+        book_graph = self.book_graph
+        if not book_graph:
+            log.warning("AutoSave (%s): Cannot save, book_graph not set.", changes.describe())
             return False
-        print(f"AutoSave ({context}): Saving book structure...")
-        # Pass the current graph state to the saver
-        success = self.book_structure_manager.save_book_structure(self.book_graph) 
+        if changes.is_position_only(): return self._flush_positions(changes)
+        log.info("AutoSave (%s): Saving...", changes.describe())
+        # --- Collect everything needed from the in-memory model ---
+        with self.lock:
+            revision = self.session.revision # Every change up to this revision is in the graph being read
+            nodes = [book_graph.get_node(node_id) for node_id in changes.node_ids]
+            nodes = [node for node in nodes if node and node.node_type != "book"]
+            if changes.all_navigation:
+                navigation_ids = None # Every node, built in one pass
+            else:
+                navigation_ids = self.node_content_updater.get_affected_nodes(book_graph, node_ids=changes.node_ids, edges=changes.edges)
+            navigation_updates = self.node_content_updater.build_navigation_updates(navigation_ids, book_graph)
+            sharded = self.book_structure_manager.structure_shard_manager.is_sharded()
+            if sharded:
+                structure_data, sharded_data = None, self.book_structure_manager.build_sharded_data(book_graph, changes.get_structure_node_ids())
+            else:
+                structure_data, sharded_data = self.book_structure_manager.build_structure_data(book_graph), None
+            original_data = self.book_structure_manager.get_original_structure_data()
+
+        # --- Write files as one transaction: all of them land, or none do ---
+        with self.json_file_manager.transaction() as transaction:
+            self._write_content_files(nodes, original_data, transaction)
+            updated_count = self.node_content_updater.write_navigation_updates(navigation_updates, max_workers=NAVIGATION_WORKERS if changes.all_navigation else 1)
+            log.info("AutoSave (%s): Updated navigation for %s of %s affected nodes.", changes.describe(), updated_count, len(navigation_updates))
+            if self.node_content_updater.last_write_errors: transaction.abort(f"navigation of {len(self.node_content_updater.last_write_errors)} nodes not written")
+            if not transaction.aborted:
+                if sharded: written = self._is_sharded_data_empty(sharded_data) or self.book_structure_manager.write_sharded_data(sharded_data)
+                else: written = self.book_structure_manager.write_structure_data(structure_data)
+                if not written: transaction.abort("book structure not written")
+        success = not transaction.aborted # An aborted save is requeued as a whole by the scheduler
         if success:
-            print(f"AutoSave ({context}): Book structure saved successfully.")
+            self.session.mark_saved(revision, contiguous=not self.scheduler) # Debounced failures are retried in a later flush
+            log.info("AutoSave (%s): Book structure saved successfully.", changes.describe())
         else:
-            print(f"AutoSave ({context}): ERROR saving book structure.")
+            log.error("AutoSave (%s): ERROR saving book structure.", changes.describe())
+        return success
+
+    def _flush_positions(self, changes):
+        """Write out a position-only ChangeSet: just the node-positions.json sidecar, or the shards of the moved nodes."""
+        with self.lock:
+            revision = self.session.revision
+            sharded = self.book_structure_manager.structure_shard_manager.is_sharded()
+            if sharded:
+                positions, sharded_data = None, self.book_structure_manager.build_sharded_data(self.book_graph, changes.moved_node_ids)
+            else:
+                positions, sharded_data = self.book_structure_manager.build_node_positions(self.book_graph), None
+        if sharded:
+            if self._is_sharded_data_empty(sharded_data): log.info("AutoSave (%s): No shard changed, nothing to write.", changes.describe()); return True # Never the single-file sidecar
+            success = self.book_structure_manager.write_sharded_data(sharded_data)
+        else: success = self.book_structure_manager.write_node_positions(positions)
+        if success: self.session.mark_saved(revision, contiguous=not self.scheduler); log.info("AutoSave (%s): Node positions saved.", changes.describe())
+        else: log.error("AutoSave (%s): ERROR saving node positions.", changes.describe())
         return success
 
+    @staticmethod
+    def _is_sharded_data_empty(sharded_data):
+        """True if data built by build_sharded_data has no shard and no manifest to write."""
+        return not sharded_data or (not sharded_data.get("shards") and sharded_data.get("manifest") is None)
+
+    def _write_content_files(self, nodes, original_data, transaction):
+        """Create missing content files of nodes and sync their properties into them, aborting the transaction on a failed write."""
+        for node in nodes:
+            if not self.node_file_manager.save_node_content_file(node, original_data): transaction.abort(f"content file of {node.id} not created") # Ensure node file exists/is created
+            elif self._update_node_content_file(node) is False: transaction.abort(f"content file of {node.id} not updated")
+
+    def _update_node_content_file(self, node):
+        """
+        Sync a node's type, label, chapter and POV character into its content file.
+
+        Returns:
+            bool | None: True if synced, None if the node has no content file, False if the file could not be updated.
+        """
+        if not node.file_path or node.node_type == "book": return None
+        full_path = self.path_manager.get_full_content_path(node.file_path)
+        if not full_path or not self.json_file_manager.exists(full_path): return None
+        try:
+            content = self.json_file_manager.read_json(full_path)
+            content.setdefault("data", {})
+            content.setdefault("metadata", {})
+            content["nodeType"] = node.node_type 
+            content["data"]["label"] = node.title 
+            if node.chapter: content["metadata"]["chapter"] = node.chapter
+            elif "chapter" in content.get("metadata", {}): del content["metadata"]["chapter"]
+            if "povCharacter" in node.metadata: content["metadata"]["povCharacter"] = node.metadata["povCharacter"]
+            self.json_file_manager.write_json(full_path, content) # Skipped if nothing changed
+            return True
+        except Exception as file_e:
+            log.warning("AutoSave: WARNING - Failed to update content file for %s: %s", node.id, file_e)
+            return False
+
     def on_node_added(self, node):
         """Handle node addition."""
         if not self.auto_save_enabled or not self.book_graph: return False
-        print(f"AutoSave: Handling node added - {node.id}")
+        log.debug("AutoSave: Handling node added - %s", node.id)
         try:
-            # Node is already added to book_graph by MainWindow/DataManager logic
-            # 1. Ensure node file exists/is created
-            self.node_file_manager.save_node_content_file(
-                node, self.book_structure_manager.get_original_structure_data()
-            )
-            # 2. Update navigation for all nodes (simpler for now)
-            self.node_content_updater.update_all_node_navigation(self.book_graph)
-            # 3. Save the structure
-            self._save_structure(f"Node Added {node.id}")
-            return True
+            # Node is already added to book_graph by MainWindow/DataManager logic.
+            # Flushing creates its file, updates its navigation and that of the nodes depending on it, then saves the structure.
+            return self._queue_changes(ChangeSet(node_ids=[node.id], context=f"Node Added {node.id}"))
         except Exception as e:
-            print(f"ERROR in on_node_added for {node.id}: {e}")
+            log.error("ERROR in on_node_added for %s: %s", node.id, e)
             traceback.print_exc()
             return False
 
     def on_node_updated(self, node):
         """Handle node updates (position, properties)."""
         if not self.auto_save_enabled or not self.book_graph: return False
-        print(f"AutoSave: Handling node updated - {node.id}")
+        log.debug("AutoSave: Handling node updated - %s", node.id)
         try:
             # --- Step 1: Update the BookGraph Model ---
             # Ensure the graph object itself reflects the changes passed via the node object
-            print(f"AutoSave: Updating node {node.id} in BookGraph model...")
-            update_success = self.book_graph.update_node(node)
+            log.debug("AutoSave: Updating node %s in BookGraph model...", node.id)
+            with self.lock:
+                changed = self.book_graph.get_changed_attributes(node)
+                update_success = self.book_graph.update_node(node)
             if not update_success:
-                 print(f"AutoSave: WARNING - Failed to update node {node.id} in BookGraph model.")
+                 log.warning("AutoSave: WARNING - Failed to update node %s in BookGraph model.", node.id)
                  # If the graph update fails, saving the structure might use stale data
 
-            # --- Step 2: Update Node Content File ---
-            # (Logic remains the same - reads updated 'node' object)
-            if node.file_path and node.node_type != "book":
-                full_path = self.path_manager.get_full_content_path(node.file_path)
-                if full_path and os.path.exists(full_path):
-                    try:
-                        with open(full_path, 'r+', encoding='utf-8') as f:
-                            content = json.load(f)
-                            content.setdefault("data", {})
-                            content.setdefault("metadata", {})
-                            content["nodeType"] = node.node_type 
-                            content["data"]["label"] = node.title 
-                            if node.chapter: content["metadata"]["chapter"] = node.chapter
-                            elif "chapter" in content.get("metadata", {}): del content["metadata"]["chapter"]
-                            if "povCharacter" in node.metadata: content["metadata"]["povCharacter"] = node.metadata["povCharacter"]
-                            f.seek(0)
-                            json.dump(content, f, indent=2, ensure_ascii=False)
-                            f.truncate()
-                    except Exception as file_e:
-                        print(f"AutoSave: WARNING - Failed to update content file for {node.id}: {file_e}")
-
-            # --- Step 3: Update Navigation ---
-            # Reads from the updated graph model
-            self.node_content_updater.update_all_node_navigation(self.book_graph)
-
-            # --- Step 4: Save Overall Book Structure ---
-            # Reads from the updated graph model
-            self._save_structure(f"Node Updated {node.id}")
-            
-            return True
+            # --- Step 2: Content file, navigation of the node and its dependents, book structure ---
+            # All read from the updated graph model when the change is flushed; a move only needs the positions
+            if changed == {"position"}: return self._queue_changes(ChangeSet(moved_node_ids=[node.id], context=f"Node Moved {node.id}"))
+            return self._queue_changes(ChangeSet(node_ids=[node.id], context=f"Node Updated {node.id}"))
         except Exception as e:
-            print(f"ERROR in on_node_updated for {node.id}: {e}")
+            log.error("ERROR in on_node_updated for %s: %s", node.id, e)
             traceback.print_exc()
             return False
 
-    def on_node_removed(self, node_id):
-        """Handle node removal."""
+    def on_nodes_updated(self, nodes, positions_only=False):
+        """
+        Handle updates of many nodes at once as a single change.
+        
+        Args:
+            nodes (list): Updated Node objects.
+            positions_only (bool, optional): Only the positions changed (e.g. a batch move), so
+                only the positions are written to the model and only the book structure is saved.
+        """
+        if not self.auto_save_enabled or not self.book_graph or not nodes: return False
+        log.debug("AutoSave: Handling %s %s nodes", len(nodes), 'moved' if positions_only else 'updated')
+        try:
+            moved_ids, updated_ids = [], []
+            with self.lock:
+                if positions_only:
+                    self.book_graph.update_node_positions({node.id: node.position for node in nodes})
+                    moved_ids = [node.id for node in nodes]
+                else:
+                    for node in nodes:
+                        (moved_ids if self.book_graph.get_changed_attributes(node) == {"position"} else updated_ids).append(node.id)
+                        if not self.book_graph.update_node(node): log.warning("AutoSave: WARNING - Failed to update node %s in BookGraph model.", node.id)
+            context = f"{len(moved_ids)} Nodes Moved" if not updated_ids else f"{len(nodes)} Nodes Updated"
+            return self._queue_changes(ChangeSet(node_ids=updated_ids, moved_node_ids=moved_ids, context=context))
+        except Exception as e:
+            log.error("ERROR in on_nodes_updated: %s", e)
+            traceback.print_exc()
+            return False
+
+    def on_node_removed(self, node_id, removed_edges=None):
+        """
+        Handle node removal.
+        
+        Args:
+            node_id (str): ID of the removed node.
+            removed_edges (list, optional): (source_id, target_id) pairs of the edges
+                that were removed along with the node. If omitted, the neighbours
+                are unknown and navigation is rebuilt for every node.
+        """
         # Assumes node is already removed from book_graph model by DataManager.remove_node
         if not self.auto_save_enabled or not self.book_graph: return False
-        print(f"AutoSave: Handling node removed - {node_id}")
+        log.debug("AutoSave: Handling node removed - %s", node_id)
         try:
-            # Update navigation based on the graph *after* node removal
-            self.node_content_updater.update_all_node_navigation(self.book_graph)
-            # Save the structure reflecting the removal
-            self._save_structure(f"Node Removed {node_id}")
-            return True
+            # Navigation is updated based on the graph *after* node removal
+            changes = ChangeSet(edges=removed_edges, removed_node_ids=[node_id], all_navigation=removed_edges is None, context=f"Node Removed {node_id}")
+            return self._queue_changes(changes)
         except Exception as e:
-            print(f"ERROR in on_node_removed for {node_id}: {e}")
+            log.error("ERROR in on_node_removed for %s: %s", node_id, e)
             traceback.print_exc()
             return False
 
@@ -139,45 +294,34 @@ class SimplifiedAutoSaveManager:
         """Handle edge addition."""
         # Assumes edge is already added to book_graph model
         if not self.auto_save_enabled or not self.book_graph: return False
-        print(f"AutoSave: Handling edge added - {edge.source_id} -> {edge.target_id} ({edge.edge_type})")
+        log.debug("AutoSave: Handling edge added - %s -> %s (%s)", edge.source_id, edge.target_id, edge.edge_type)
         try:
-            # Update navigation based on the new edge
-            self.node_content_updater.update_node_navigation(edge.source_id, self.book_graph)
-            self.node_content_updater.update_node_navigation(edge.target_id, self.book_graph)
-            if edge.edge_type == "critical-path": # Update neighbors too
-                 prev = self.node_content_updater._get_critical_path_neighbor(edge.source_id, self.book_graph, "previous")
-                 next_ = self.node_content_updater._get_critical_path_neighbor(edge.target_id, self.book_graph, "next")
-                 if prev: self.node_content_updater.update_node_navigation(prev, self.book_graph)
-                 if next_: self.node_content_updater.update_node_navigation(next_, self.book_graph)
-            # Save structure reflecting the new edge
-            self._save_structure(f"Edge Added {edge.source_id}->{edge.target_id}")
-            return True
+            # Update navigation based on the new edge and save structure reflecting it
+            changes = ChangeSet(edges=[(edge.source_id, edge.target_id)], context=f"Edge Added {edge.source_id}->{edge.target_id}")
+            return self._queue_changes(changes)
         except Exception as e:
-            print(f"ERROR in on_edge_added for {edge.source_id}->{edge.target_id}: {e}")
+            log.error("ERROR in on_edge_added for %s->%s: %s", edge.source_id, edge.target_id, e)
             traceback.print_exc()
             return False
 
     def on_edge_updated(self, edge):
         """Handle edge updates (type, metadata)."""
         if not self.auto_save_enabled or not self.book_graph: return False
-        print(f"AutoSave: Handling edge updated - {edge.source_id} -> {edge.target_id} (Type: {edge.edge_type}, Meta: {edge.metadata})")
+        log.debug("AutoSave: Handling edge updated - %s -> %s (Type: %s, Meta: %s)", edge.source_id, edge.target_id, edge.edge_type, edge.metadata)
         try:
             # --- Step 1: Update the BookGraph Model ---
-            print(f"AutoSave: Updating edge {edge.source_id}->{edge.target_id} in BookGraph model")
-            update_success = self.book_graph.update_edge(edge) # Ensure graph model has latest edge data
+            log.debug("AutoSave: Updating edge %s->%s in BookGraph model", edge.source_id, edge.target_id)
+            with self.lock:
+                update_success = self.book_graph.update_edge(edge) # Ensure graph model has latest edge data
             if not update_success:
-                 print(f"AutoSave: WARNING - Failed to update edge {edge.source_id}->{edge.target_id} in BookGraph model.")
-
-            # --- Step 2: Update Navigation ---
-            # Rerun navigation updates as type/metadata might affect it
-            self.node_content_updater.update_all_node_navigation(self.book_graph)
+                 log.warning("AutoSave: WARNING - Failed to update edge %s->%s in BookGraph model.", edge.source_id, edge.target_id)
 
-            # --- Step 3: Save Structure ---
-            # Reads the updated graph model
-            self._save_structure(f"Edge Updated {edge.source_id}->{edge.target_id}")
-            return True
+            # --- Step 2: Navigation and structure ---
+            # Type/metadata changes can only affect the edge's endpoints
+            changes = ChangeSet(edges=[(edge.source_id, edge.target_id)], context=f"Edge Updated {edge.source_id}->{edge.target_id}")
+            return self._queue_changes(changes)
         except Exception as e:
-            print(f"ERROR in on_edge_updated for {edge.source_id}->{edge.target_id}: {e}")
+            log.error("ERROR in on_edge_updated for %s->%s: %s", edge.source_id, edge.target_id, e)
             traceback.print_exc()
             return False
 
@@ -185,15 +329,13 @@ class SimplifiedAutoSaveManager:
         """Handle edge removal."""
         # Assumes edge is already removed from book_graph model
         if not self.auto_save_enabled or not self.book_graph: return False
-        print(f"AutoSave: Handling edge removed - {source_id} -> {target_id}")
+        log.debug("AutoSave: Handling edge removed - %s -> %s", source_id, target_id)
         try:
-            # Update navigation based on graph *after* edge removal
-            self.node_content_updater.update_all_node_navigation(self.book_graph)
-            # Save structure reflecting removal
-            self._save_structure(f"Edge Removed {source_id}->{target_id}")
-            return True
+            # Update navigation based on graph *after* edge removal and save structure reflecting it
+            changes = ChangeSet(edges=[(source_id, target_id)], context=f"Edge Removed {source_id}->{target_id}")
+            return self._queue_changes(changes)
         except Exception as e:
-            print(f"ERROR in on_edge_removed for {source_id}->{target_id}: {e}")
+            log.error("ERROR in on_edge_removed for %s->%s: %s", source_id, target_id, e)
             traceback.print_exc()
             return False
 
@@ -201,49 +343,36 @@ class SimplifiedAutoSaveManager:
         """Handle chapter updates."""
         # Assumes chapter info is updated in book_graph model by MainWindow
         if not self.auto_save_enabled or not self.book_graph: return False
-        print(f"AutoSave: Handling chapter updated - {chapter_id}")
+        log.debug("AutoSave: Handling chapter updated - %s", chapter_id)
         try:
-            # Update relevant node files if needed (e.g., their chapter metadata)
-            self.node_content_updater.update_all_node_navigation(self.book_graph)
-            # Save the structure reflecting chapter changes
-            self._save_structure(f"Chapter Updated {chapter_id}")
-            return True
+            # Navigation does not depend on chapters, so no node files need rewriting;
+            # only the structure reflecting chapter changes is saved
+            return self._queue_changes(ChangeSet(chapter_ids=[chapter_id], context=f"Chapter Updated {chapter_id}"))
         except Exception as e:
-            print(f"ERROR in on_chapter_updated for {chapter_id}: {e}")
+            log.error("ERROR in on_chapter_updated for %s: %s", chapter_id, e)
             traceback.print_exc()
             return False
     
     def force_save_all(self):
         """Force save all nodes and the book structure."""
-        # (Implementation remains the same as previous version)
-        if not self.book_graph: print("ForceSave: Cannot save, book_graph not set."); return False
-        print("ForceSave: Starting forced save..."); success = True
+        if not self.book_graph: log.warning("ForceSave: Cannot save, book_graph not set."); return False
+        self.flush() # Write out debounced changes first so nothing is left queued behind the full save
+        log.info("ForceSave: Starting forced save...")
         try:
-            nodes = self.book_graph.get_all_nodes()
-            print(f"ForceSave: Updating {len(nodes)} nodes in graph model...")
-            for node in nodes: self.book_graph.update_node(node) # Ensure graph model is sync'd
-            print(f"ForceSave: Checking/Saving content for {len(nodes)} nodes...")
-            for node in nodes:
-                if node.node_type != "book":
-                    self.node_file_manager.save_node_content_file(node, self.book_structure_manager.get_original_structure_data())
-                    if node.file_path:
-                         full_path = self.path_manager.get_full_content_path(node.file_path)
-                         if full_path and os.path.exists(full_path):
-                              try:
-                                   with open(full_path, 'r+', encoding='utf-8') as f:
-                                        content = json.load(f); content.setdefault("data", {}); content.setdefault("metadata", {})
-                                        content["nodeType"] = node.node_type; content["data"]["label"] = node.title 
-                                        if node.chapter: content["metadata"]["chapter"] = node.chapter
-                                        elif "chapter" in content.get("metadata", {}): del content["metadata"]["chapter"]
-                                        if "povCharacter" in node.metadata: content["metadata"]["povCharacter"] = node.metadata["povCharacter"]
-                                        f.seek(0); json.dump(content, f, indent=2, ensure_ascii=False); f.truncate()
-                              except Exception as file_e: print(f"ForceSave: WARNING - Failed to update content file for {node.id}: {file_e}")
-            print("ForceSave: Updating navigation data for all nodes...")
-            self.node_content_updater.update_all_node_navigation(self.book_graph)
-            print("ForceSave: Saving main book structure file...")
-            if not self.book_structure_manager.save_book_structure(self.book_graph): success = False
-            if success: print("ForceSave: Completed successfully.")
-            else: print("ForceSave: ERROR saving main book structure file.")
+            # The whole save reads the graph, so edits wait until it is done (as _flush_changes does while building)
+            with self.lock, self.json_file_manager.transaction() as transaction: # Commit every file of the forced save together, or none
+                revision = self.session.revision
+                nodes = self.book_graph.get_all_nodes()
+                log.info("ForceSave: Checking/Saving content for %s nodes...", len(nodes))
+                self._write_content_files([node for node in nodes if node.node_type != "book"], self.book_structure_manager.get_original_structure_data(), transaction)
+                log.info("ForceSave: Updating navigation data for all nodes...")
+                self.node_content_updater.update_all_node_navigation(self.book_graph)
+                if self.node_content_updater.last_write_errors: transaction.abort(f"navigation of {len(self.node_content_updater.last_write_errors)} nodes not written")
+                log.info("ForceSave: Saving main book structure file...")
+                if not transaction.aborted and not self.book_structure_manager.save_book_structure(self.book_graph): transaction.abort("book structure not written")
+            success = not transaction.aborted
+            if success: self.session.mark_saved(revision); log.info("ForceSave: Completed successfully.")
+            else: log.error("ForceSave: ERROR - %s; no file was changed.", transaction.aborted)
             return success
-        except Exception as e: print(f"ERROR in force_save_all: {e}"); traceback.print_exc(); return False
+        except Exception as e: log.error("ERROR in force_save_all: %s", e); traceback.print_exc(); return False
 
@@ -0,0 +1,183 @@
+"""
+AutoSaveScheduler and ChangeSet classes for the Interactive Book Editor.
+Collects auto-save events for a quiet period and flushes them as a single
+batch from a background worker thread.
+"""
+
+import time
+import threading
+import traceback # For detailed error logging
+from editor_log import get_logger
+
+log = get_logger(__name__)
+
+class ChangeSet:
+    """
+    Accumulated dirty state waiting to be saved.
+
+    Tracks the nodes, edges and chapters touched since the last flush so that
+    many events (e.g. every step of a node drag) collapse into one save.
+    """
+
+    def __init__(self, node_ids=None, edges=None, chapter_ids=None, all_navigation=False, context=None, moved_node_ids=None, removed_node_ids=None):
+        """
+        Initialize a new ChangeSet instance.
+
+        Args:
+            node_ids (iterable, optional): IDs of added or updated nodes.
+            edges (iterable, optional): (source_id, target_id) pairs of added, updated or removed edges.
+            chapter_ids (iterable, optional): IDs of updated chapters.
+            all_navigation (bool, optional): Whether navigation must be rebuilt for every node.
+            context (str, optional): Short description of the event, for logging.
+            moved_node_ids (iterable, optional): IDs of nodes whose position alone changed;
+                they only need the book structure saved.
+            removed_node_ids (iterable, optional): IDs of removed nodes.
+        """
+        self.node_ids = set(node_ids or ())
+        self.edges = set(edges or ())
+        self.chapter_ids = set(chapter_ids or ())
+        self.moved_node_ids = set(moved_node_ids or ())
+        self.removed_node_ids = set(removed_node_ids or ())
+        self.all_navigation = all_navigation
+        self.contexts = [context] if context else []
+
+    def merge(self, other):
+        """Merge another ChangeSet into this one."""
+        self.node_ids |= other.node_ids
+        self.edges |= other.edges
+        self.chapter_ids |= other.chapter_ids
+        self.moved_node_ids |= other.moved_node_ids
+        self.removed_node_ids |= other.removed_node_ids
+        self.all_navigation = self.all_navigation or other.all_navigation
+        self.contexts.extend(other.contexts)
+        return self
+
+    def is_position_only(self):
+        """Check whether the only change is that some nodes moved."""
+        return bool(self.moved_node_ids) and not (self.node_ids or self.edges or self.chapter_ids or self.removed_node_ids or self.all_navigation)
+
+    def get_structure_node_ids(self):
+        """
+        Get the IDs of the nodes whose saved structure entries may have changed:
+        changed, moved and removed nodes, and the sources of changed edges.
+        None when chapters changed or the change is unbounded, so everything must be rebuilt.
+        """
+        if self.chapter_ids or self.all_navigation: return None
+        return self.node_ids | self.moved_node_ids | self.removed_node_ids | {source_id for source_id, _ in self.edges}
+
+    def describe(self):
+        """Get a short summary of the change set for logging."""
+        if len(self.contexts) == 1: return self.contexts[0]
+        return f"{len(self.contexts)} changes: {len(self.node_ids)} nodes, {len(self.moved_node_ids)} moved, {len(self.removed_node_ids)} removed, {len(self.edges)} edges, {len(self.chapter_ids)} chapters"
+
+
+class AutoSaveScheduler:
+    """
+    Debounces auto-save events and flushes them from a background worker thread.
+
+    Every call to schedule() merges its ChangeSet into the pending one and
+    restarts the quiet period. Once no new events arrive for quiet_period
+    seconds, the worker hands the merged ChangeSet to flush_callback.
+    """
+
+    MAX_RETRIES = 3 # Automatic retries of a failed flush before waiting for the next event
+
+    def __init__(self, flush_callback, quiet_period=0.5):
+        """
+        Initialize a new AutoSaveScheduler and start its worker thread.
+
+        Args:
+            flush_callback (callable): Called with a ChangeSet; returns True on success.
+            quiet_period (float, optional): Seconds without new events before flushing.
+        """
+        self.flush_callback = flush_callback
+        self.quiet_period = quiet_period
+        self._pending = None
+        self._deadline = None # None while nothing is waiting for the timer
+        self._retries = 0
+        self._stopped = False
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock() # Serializes worker and explicit flushes
+        self._worker = threading.Thread(target=self._run, name="AutoSaveWorker", daemon=True)
+        self._worker.start()
+
+    def schedule(self, changes):
+        """Queue a ChangeSet and restart the quiet period."""
+        with self._condition:
+            if self._pending is None: self._pending = ChangeSet()
+            self._pending.merge(changes)
+            self._deadline = time.monotonic() + self.quiet_period
+            self._retries = 0
+            self._condition.notify()
+
+    def has_pending(self):
+        """Check whether changes are waiting to be flushed."""
+        with self._condition:
+            return self._pending is not None
+
+    def flush(self):
+        """
+        Write out pending changes immediately on the calling thread.
+        Waits for a flush already running on the worker to finish first.
+
+        Returns:
+            bool: True if there was nothing to save or the save succeeded.
+        """
+        with self._flush_lock:
+            with self._condition:
+                changes = self._pending
+                self._pending = None
+                self._deadline = None
+            if changes is None: return True
+            try:
+                success = self.flush_callback(changes)
+            except Exception as e:
+                log.error("AutoSaveScheduler: ERROR flushing '%s': %s", changes.describe(), e)
+                traceback.print_exc()
+                success = False
+            if not success: self._requeue(changes)
+            return success
+
+    def shutdown(self, flush=True):
+        """
+        Stop the worker thread.
+
+        Args:
+            flush (bool, optional): Whether to write out pending changes first.
+
+        Returns:
+            bool: Result of the final flush, or True if not flushing.
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        self._worker.join()
+        return self.flush() if flush else True
+
+    def _requeue(self, changes):
+        """Put failed changes back so they are retried with the next flush."""
+        with self._condition:
+            if self._pending is not None: changes.merge(self._pending)
+            self._pending = changes
+            self._retries += 1
+            if self._retries <= self.MAX_RETRIES and not self._stopped:
+                self._deadline = time.monotonic() + self.quiet_period
+                log.warning("AutoSaveScheduler: Save failed, retrying (%s/%s).", self._retries, self.MAX_RETRIES)
+            else:
+                self._deadline = None
+                log.error("AutoSaveScheduler: Save failed, keeping changes until the next event or flush.")
+            self._condition.notify()
+
+    def _run(self):
+        """Worker loop: wait for the quiet period to elapse, then flush."""
+        while True:
+            with self._condition:
+                while not self._stopped:
+                    if self._deadline is None:
+                        self._condition.wait()
+                        continue
+                    remaining = self._deadline - time.monotonic()
+                    if remaining <= 0: break
+                    self._condition.wait(remaining)
+                if self._stopped: return
+            self.flush()
@@ -2,6 +2,7 @@
 Book editor panel for the Interactive Book Editor.
 REVISED: Made Chapter ID editable in the ChaptersTab.
 Ensures chapter_id is assigned before use in on_add_chapter.
+REVISED: Output goes through the book_editor logger (editor_log) instead of print().
 """
 
 from PyQt5.QtWidgets import (
@@ -14,6 +15,9 @@ import re # Import regex for ID validation
 import traceback # For debugging
 
 from editor_panel import EditorPanel
+from editor_log import get_logger
+
+log = get_logger(__name__)
 
 # --- BasicBookPropertiesTab remains unchanged ---
 class BasicBookPropertiesTab(QWidget):
@@ -76,7 +80,7 @@ class ChaptersTab(QWidget):
     def update_chapter_list(self):
         """Rebuilds the chapter list widget and attempts to re-select the previously selected item."""
         if not self.book_graph: return
-        print("ChaptersTab: Updating chapter list...") # Debug
+        log.debug("ChaptersTab: Updating chapter list...")
         self.chapter_list_updating = True 
         stored_current_id = self.current_chapter_id 
         self.chapter_list.clear()
@@ -98,7 +102,7 @@ class ChaptersTab(QWidget):
                  self.disable_chapter_details()
                  
         except Exception as e:
-             print(f"ERROR in ChaptersTab.update_chapter_list loop: {e}")
+             log.error("ERROR in ChaptersTab.update_chapter_list loop: %s", e)
              traceback.print_exc()
              
         self.chapter_list_updating = False
@@ -109,9 +113,7 @@ class ChaptersTab(QWidget):
                   self.on_chapter_selected(current_item, None) 
         elif self.chapter_list.count() == 0: # Ensure details disabled if list is empty
              self.disable_chapter_details()
-        print("ChaptersTab: Chapter list update finished.") # Debug
-
-
+        log.debug("ChaptersTab: Chapter list update finished.")
     def on_chapter_selected(self, current, previous):
         """Update details panel when a chapter is selected in the list."""
         if not current or self.chapter_list_updating: 
@@ -120,7 +122,7 @@ class ChaptersTab(QWidget):
              return
         
         chapter_id = current.data(Qt.UserRole)
-        print(f"ChaptersTab: Chapter selected: {chapter_id}") # Debug
+        log.debug("ChaptersTab: Chapter selected: %s", chapter_id)
         self.current_chapter_id = chapter_id 
         
         if self.book_graph and chapter_id in self.book_graph.chapter_info:
@@ -134,7 +136,7 @@ class ChaptersTab(QWidget):
             self.chapter_id_edit.blockSignals(False); self.chapter_title_edit.blockSignals(False); self.start_node_combo.blockSignals(False); self.chapter_description_edit.blockSignals(False)
             self.enable_chapter_details()
         else: 
-            print(f"ChaptersTab: Selected chapter ID '{chapter_id}' not found in book_graph.chapter_info.") # Debug
+            log.debug("ChaptersTab: Selected chapter ID '%s' not found in book_graph.chapter_info.", chapter_id)
             self.disable_chapter_details()
 
     def on_chapter_id_changed(self):
@@ -147,23 +149,23 @@ class ChaptersTab(QWidget):
         if not re.match(r'^[a-zA-Z0-9_-]+$', new_id): QMessageBox.warning(self, "Invalid ID", "Chapter ID can only contain letters, numbers, underscores, and hyphens."); self.chapter_id_edit.setText(old_id); return
         if new_id in self.book_graph.chapter_info: QMessageBox.warning(self, "Duplicate ID", f"Chapter ID '{new_id}' already exists."); self.chapter_id_edit.setText(old_id); return
         
-        print(f"ChaptersTab: Attempting to rename chapter '{old_id}' to '{new_id}'")
+        log.debug("ChaptersTab: Attempting to rename chapter '%s' to '%s'", old_id, new_id)
         success = self.book_graph.rename_chapter(old_id, new_id) 
         if success:
-            print(f"ChaptersTab: Renamed chapter successfully.")
+            log.debug("ChaptersTab: Renamed chapter successfully.")
             # Important: Update current_chapter_id *before* refreshing list
             self.current_chapter_id = new_id 
             self.update_chapter_list() # Refresh list; this will re-select based on new ID
             self.chapters_changed.emit(list(self.book_graph.chapter_info.values())) 
         else:
-            print(f"ChaptersTab: BookGraph rename failed.")
+            log.warning("ChaptersTab: BookGraph rename failed.")
             QMessageBox.critical(self, "Error", f"Failed to rename chapter '{old_id}' to '{new_id}'. Check logs.")
             self.chapter_id_edit.setText(old_id); self.update_chapter_list() 
             
     def on_add_chapter(self):
         """Handle adding a new chapter."""
         if not self.book_graph: return
-        print("ChaptersTab: Adding new chapter...") # Debug
+        log.debug("ChaptersTab: Adding new chapter...")
         try:
             base_id = "chapter"
             counter = 1
@@ -175,7 +177,7 @@ class ChaptersTab(QWidget):
                 chapter_id = f"{base_id}{counter}" # Reassignment inside loop
             
             title = f"Chapter {counter}"
-            print(f"ChaptersTab: Generated new chapter ID: {chapter_id}, Title: {title}") # Debug
+            log.debug("ChaptersTab: Generated new chapter ID: %s, Title: %s", chapter_id, title)
             self.book_graph.add_chapter(chapter_id, title)
             
             # Update list will handle selection
@@ -183,9 +185,9 @@ class ChaptersTab(QWidget):
             
             # Emit signal AFTER list update and selection
             self.chapters_changed.emit(list(self.book_graph.chapter_info.values()))
-            print(f"ChaptersTab: Chapter {chapter_id} added and signal emitted.") # Debug
+            log.debug("ChaptersTab: Chapter %s added and signal emitted.", chapter_id)
         except Exception as e:
-             print(f"ERROR in ChaptersTab.on_add_chapter: {e}")
+             log.error("ERROR in ChaptersTab.on_add_chapter: %s", e)
              traceback.print_exc()
 
 
@@ -262,7 +264,7 @@ class BookNodeEditor(EditorPanel):
              else: self.current_node.metadata[metadata_key] = new_value
         else:
              if hasattr(self.current_node, property_name): setattr(self.current_node, property_name, new_value)
-             else: print(f"BookNodeEditor: Warning - Node has no attribute '{property_name}'")
+             else: log.warning("BookNodeEditor: Warning - Node has no attribute '%s'", property_name)
         self.node_updated.emit(self.current_node)
     def on_chapters_changed(self, chapters): self.chapters_updated.emit(chapters)
 
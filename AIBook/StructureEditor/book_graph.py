@@ -3,86 +3,338 @@ BookGraph class for the Interactive Book Editor.
 Represents the book structure using NetworkX.
 ADDED: rename_chapter method.
 FIXED: Added missing 'import re'.
+ADDED: NodeView read-only views and update_node_attributes for in-place edits.
+ADDED: Chapter, node type and edge type indexes kept in sync by every mutation.
+ADDED: update_node_positions for writing layout results in bulk.
+ADDED: get_changed_attributes to tell which attributes an edited Node changes.
+REVISED: The graph stores node and edge attributes in slotted NodeRecord/EdgeRecord
+         mappings instead of dicts, with interned type strings and one shared empty metadata.
+ADDED: Selectable graph backend; "array" uses the columnar ArrayDiGraph (array_graph.py).
+REVISED: networkx is imported when the first networkx-backed graph is created, not at import.
 """
 
-import networkx as nx
+import os
 import re # Import the regular expression module
-from node import Node, Edge # Assuming Node and Edge classes are defined
+from collections.abc import MutableMapping
+from types import MappingProxyType
+from node import Node, Edge, intern_string, EMPTY_METADATA # Assuming Node and Edge classes are defined
+from array_graph import ArrayDiGraph
+from editor_log import get_logger
+
+log = get_logger(__name__)
+
+class _SlotRecord(MutableMapping):
+    """
+    Attribute mapping stored by the graph for one node or edge.
+    
+    Known attributes live in __slots__ (an unset slot is a missing key), so a record
+    is a fraction of the size of a dict. Type and chapter strings are interned and
+    empty metadata is stored as EMPTY_METADATA. Other keys go to a dict created on
+    first use, so the record still behaves like the dict networkx expects.
+    """
+    __slots__ = ("_extra",)
+    KEYS = ()
+    INTERNED_KEYS = ()
+
+    def __init__(self, *args, **kwargs):
+        """Create an empty record (as networkx does), optionally filled like dict()."""
+        self._extra = None
+        if args or kwargs: self.update(*args, **kwargs)
+
+    def __getitem__(self, key):
+        if key in self.KEYS:
+            try: return getattr(self, key)
+            except AttributeError: raise KeyError(key) from None
+        if self._extra and key in self._extra: return self._extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        if key in self.KEYS: return getattr(self, key, default)
+        return self._extra.get(key, default) if self._extra else default
+
+    def __setitem__(self, key, value):
+        if key in self.KEYS:
+            if key == 'metadata': value = value or EMPTY_METADATA
+            elif key in self.INTERNED_KEYS: value = intern_string(value)
+            setattr(self, key, value)
+        else:
+            if self._extra is None: self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in self.KEYS:
+            try: delattr(self, key)
+            except AttributeError: raise KeyError(key) from None
+        elif self._extra and key in self._extra: del self._extra[key]
+        else: raise KeyError(key)
+
+    def __iter__(self):
+        for key in self.KEYS:
+            if hasattr(self, key): yield key
+        if self._extra: yield from self._extra
+
+    def __len__(self): return sum(1 for key in self.KEYS if hasattr(self, key)) + len(self._extra or ())
+    def __contains__(self, key): return hasattr(self, key) if key in self.KEYS else bool(self._extra) and key in self._extra
+    def copy(self): return dict(self)
+    def __repr__(self): return f"{type(self).__name__}({dict(self)!r})"
+
+class NodeRecord(_SlotRecord):
+    """Node attributes as stored in the graph."""
+    __slots__ = ("title", "node_type", "chapter", "file_path", "position", "metadata")
+    KEYS = __slots__
+    INTERNED_KEYS = ("node_type", "chapter")
+
+class EdgeRecord(_SlotRecord):
+    """Edge attributes as stored in the graph."""
+    __slots__ = ("edge_type", "metadata")
+    KEYS = __slots__
+    INTERNED_KEYS = ("edge_type",)
+
+_record_digraph_class = None
+
+def _get_record_digraph_class():
+    """
+    Get RecordDiGraph, a networkx DiGraph whose node and edge attributes are
+    NodeRecord/EdgeRecord instances. networkx is imported the first time a graph
+    needs it rather than at startup.
+    """
+    global _record_digraph_class
+    if _record_digraph_class is None:
+        import networkx as nx
+        class RecordDiGraph(nx.DiGraph):
+            """A networkx DiGraph whose node and edge attributes are NodeRecord/EdgeRecord instances."""
+            node_attr_dict_factory = NodeRecord
+            edge_attr_dict_factory = EdgeRecord
+        RecordDiGraph.__qualname__ = "RecordDiGraph"
+        _record_digraph_class = RecordDiGraph
+    return _record_digraph_class
+
+def __getattr__(name):
+    """Resolve book_graph.RecordDiGraph on first access."""
+    if name == "RecordDiGraph": return _get_record_digraph_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+GRAPH_BACKENDS = {"networkx": lambda: _get_record_digraph_class()(), "array": ArrayDiGraph} # name -> graph factory
+DEFAULT_GRAPH_BACKEND = os.environ.get("AIBOOK_GRAPH_BACKEND", "networkx") # "array" stores large books in ArrayDiGraph columns
+
+class NodeView:
+    """
+    Read-only view of a node stored in a BookGraph.
+    
+    Reads attributes straight from the graph's node data, so iterating the graph
+    does not copy anything. Use to_node() (or BookGraph.get_node) when a mutable
+    Node is needed, and BookGraph.update_node_attributes to change the node.
+    """
+    __slots__ = ("id", "_data")
+
+    def __init__(self, node_id, node_data):
+        """Bind a view to a node ID and the graph's attribute dict for that node."""
+        self.id = node_id; self._data = node_data
+
+    @property
+    def title(self): return self._data.get('title', self.id)
+    @property
+    def node_type(self): return self._data.get('node_type')
+    @property
+    def chapter(self): return self._data.get('chapter')
+    @property
+    def file_path(self): return self._data.get('file_path')
+    @property
+    def position(self): return self._data.get('position', (0.0, 0.0))
+    @property
+    def metadata(self): return MappingProxyType(self._data.get('metadata', {}))
+
+    to_dict = Node.to_dict # Same serialization as a materialized Node
+
+    def to_node(self):
+        """Materialize an independent, mutable Node copy."""
+        return Node(node_id=self.id, title=self.title, node_type=self.node_type, chapter=self.chapter, file_path=self.file_path,
+                    position=self.position, metadata=self._data.get('metadata', {}).copy())
+
+    def __repr__(self): return f"NodeView({self.id!r}, type={self.node_type!r})"
 
 class BookGraph:
     """
-    Represents the book structure as a graph using NetworkX.
+    Represents the book structure as a graph using NetworkX (or an ArrayDiGraph for large books).
     Manages nodes, edges, chapters, and metadata.
     """
     
-    def __init__(self):
-        """Initialize a new BookGraph instance."""
-        self.graph = nx.DiGraph() 
+    def __init__(self, backend=None):
+        """
+        Initialize a new BookGraph instance.
+
+        Args:
+            backend (str, optional): Graph storage, a key of GRAPH_BACKENDS (default DEFAULT_GRAPH_BACKEND).
+                "networkx" keeps a networkx DiGraph; "array" keeps an ArrayDiGraph, which
+                stores nodes and edges in columns and suits very large books.
+        """
+        backend = backend or DEFAULT_GRAPH_BACKEND
+        if backend not in GRAPH_BACKENDS: log.warning("BookGraph: Warning - Unknown graph backend '%s', using networkx.", backend); backend = "networkx"
+        self.backend = backend
+        self.graph = GRAPH_BACKENDS[backend]() 
         self.chapter_info = {} 
         self.metadata = {} 
+        # Secondary indexes (key -> ordered dict used as an insertion-ordered set)
+        self._nodes_by_chapter = {} # chapter_id -> {node_id: None}
+        self._nodes_by_type = {} # node_type -> {node_id: None}
+        self._edges_by_type = {} if backend == "networkx" else None # edge_type -> {(source_id, target_id): None}; ArrayDiGraph scans its type column instead
+
+    @staticmethod
+    def _move_in_index(index, member, old_key, new_key):
+        """Move a member between index buckets. None keys are not indexed; unchanged keys keep their order. A None index is not kept."""
+        if old_key == new_key or index is None: return
+        if old_key is not None:
+            bucket = index.get(old_key)
+            if bucket is not None:
+                bucket.pop(member, None)
+                if not bucket: del index[old_key]
+        if new_key is not None: index.setdefault(new_key, {})[member] = None
+
+    def _reindex_node(self, node_id, old_data, new_data):
+        """Update the chapter and node type indexes after a node was added, changed or removed."""
+        self._move_in_index(self._nodes_by_chapter, node_id, old_data.get('chapter'), new_data.get('chapter'))
+        self._move_in_index(self._nodes_by_type, node_id, old_data.get('node_type'), new_data.get('node_type'))
         
     def add_node(self, node):
         """Add a node to the graph."""
-        if not isinstance(node, Node): print("BookGraph.add_node: Error - Input must be a Node object."); return False
-        if node.id in self.graph: print(f"BookGraph.add_node: Warning - Node {node.id} already exists. Updating."); return self.update_node(node) 
+        if not isinstance(node, Node): log.error("BookGraph.add_node: Error - Input must be a Node object."); return False
+        if node.id in self.graph: log.warning("BookGraph.add_node: Warning - Node %s already exists. Updating.", node.id); return self.update_node(node) 
         self.graph.add_node(node.id, title=node.title, node_type=node.node_type, chapter=node.chapter,
-                            file_path=node.file_path, position=node.position, metadata=node.metadata.copy())
-        print(f"BookGraph.add_node: Node {node.id} added."); return True
+                            file_path=node.file_path, position=node.position, metadata=dict(node.metadata) if node.metadata else None)
+        self._reindex_node(node.id, {}, self.graph.nodes[node.id])
+        log.debug("BookGraph.add_node: Node %s added.", node.id); return True
 
     def update_node(self, node):
         """Update an existing node's attributes in the graph."""
-        if not isinstance(node, Node): print("BookGraph.update_node: Error - Input must be a Node object."); return False
-        if node.id not in self.graph: print(f"BookGraph.update_node: Error - Node {node.id} not found."); return False
+        if not isinstance(node, Node): log.error("BookGraph.update_node: Error - Input must be a Node object."); return False
+        if node.id not in self.graph: log.error("BookGraph.update_node: Error - Node %s not found.", node.id); return False
         node_data = self.graph.nodes[node.id]
+        self._reindex_node(node.id, node_data, {'chapter': node.chapter, 'node_type': node.node_type})
         node_data['title'] = node.title; node_data['node_type'] = node.node_type; node_data['chapter'] = node.chapter
-        node_data['file_path'] = node.file_path; node_data['position'] = node.position; node_data['metadata'] = node.metadata.copy() 
+        node_data['file_path'] = node.file_path; node_data['position'] = node.position; node_data['metadata'] = dict(node.metadata) if node.metadata else None
         return True
 
     def remove_node(self, node_id):
         """Remove a node and its connected edges from the graph."""
-        if node_id not in self.graph: print(f"BookGraph.remove_node: Warning - Node {node_id} not found."); return False
+        if node_id not in self.graph: log.warning("BookGraph.remove_node: Warning - Node %s not found.", node_id); return False
         try:
-            self.graph.remove_node(node_id); print(f"BookGraph.remove_node: Node {node_id} removed.")
+            for source_id, target_id, edge_data in list(self.graph.in_edges(node_id, data=True)) + list(self.graph.out_edges(node_id, data=True)):
+                self._move_in_index(self._edges_by_type, (source_id, target_id), edge_data.get('edge_type'), None)
+            self._reindex_node(node_id, self.graph.nodes[node_id], {})
+            self.graph.remove_node(node_id); log.debug("BookGraph.remove_node: Node %s removed.", node_id)
             for chapter_data in self.chapter_info.values():
                  if "nodes" in chapter_data and node_id in chapter_data["nodes"]: chapter_data["nodes"].remove(node_id)
             return True
-        except Exception as e: print(f"BookGraph.remove_node: Error removing node {node_id}: {e}"); return False
+        except Exception as e: log.error("BookGraph.remove_node: Error removing node %s: %s", node_id, e); return False
 
     def get_node(self, node_id):
-        """Get a Node object by its ID."""
+        """Get a Node object by its ID. The Node is a copy; prefer get_node_view for read-only access."""
         if node_id in self.graph:
-            node_data = self.graph.nodes[node_id]
-            return Node(node_id=node_id, title=node_data.get('title', node_id), node_type=node_data.get('node_type'),
-                        chapter=node_data.get('chapter'), file_path=node_data.get('file_path'),
-                        position=node_data.get('position', (0.0, 0.0)), metadata=node_data.get('metadata', {}).copy())
+            return NodeView(node_id, self.graph.nodes[node_id]).to_node()
         return None
 
     def get_all_nodes(self):
         """Get a list of all Node objects in the graph."""
         return [self.get_node(node_id) for node_id in self.graph.nodes()]
 
+    def get_node_view(self, node_id):
+        """Get a read-only NodeView by ID without copying, or None if not found."""
+        if node_id in self.graph: return NodeView(node_id, self.graph.nodes[node_id])
+        return None
+
+    def iter_node_views(self):
+        """Iterate read-only NodeViews of all nodes, in graph order, without materializing Node objects."""
+        for node_id, node_data in self.graph.nodes(data=True): yield NodeView(node_id, node_data)
+
+    NODE_ATTRIBUTES = ("title", "node_type", "chapter", "file_path", "position", "metadata")
+
+    def update_node_attributes(self, node_id, **attributes):
+        """
+        Change selected attributes of a node in place without materializing a Node.
+        Accepts title, node_type, chapter, file_path, position and metadata. Metadata is
+        copied in, so the caller's dict is never shared with the graph.
+        """
+        if node_id not in self.graph: log.error("BookGraph.update_node_attributes: Error - Node %s not found.", node_id); return False
+        unknown = set(attributes) - set(self.NODE_ATTRIBUTES)
+        if unknown: log.error("BookGraph.update_node_attributes: Error - Unknown attributes %s.", sorted(unknown)); return False
+        if 'metadata' in attributes: attributes['metadata'] = dict(attributes['metadata'] or {})
+        node_data = self.graph.nodes[node_id]
+        self._reindex_node(node_id, node_data, {**node_data, **attributes})
+        node_data.update(attributes)
+        return True
+
+    def get_changed_attributes(self, node):
+        """
+        Compare a Node with the graph's data for it.
+
+        Returns:
+            set: Names from NODE_ATTRIBUTES whose values differ (all of them if the node is not in the graph).
+        """
+        if node.id not in self.graph: return set(self.NODE_ATTRIBUTES)
+        node_data = self.graph.nodes[node.id]
+        changed = {name for name in ("title", "node_type", "chapter", "file_path") if getattr(node, name) != node_data.get(name)}
+        if tuple(node.position or ()) != tuple(node_data.get('position') or ()): changed.add("position")
+        if (node.metadata or {}) != (node_data.get('metadata') or {}): changed.add("metadata")
+        return changed
+
+    def update_node_positions(self, positions):
+        """
+        Set the positions of many nodes at once (e.g. layout results). Positions are not
+        indexed, so this only writes the node data. Unknown node IDs are skipped.
+
+        Returns:
+            int: Number of nodes updated.
+        """
+        nodes = self.graph.nodes
+        updated = 0
+        for node_id, (x, y) in positions.items():
+            if node_id in nodes: nodes[node_id]['position'] = (float(x), float(y)); updated += 1
+        return updated
+
+    # --- Index Lookups ---
+    def get_node_ids_in_chapter(self, chapter_id):
+        """Get the IDs of nodes assigned to a chapter, in the order they joined it."""
+        return list(self._nodes_by_chapter.get(chapter_id, ()))
+
+    def get_nodes_by_chapter(self):
+        """Get a dict of chapter_id -> list of node IDs for every chapter that has nodes."""
+        return {chapter_id: list(node_ids) for chapter_id, node_ids in self._nodes_by_chapter.items()}
+
+    def get_node_ids_by_type(self, node_type):
+        """Get the IDs of nodes of the given type."""
+        return list(self._nodes_by_type.get(node_type, ()))
+
+    def get_edges_by_type(self, edge_type):
+        """Get (source_id, target_id) pairs of edges of the given type."""
+        if self._edges_by_type is None: return self.graph.edges_of_type(edge_type)
+        return list(self._edges_by_type.get(edge_type, ()))
+
     def add_edge(self, edge):
         """Add an edge to the graph."""
-        if not isinstance(edge, Edge): print("BookGraph.add_edge: Error - Input must be an Edge object."); return False
-        if not edge.source_id or not edge.target_id: print("BookGraph.add_edge: Error - Edge must have source and target IDs."); return False
-        if edge.source_id not in self.graph or edge.target_id not in self.graph: print(f"BookGraph.add_edge: Error - Source ({edge.source_id}) or Target ({edge.target_id}) node not found."); return False
-        if self.graph.has_edge(edge.source_id, edge.target_id): print(f"BookGraph.add_edge: Warning - Edge {edge.source_id}->{edge.target_id} already exists. Updating."); return self.update_edge(edge) 
-        self.graph.add_edge(edge.source_id, edge.target_id, edge_type=edge.edge_type, metadata=edge.metadata.copy())
-        print(f"BookGraph.add_edge: Edge {edge.source_id}->{edge.target_id} [{edge.edge_type}] added."); return True
+        if not isinstance(edge, Edge): log.error("BookGraph.add_edge: Error - Input must be an Edge object."); return False
+        if not edge.source_id or not edge.target_id: log.error("BookGraph.add_edge: Error - Edge must have source and target IDs."); return False
+        if edge.source_id not in self.graph or edge.target_id not in self.graph: log.error("BookGraph.add_edge: Error - Source (%s) or Target (%s) node not found.", edge.source_id, edge.target_id); return False
+        if self.graph.has_edge(edge.source_id, edge.target_id): log.warning("BookGraph.add_edge: Warning - Edge %s->%s already exists. Updating.", edge.source_id, edge.target_id); return self.update_edge(edge) 
+        self.graph.add_edge(edge.source_id, edge.target_id, edge_type=edge.edge_type, metadata=dict(edge.metadata) if edge.metadata else None)
+        self._move_in_index(self._edges_by_type, (edge.source_id, edge.target_id), None, edge.edge_type)
+        log.debug("BookGraph.add_edge: Edge %s->%s [%s] added.", edge.source_id, edge.target_id, edge.edge_type); return True
 
     def update_edge(self, edge):
         """Update an existing edge's attributes."""
-        if not isinstance(edge, Edge): print("BookGraph.update_edge: Error - Input must be an Edge object."); return False
-        if not self.graph.has_edge(edge.source_id, edge.target_id): print(f"BookGraph.update_edge: Error - Edge {edge.source_id}->{edge.target_id} not found."); return False
+        if not isinstance(edge, Edge): log.error("BookGraph.update_edge: Error - Input must be an Edge object."); return False
+        if not self.graph.has_edge(edge.source_id, edge.target_id): log.error("BookGraph.update_edge: Error - Edge %s->%s not found.", edge.source_id, edge.target_id); return False
         edge_data = self.graph.edges[edge.source_id, edge.target_id]
-        edge_data['edge_type'] = edge.edge_type; edge_data['metadata'] = edge.metadata.copy() 
+        self._move_in_index(self._edges_by_type, (edge.source_id, edge.target_id), edge_data.get('edge_type'), edge.edge_type)
+        edge_data['edge_type'] = edge.edge_type; edge_data['metadata'] = dict(edge.metadata) if edge.metadata else None
         return True
 
     def remove_edge(self, source_id, target_id):
         """Remove an edge from the graph."""
-        if not self.graph.has_edge(source_id, target_id): print(f"BookGraph.remove_edge: Warning - Edge {source_id}->{target_id} not found."); return False
-        try: self.graph.remove_edge(source_id, target_id); print(f"BookGraph.remove_edge: Edge {source_id}->{target_id} removed."); return True
-        except Exception as e: print(f"BookGraph.remove_edge: Error removing edge {source_id}->{target_id}: {e}"); return False
+        if not self.graph.has_edge(source_id, target_id): log.warning("BookGraph.remove_edge: Warning - Edge %s->%s not found.", source_id, target_id); return False
+        try:
+            self._move_in_index(self._edges_by_type, (source_id, target_id), self.graph.edges[source_id, target_id].get('edge_type'), None)
+            self.graph.remove_edge(source_id, target_id); log.debug("BookGraph.remove_edge: Edge %s->%s removed.", source_id, target_id); return True
+        except Exception as e: log.error("BookGraph.remove_edge: Error removing edge %s->%s: %s", source_id, target_id, e); return False
 
     def get_edge(self, source_id, target_id):
         """Get an Edge object by its source and target IDs."""
@@ -98,22 +350,20 @@ class BookGraph:
     # --- Chapter Management ---
     def add_chapter(self, chapter_id, title, description=""):
         """Add or update a chapter definition."""
-        if not chapter_id or not title: print("BookGraph.add_chapter: Error - Chapter ID and Title are required."); return False
+        if not chapter_id or not title: log.error("BookGraph.add_chapter: Error - Chapter ID and Title are required."); return False
         self.chapter_info[chapter_id] = {"id": chapter_id, "title": title, "description": description,
                                          "nodes": self.chapter_info.get(chapter_id, {}).get("nodes", []), 
                                          "startNode": self.chapter_info.get(chapter_id, {}).get("startNode", "")}
-        print(f"BookGraph.add_chapter: Chapter '{chapter_id}' added/updated."); return True
+        log.debug("BookGraph.add_chapter: Chapter '%s' added/updated.", chapter_id); return True
 
     def remove_chapter(self, chapter_id):
         """Remove a chapter definition."""
-        if chapter_id not in self.chapter_info: print(f"BookGraph.remove_chapter: Warning - Chapter '{chapter_id}' not found."); return False
-        nodes_in_chapter = self.chapter_info[chapter_id].get("nodes", [])
+        if chapter_id not in self.chapter_info: log.warning("BookGraph.remove_chapter: Warning - Chapter '%s' not found.", chapter_id); return False
+        nodes_in_chapter = self.get_node_ids_in_chapter(chapter_id)
         if nodes_in_chapter:
-             print(f"BookGraph.remove_chapter: Warning - Chapter '{chapter_id}' contains nodes. Unassigning them.")
-             for node_id in nodes_in_chapter:
-                  node = self.get_node(node_id)
-                  if node and node.chapter == chapter_id: node.chapter = None; self.update_node(node) 
-        del self.chapter_info[chapter_id]; print(f"BookGraph.remove_chapter: Chapter '{chapter_id}' removed."); return True
+             log.warning("BookGraph.remove_chapter: Warning - Chapter '%s' contains nodes. Unassigning them.", chapter_id)
+             for node_id in nodes_in_chapter: self.update_node_attributes(node_id, chapter=None) 
+        del self.chapter_info[chapter_id]; log.info("BookGraph.remove_chapter: Chapter '%s' removed.", chapter_id); return True
 
     def get_chapters(self):
         """Get the chapter information dictionary."""
@@ -121,31 +371,28 @@ class BookGraph:
 
     def rename_chapter(self, old_id, new_id):
         """Renames a chapter ID, updating chapter_info and associated nodes."""
-        if old_id not in self.chapter_info: print(f"BookGraph.rename_chapter: Error - Old chapter ID '{old_id}' not found."); return False
+        if old_id not in self.chapter_info: log.error("BookGraph.rename_chapter: Error - Old chapter ID '%s' not found.", old_id); return False
         if new_id == old_id: return True 
-        if new_id in self.chapter_info: print(f"BookGraph.rename_chapter: Error - New chapter ID '{new_id}' already exists."); return False
+        if new_id in self.chapter_info: log.error("BookGraph.rename_chapter: Error - New chapter ID '%s' already exists.", new_id); return False
         # Use re.match for validation (import re at the top)
-        if not new_id or not re.match(r'^[a-zA-Z0-9_-]+$', new_id): print(f"BookGraph.rename_chapter: Error - New chapter ID '{new_id}' is invalid."); return False
-        print(f"BookGraph.rename_chapter: Renaming '{old_id}' to '{new_id}'...")
+        if not new_id or not re.match(r'^[a-zA-Z0-9_-]+$', new_id): log.error("BookGraph.rename_chapter: Error - New chapter ID '%s' is invalid.", new_id); return False
+        log.info("BookGraph.rename_chapter: Renaming '%s' to '%s'...", old_id, new_id)
         try:
             chapter_data = self.chapter_info.pop(old_id)
             chapter_data['id'] = new_id 
             self.chapter_info[new_id] = chapter_data
             nodes_updated_count = 0
-            for node_id in list(self.graph.nodes()): 
-                node = self.get_node(node_id) 
-                if node and node.chapter == old_id:
-                    node.chapter = new_id 
-                    self.update_node(node) 
-                    nodes_updated_count += 1
-            print(f"BookGraph.rename_chapter: Updated chapter_info and {nodes_updated_count} nodes."); return True
-        except Exception as e: print(f"BookGraph.rename_chapter: Error during rename: {e}"); return False
+            for node_id in self.get_node_ids_in_chapter(old_id): 
+                self.update_node_attributes(node_id, chapter=new_id) 
+                nodes_updated_count += 1
+            log.info("BookGraph.rename_chapter: Updated chapter_info and %s nodes.", nodes_updated_count); return True
+        except Exception as e: log.error("BookGraph.rename_chapter: Error during rename: %s", e); return False
 
     # --- Serialization/Deserialization ---
     def to_dict(self):
         """Convert the graph structure to a dictionary suitable for JSON."""
         graph_dict = {"metadata": self.metadata.copy(), "chapters": list(self.chapter_info.values()),
-                      "nodes": [node.to_dict() for node in self.get_all_nodes()], 
+                      "nodes": [node.to_dict() for node in self.iter_node_views()], 
                       "edges": [edge.to_dict() for edge in self.get_all_edges()]}
         return graph_dict
 
@@ -155,13 +402,13 @@ class BookGraph:
         graph = cls(); graph.metadata = data.get("metadata", {})
         for node_data in data.get("nodes", []):
             try: node = Node.from_dict(node_data); graph.add_node(node)
-            except ValueError as e: print(f"BookGraph.from_dict: Skipping invalid node data: {node_data} ({e})")
+            except ValueError as e: log.warning("BookGraph.from_dict: Skipping invalid node data: %s (%s)", node_data, e)
         for edge_data in data.get("edges", []):
              try:
                  if edge_data.get("source") in graph.graph.nodes and edge_data.get("target") in graph.graph.nodes:
                      edge = Edge.from_dict(edge_data); graph.add_edge(edge)
-                 else: print(f"BookGraph.from_dict: Skipping edge due to missing node: {edge_data}")
-             except ValueError as e: print(f"BookGraph.from_dict: Skipping invalid edge data: {edge_data} ({e})")
+                 else: log.warning("BookGraph.from_dict: Skipping edge due to missing node: %s", edge_data)
+             except ValueError as e: log.warning("BookGraph.from_dict: Skipping invalid edge data: %s (%s)", edge_data, e)
         for chapter_data in data.get("chapters", []):
              if "id" in chapter_data and "title" in chapter_data:
                   graph.add_chapter(chapter_data["id"], chapter_data["title"], chapter_data.get("description"))
@@ -3,275 +3,509 @@ BookStructureManager class for the Interactive Book Editor.
 REVISED: 
 - Explicitly creates Node objects for character POVs during loading.
 - Ensures chapter assignment and node types are robustly loaded and saved.
+- Loads book-structure.json section by section without copying the parsed data.
+- Node positions are also kept in a node-positions.json sidecar that can be saved on
+  its own; on load it overrides book-structure.json's node_positions when it is newer.
+- Supports the optional sharded format (see StructureShardManager): a manifest plus one
+  file per chapter, of which a save only rebuilds and writes the shards it touches.
+- The structure data last loaded or saved lives in the shared ProjectSession, by reference:
+  a save adopts the data it wrote instead of deep-copying it, once its transaction commits.
 """
 
 import os
-import json
-import copy
 import traceback # For detailed error logging
 from node import Node, Edge
 from book_graph import BookGraph
 from path_manager import PathManager
 from character_pov_manager import CharacterPOVManager
+from json_file_manager import JsonFileManager
+from structure_shard_manager import StructureShardManager, UNASSIGNED_SHARD, SHARD_SECTIONS
+from project_session import ProjectSession
+from editor_log import get_logger
+
+log = get_logger(__name__)
 
 class BookStructureManager:
     """
     Manages the book structure data. Responsible for loading from and saving to 
-    the book-structure.json file.
+    the book-structure.json file, or the manifest and shards of a sharded project.
     """
     
-    def __init__(self, path_manager=None, character_pov_manager=None):
-        """Initialize a new BookStructureManager instance."""
+    def __init__(self, path_manager=None, character_pov_manager=None, json_file_manager=None, structure_shard_manager=None, session=None):
+        """Initialize a new BookStructureManager instance. Pass the owner's ProjectSession to share its structure snapshot."""
         self.path_manager = path_manager or PathManager()
         self.character_pov_manager = character_pov_manager or CharacterPOVManager()
-        self.original_structure_data = None 
+        self.json_file_manager = json_file_manager or JsonFileManager()
+        self.structure_shard_manager = structure_shard_manager or StructureShardManager(self.path_manager, self.json_file_manager)
+        self.session = session or ProjectSession(self.path_manager, self.character_pov_manager, self.json_file_manager)
+
+    @property
+    def original_structure_data(self):
+        """The structure data last loaded or saved (the session's snapshot)."""
+        return self.session.structure_snapshot
+
+    @original_structure_data.setter
+    def original_structure_data(self, structure_data): self.session.set_structure_snapshot(structure_data)
+
+    BOOK_METADATA_KEYS = ("title", "author", "version", "defaultStartNode", "defaultPOV")
+    # Sections built into the graph while streaming, in dependency order, with the
+    # sections (or metadata keys) each one needs to have been read first.
+    LOAD_SECTIONS = (
+        ("chapters", ()),
+        ("criticalPath", ("node_positions",)),
+        ("characterPOVs", ("node_positions", "criticalPath")),
+        ("edges", ("criticalPath", "characterPOVs") + BOOK_METADATA_KEYS), # Creates the 'book' node first
+    )
 
     def load_book_structure(self):
         """
         Load the book structure from book-structure.json. Creates Node objects
         for both critical path and character POV nodes found in the structure.
+        
+        The file is parsed one top-level section at a time, and each section is
+        built into the graph as soon as the sections it depends on have been read.
+        Node content files are not read here; they are loaded when a node is opened.
+        A sharded project is read from its manifest and shards instead.
         """
+        if self.structure_shard_manager.is_sharded(): return self._load_sharded_structure()
         structure_path = self.path_manager.get_book_structure_path()
         if not structure_path or not os.path.isfile(structure_path):
-            print(f"BookStructureManager: Structure file not found at {structure_path}")
+            log.warning("BookStructureManager: Structure file not found at %s", structure_path)
             return None, None
-        print(f"BookStructureManager: Loading structure from {structure_path}")
+        log.info("BookStructureManager: Loading structure from %s", structure_path)
         try:
-            with open(structure_path, 'r', encoding='utf-8') as f: structure_data = json.load(f)
-            self.original_structure_data = copy.deepcopy(structure_data)
-            
-            # --- Initialize BookGraph ---
+            # The parsed data is owned by this manager and never shared with the graph, so no copy is kept
+            structure_data = {}
+            self.original_structure_data = structure_data
             book_graph = BookGraph()
-            
-            # Set book metadata early
-            book_graph.metadata = {"title": structure_data.get("title", "Book Title"), "author": structure_data.get("author", "Author Name"),
-                                   "version": structure_data.get("version", "1.0"), "defaultStartNode": structure_data.get("defaultStartNode", ""),
-                                   "defaultPOV": structure_data.get("defaultPOV", "Omniscient")}
+            loaders = {"chapters": self._load_chapters, "criticalPath": self._load_critical_path_nodes,
+                       "characterPOVs": self._load_character_pov_nodes, "edges": self._load_edges}
+            pending = [name for name, _ in self.LOAD_SECTIONS]
+            nodes_created = set() # Keep track of nodes already created
 
-            # --- Load Node Positions ---
-            node_positions = structure_data.get("node_positions", {})
+            def load_ready_sections(final=False):
+                for name, requires in self.LOAD_SECTIONS:
+                    if name not in pending: continue
+                    if not final and not (name in structure_data and all(key in structure_data for key in requires)): continue
+                    pending.remove(name)
+                    loaders[name](book_graph, structure_data, nodes_created)
 
-            # --- Create Nodes from criticalPath ---
-            print(f"BookStructureManager: Loading {len(structure_data.get('criticalPath', []))} nodes from criticalPath...")
-            nodes_created = set() # Keep track of nodes already created
-            for node_data in structure_data.get("criticalPath", []):
-                node_id = node_data.get("id")
-                if not node_id:
-                    print("BookStructureManager: Warning - Skipping node in criticalPath with missing ID.")
-                    continue
-                
-                position = node_positions.get(node_id, (0.0, 0.0))
-                # Ensure position is correctly formatted tuple of floats
-                if isinstance(position, (list, tuple)) and len(position) == 2:
-                     try: position = (float(position[0]), float(position[1]))
-                     except (ValueError, TypeError): position = (0.0, 0.0)
-                else: position = (0.0, 0.0)
-
-                node = Node(
-                    node_id=node_id,
-                    title=node_data.get("title", node_id),
-                    node_type=node_data.get("type", "fiction"), # Get type from criticalPath entry
-                    chapter=node_data.get("chapter"), # Get chapter from criticalPath entry
-                    file_path=self.path_manager.normalize_path(node_data.get("filePath")),
-                    position=position,
-                    metadata={} # Start with empty metadata, specific things added later if needed
-                )
-                book_graph.add_node(node)
-                nodes_created.add(node_id)
-
-            # --- Create Nodes from characterPOVs (if not already created) ---
-            print(f"BookStructureManager: Loading {len(structure_data.get('characterPOVs', {}))} character POV definitions...")
-            for base_node_id, pov_list in structure_data.get("characterPOVs", {}).items():
-                for pov_data in pov_list:
-                    pov_node_id = pov_data.get("nodeId")
-                    character_name = pov_data.get("character")
-                    file_path = self.path_manager.normalize_path(pov_data.get("filePath"))
-                    
-                    if not pov_node_id:
-                         print(f"BookStructureManager: Warning - Skipping POV entry for base {base_node_id} with missing nodeId.")
-                         continue
-                         
-                    if pov_node_id not in nodes_created:
-                        print(f"BookStructureManager: Creating node object for POV node {pov_node_id}...")
-                        position = node_positions.get(pov_node_id, (0.0, 0.0)) # Get position if available
-                        if isinstance(position, (list, tuple)) and len(position) == 2:
-                             try: position = (float(position[0]), float(position[1]))
-                             except (ValueError, TypeError): position = (0.0, 0.0)
-                        else: position = (0.0, 0.0)
-
-                        # Try to infer chapter from base node if possible
-                        base_node = book_graph.get_node(base_node_id)
-                        pov_chapter = base_node.chapter if base_node else None
-
-                        pov_node = Node(
-                            node_id=pov_node_id,
-                            # Infer title, default to ID if base node not found yet
-                            title=f"{base_node.title} ({character_name} POV)" if base_node else f"{pov_node_id}",
-                            node_type="character_pov", # Explicitly set type
-                            chapter=pov_chapter, # Inherit chapter
-                            file_path=file_path,
-                            position=position,
-                            metadata={"povCharacter": character_name} # Store POV character in metadata
-                        )
-                        book_graph.add_node(pov_node)
-                        nodes_created.add(pov_node_id)
-                    else:
-                         # Node already exists (e.g., was also in criticalPath), ensure metadata is added
-                         existing_node = book_graph.get_node(pov_node_id)
-                         if existing_node and "povCharacter" not in existing_node.metadata:
-                              existing_node.metadata["povCharacter"] = character_name
-                              book_graph.update_node(existing_node) # Update graph model
-
-
-            # --- Create 'book' node ---
-            if not book_graph.get_node("book"):
-                print("BookStructureManager: Creating missing 'book' node.")
-                book_node_meta = {k: v for k, v in book_graph.metadata.items() if k != 'title'}
-                book_node = Node(node_id="book", title=book_graph.metadata["title"], node_type="book", position=(100, 100), metadata=book_node_meta)
-                book_graph.add_node(book_node)
-            
-            # --- Load Edges ---
-            print(f"BookStructureManager: Loading {len(structure_data.get('edges', []))} edges...")
-            for edge_data in structure_data.get("edges", []):
-                 try:
-                      # Ensure source and target exist before adding edge
-                      source_id = edge_data.get("source")
-                      target_id = edge_data.get("target")
-                      if source_id in book_graph.graph.nodes and target_id in book_graph.graph.nodes:
-                           edge = Edge.from_dict(edge_data)
-                           book_graph.add_edge(edge)
-                      else:
-                           print(f"BookStructureManager: Warning - Skipping edge due to missing node(s): {source_id} -> {target_id}")
-                 except ValueError as e:
-                      print(f"BookStructureManager: Warning - Skipping invalid edge data: {edge_data} ({e})")
-
-
-            # --- Load Chapters ---
-            print(f"BookStructureManager: Loading {len(structure_data.get('chapters', []))} chapter definitions...")
-            for chapter_data in structure_data.get("chapters", []):
-                if "id" in chapter_data and "title" in chapter_data:
-                    book_graph.add_chapter(chapter_data["id"], chapter_data["title"], chapter_data.get("description"))
-                    if "startNode" in chapter_data: book_graph.chapter_info[chapter_data["id"]]["startNode"] = chapter_data["startNode"]
-                    # Chapter node lists will be rebuilt on save based on node.chapter attribute
-
-            print(f"BookStructureManager: Load successful. Graph has {book_graph.graph.number_of_nodes()} nodes and {book_graph.graph.number_of_edges()} edges.")
+            for key, value in self.json_file_manager.iter_json_items(structure_path):
+                structure_data[key] = value
+                load_ready_sections()
+            load_ready_sections(final=True) # Sections that are missing or out of order
+            self._load_book_metadata(book_graph, structure_data)
+            self._load_node_positions_sidecar(book_graph, structure_path)
+
+            log.info("BookStructureManager: Load successful. Graph has %s nodes and %s edges.", book_graph.graph.number_of_nodes(), book_graph.graph.number_of_edges())
             return book_graph, self.original_structure_data
             
         except Exception as e:
-            print(f"ERROR loading book structure: {e}")
+            log.error("ERROR loading book structure: %s", e)
             traceback.print_exc()
             self.original_structure_data = None 
             return None, None
+
+    def _load_sharded_structure(self):
+        """Load a sharded project: the shards are combined and built section by section like book-structure.json."""
+        log.info("BookStructureManager: Loading sharded structure from %s", self.path_manager.get_structure_manifest_path())
+        try:
+            structure_data = self.structure_shard_manager.read_structure_data()
+            self.original_structure_data = structure_data
+            book_graph = BookGraph()
+            loaders = {"chapters": self._load_chapters, "criticalPath": self._load_critical_path_nodes,
+                       "characterPOVs": self._load_character_pov_nodes, "edges": self._load_edges}
+            nodes_created = set()
+            for name, _ in self.LOAD_SECTIONS: loaders[name](book_graph, structure_data, nodes_created)
+            self._load_book_metadata(book_graph, structure_data)
+            log.info("BookStructureManager: Load successful. Graph has %s nodes and %s edges.", book_graph.graph.number_of_nodes(), book_graph.graph.number_of_edges())
+            return book_graph, self.original_structure_data
+        except Exception as e:
+            log.error("ERROR loading sharded book structure: %s", e)
+            traceback.print_exc()
+            self.original_structure_data = None
+            return None, None
+
+    @staticmethod
+    def _get_node_position(structure_data, node_id):
+        """Get a node's saved position as a tuple of floats, or (0.0, 0.0)."""
+        position = structure_data.get("node_positions", {}).get(node_id, (0.0, 0.0))
+        # Ensure position is correctly formatted tuple of floats
+        if isinstance(position, (list, tuple)) and len(position) == 2:
+             try: return (float(position[0]), float(position[1]))
+             except (ValueError, TypeError): pass
+        return (0.0, 0.0)
+
+    def _load_book_metadata(self, book_graph, structure_data):
+        """Set the book metadata and make sure the 'book' node exists."""
+        book_graph.metadata = {"title": structure_data.get("title", "Book Title"), "author": structure_data.get("author", "Author Name"),
+                               "version": structure_data.get("version", "1.0"), "defaultStartNode": structure_data.get("defaultStartNode", ""),
+                               "defaultPOV": structure_data.get("defaultPOV", "Omniscient")}
+        if not book_graph.get_node_view("book"):
+            log.info("BookStructureManager: Creating missing 'book' node.")
+            book_node_meta = {k: v for k, v in book_graph.metadata.items() if k != 'title'}
+            book_node = Node(node_id="book", title=book_graph.metadata["title"], node_type="book", position=(100, 100), metadata=book_node_meta)
+            book_graph.add_node(book_node)
+
+    def _load_critical_path_nodes(self, book_graph, structure_data, nodes_created):
+        """Create Nodes from the criticalPath section."""
+        log.info("BookStructureManager: Loading %s nodes from criticalPath...", len(structure_data.get('criticalPath', [])))
+        for node_data in structure_data.get("criticalPath", []):
+            node_id = node_data.get("id")
+            if not node_id:
+                log.warning("BookStructureManager: Warning - Skipping node in criticalPath with missing ID.")
+                continue
+
+            node = Node(
+                node_id=node_id,
+                title=node_data.get("title", node_id),
+                node_type=node_data.get("type", "fiction"), # Get type from criticalPath entry
+                chapter=node_data.get("chapter"), # Get chapter from criticalPath entry
+                file_path=self.path_manager.normalize_path(node_data.get("filePath")),
+                position=self._get_node_position(structure_data, node_id),
+                metadata={} # Start with empty metadata, specific things added later if needed
+            )
+            book_graph.add_node(node)
+            nodes_created.add(node_id)
+
+    def _load_character_pov_nodes(self, book_graph, structure_data, nodes_created):
+        """Create Nodes from the characterPOVs section (if not already created)."""
+        log.info("BookStructureManager: Loading %s character POV definitions...", len(structure_data.get('characterPOVs', {})))
+        for base_node_id, pov_list in structure_data.get("characterPOVs", {}).items():
+            for pov_data in pov_list:
+                pov_node_id = pov_data.get("nodeId")
+                character_name = pov_data.get("character")
+                file_path = self.path_manager.normalize_path(pov_data.get("filePath"))
+                
+                if not pov_node_id:
+                     log.warning("BookStructureManager: Warning - Skipping POV entry for base %s with missing nodeId.", base_node_id)
+                     continue
+                     
+                if pov_node_id not in nodes_created:
+                    log.debug("BookStructureManager: Creating node object for POV node %s...", pov_node_id)
+
+                    # Try to infer chapter from base node if possible
+                    base_node = book_graph.get_node_view(base_node_id)
+                    pov_chapter = base_node.chapter if base_node else None
+
+                    pov_node = Node(
+                        node_id=pov_node_id,
+                        # Infer title, default to ID if base node not found yet
+                        title=f"{base_node.title} ({character_name} POV)" if base_node else f"{pov_node_id}",
+                        node_type="character_pov", # Explicitly set type
+                        chapter=pov_chapter, # Inherit chapter
+                        file_path=file_path,
+                        position=self._get_node_position(structure_data, pov_node_id),
+                        metadata={"povCharacter": character_name} # Store POV character in metadata
+                    )
+                    book_graph.add_node(pov_node)
+                    nodes_created.add(pov_node_id)
+                else:
+                     # Node already exists (e.g., was also in criticalPath), ensure metadata is added
+                     existing_node = book_graph.get_node_view(pov_node_id)
+                     if existing_node and "povCharacter" not in existing_node.metadata:
+                          book_graph.update_node_attributes(pov_node_id, metadata={**existing_node.metadata, "povCharacter": character_name})
+
+    def _load_edges(self, book_graph, structure_data, nodes_created):
+        """Create Edges from the edges section. Edges may reference the 'book' node, so it is created first."""
+        self._load_book_metadata(book_graph, structure_data)
+        log.info("BookStructureManager: Loading %s edges...", len(structure_data.get('edges', [])))
+        for edge_data in structure_data.get("edges", []):
+             try:
+                  # Ensure source and target exist before adding edge
+                  source_id = edge_data.get("source")
+                  target_id = edge_data.get("target")
+                  if source_id in book_graph.graph.nodes and target_id in book_graph.graph.nodes:
+                       edge = Edge.from_dict(edge_data)
+                       book_graph.add_edge(edge)
+                  else:
+                       log.warning("BookStructureManager: Warning - Skipping edge due to missing node(s): %s -> %s", source_id, target_id)
+             except ValueError as e:
+                  log.warning("BookStructureManager: Warning - Skipping invalid edge data: %s (%s)", edge_data, e)
+
+    def _load_node_positions_sidecar(self, book_graph, structure_path):
+        """
+        Apply positions from node-positions.json if it was saved after book-structure.json.
+        Position-only saves write just the sidecar, so it holds the latest layout; an older
+        sidecar is ignored in case another tool rewrote book-structure.json since.
+        """
+        positions_path = self.path_manager.get_node_positions_path()
+        if not positions_path or not os.path.isfile(positions_path): return
+        if os.path.getmtime(positions_path) < os.path.getmtime(structure_path):
+            log.info("BookStructureManager: node-positions.json is older than book-structure.json, ignoring it.")
+            return
+        try:
+            positions = self.json_file_manager.read_json(positions_path)
+            positions = {node_id: (float(pos[0]), float(pos[1])) for node_id, pos in positions.items()
+                         if isinstance(pos, (list, tuple)) and len(pos) == 2}
+            log.info("BookStructureManager: Applied %s positions from node-positions.json.", book_graph.update_node_positions(positions))
+        except Exception as e:
+            log.warning("BookStructureManager: WARNING - Could not read node-positions.json, using book-structure.json positions: %s", e)
+
+    def _load_chapters(self, book_graph, structure_data, nodes_created):
+        """Load chapter definitions. Chapter node lists are rebuilt on save from node.chapter."""
+        log.info("BookStructureManager: Loading %s chapter definitions...", len(structure_data.get('chapters', [])))
+        for chapter_data in structure_data.get("chapters", []):
+            if "id" in chapter_data and "title" in chapter_data:
+                book_graph.add_chapter(chapter_data["id"], chapter_data["title"], chapter_data.get("description"))
+                if "startNode" in chapter_data: book_graph.chapter_info[chapter_data["id"]]["startNode"] = chapter_data["startNode"]
     
     def save_book_structure(self, book_graph):
         """
-        Save the book structure to book-structure.json.
+        Save the book structure to book-structure.json (or every shard of a sharded project).
         Rebuilds essential sections directly from the current BookGraph state.
         """
+        if not self.path_manager.get_book_structure_path(): log.warning("BookStructureManager: Cannot save, project root not set."); return False
+        try:
+            if self.structure_shard_manager.is_sharded(): return self.write_sharded_data(self.build_sharded_data(book_graph))
+            structure_data = self.build_structure_data(book_graph)
+        except Exception as e: 
+            log.error("ERROR saving book structure: %s", e)
+            traceback.print_exc()
+            return False
+        return self.write_structure_data(structure_data)
+
+    def build_structure_data(self, book_graph):
+        """
+        Build the book-structure.json contents from the current BookGraph state.
+        Only reads the in-memory graph; nothing is written to disk.
+        
+        Returns:
+            dict: The structure data ready to be written by write_structure_data.
+        """
+        structure_data = self._build_book_metadata(book_graph)
+
+        # --- Rebuild sections from CURRENT BookGraph state ---
+        all_nodes_in_graph = list(book_graph.iter_node_views()) # Read-only views, nothing is copied
+
+        # 1. Node Positions 
+        structure_data["node_positions"] = self.build_node_positions(book_graph)
+        log.info("BookStructureManager: Saving %s node positions.", len(structure_data['node_positions']))
+
+        # 2. Chapters (Rebuild completely from the graph's chapter index)
+        structure_data["chapters"] = self._build_chapters(book_graph)
+        log.info("BookStructureManager: Saving %s chapters.", len(structure_data['chapters']))
+
+        # 3. Critical Path (List of non-POV, non-book nodes)
+        critical_path_list = [self._build_critical_path_entry(node) for node in all_nodes_in_graph
+                              if node.node_type != "book" and not self.character_pov_manager.is_character_pov_node(node.id)]
+        structure_data["criticalPath"] = critical_path_list
+        log.info("BookStructureManager: Saving %s nodes in criticalPath list.", len(critical_path_list))
+
+        # 4. Character POVs (Rebuild from graph edges and node metadata)
+        character_povs_dict = {}
+        for base_node_id, pov_node_id in book_graph.get_edges_by_type("character-pov"): # Indexed, no full edge scan
+            self._add_character_pov_entry(character_povs_dict, base_node_id, book_graph.get_node_view(pov_node_id))
+        structure_data["characterPOVs"] = character_povs_dict
+        log.info("BookStructureManager: Saving %s character POV entries.", len(character_povs_dict))
+
+        # 5. Edges (Rebuild directly from graph)
+        edges_list = [edge.to_dict() for edge in book_graph.get_all_edges()] # Iterate through graph edges
+        structure_data["edges"] = edges_list
+        log.info("BookStructureManager: Saving %s edges.", len(edges_list))
+
+        # 6. Preserve other top-level keys from original data if they exist
+        structure_data.update(self._build_preserved_sections(self.original_structure_data))
+        return structure_data
+
+    @staticmethod
+    def _build_book_metadata(book_graph):
+        """Get the top-level book metadata (title, author, ...) from the book node, or the graph metadata as a fallback."""
+        book_node = book_graph.get_node_view("book")
+        if book_node:
+            return {"title": book_node.title, "author": book_node.metadata.get("author", "Author Name"), "version": book_node.metadata.get("version", "1.0"),
+                    "defaultStartNode": book_node.metadata.get("defaultStartNode", ""), "defaultPOV": book_node.metadata.get("defaultPOV", "Omniscient")}
+        return {"title": book_graph.metadata.get("title", "Book Title"), "author": book_graph.metadata.get("author", "Author Name"), "version": book_graph.metadata.get("version", "1.0"),
+                "defaultStartNode": book_graph.metadata.get("defaultStartNode", ""), "defaultPOV": book_graph.metadata.get("defaultPOV", "Omniscient")}
+
+    @staticmethod
+    def _build_chapters(book_graph):
+        """Get the chapters section, with each chapter's node list rebuilt from the graph's chapter index."""
+        rebuilt_chapters_dict = {}
+        for ch_id, ch_info in book_graph.chapter_info.items():
+             rebuilt_chapters_dict[ch_id] = {"id": ch_id, "title": ch_info.get("title", ch_id), "description": ch_info.get("description", ""), "startNode": ch_info.get("startNode", ""), "nodes": []}
+        for ch_id, node_ids in book_graph.get_nodes_by_chapter().items(): 
+             if not ch_id: continue
+             node_ids = [node_id for node_id in node_ids if book_graph.get_node_view(node_id).node_type != "book"]
+             if not node_ids: continue
+             if ch_id in rebuilt_chapters_dict:
+                  rebuilt_chapters_dict[ch_id]['nodes'].extend(node_ids)
+             else:
+                  log.warning("BookStructureManager: Warning - Nodes %s reference chapter '%s' which is not defined. Creating entry.", node_ids, ch_id)
+                  rebuilt_chapters_dict[ch_id] = {"id": ch_id, "title": ch_id, "nodes": node_ids} # Create chapter entry
+        return list(rebuilt_chapters_dict.values())
+
+    @staticmethod
+    def _build_preserved_sections(original_data):
+        """Get the top-level sections the editor does not model (tracks, relatedContent, characters), kept from the loaded data."""
+        preserved_keys = ["tracks", "relatedContent", "characters"] # Add others if needed
+        original_data = original_data or {}
+        return {key: original_data[key] if key in original_data else ({} if key != "characters" else []) for key in preserved_keys}
+
+    def _build_critical_path_entry(self, node):
+        """Get a node's criticalPath entry."""
+        file_path = self.path_manager.normalize_path(node.file_path or self.path_manager.get_default_file_path(node, False))
+        return {"id": node.id, "title": node.title, "type": node.node_type, "chapter": node.chapter, "filePath": file_path}
+
+    def _add_character_pov_entry(self, character_povs_dict, base_node_id, pov_node):
+        """Add a POV node's entry to the characterPOVs of its base node, unless it is already there."""
+        if not pov_node: return
+        character_name = pov_node.metadata.get("povCharacter")
+        if not character_name:
+             character_name = self.character_pov_manager.get_character_from_pov_node(pov_node.id) or "Unknown"
+             log.warning("BookStructureManager: Warning - povCharacter metadata missing for %s, inferred '%s'.", pov_node.id, character_name)
+        file_path = self.path_manager.normalize_path(pov_node.file_path or self.path_manager.get_default_file_path(pov_node, True))
+        povs = character_povs_dict.setdefault(base_node_id, [])
+        if not any(pov['nodeId'] == pov_node.id for pov in povs):
+             povs.append({"character": character_name, "nodeId": pov_node.id, "filePath": file_path})
+
+    def build_shard(self, book_graph, shard_id):
+        """
+        Build one shard of a sharded project from the current BookGraph state: the
+        criticalPath entries, node_positions and outgoing edges of the nodes in it,
+        and the characterPOVs of the base nodes in it.
+        
+        Returns:
+            dict: The shard data, or None if the shard is empty.
+        """
+        graph = book_graph.graph
+        shard_data = {"shard": shard_id, "chapter": None if shard_id == UNASSIGNED_SHARD else shard_id,
+                      "criticalPath": [], "characterPOVs": {}, "node_positions": {}, "edges": []}
+        for node_id in self.structure_shard_manager.get_shard_members(book_graph, shard_id):
+            node = book_graph.get_node_view(node_id)
+            for _, target_id, edge_type in graph.out_edges(node_id, data='edge_type'):
+                shard_data["edges"].append(book_graph.get_edge(node_id, target_id).to_dict())
+                if edge_type == "character-pov": self._add_character_pov_entry(shard_data["characterPOVs"], node_id, book_graph.get_node_view(target_id))
+            if node.node_type == "book": continue
+            shard_data["node_positions"][node_id] = self._get_view_position(node)
+            if not self.character_pov_manager.is_character_pov_node(node_id): shard_data["criticalPath"].append(self._build_critical_path_entry(node))
+        return shard_data if any(shard_data[section] for section in SHARD_SECTIONS) else None
+
+    def build_sharded_data(self, book_graph, node_ids=None):
+        """
+        Build the shards a change touches, and the manifest if it changed, from the current BookGraph state.
+        Only reads the in-memory graph; nothing is written to disk.
+        
+        Args:
+            book_graph: The book graph, already reflecting the change.
+            node_ids (iterable, optional): IDs of changed nodes and of the sources of
+                changed edges. None rebuilds every shard.
+        
+        Returns:
+            dict: {"shards": shard id -> data (None to delete), "manifest": dict or None}
+                ready to be written by write_sharded_data.
+        """
+        shard_manager = self.structure_shard_manager
+        dirty, node_shards, membership_changed = shard_manager.get_dirty_shards(book_graph, node_ids)
+        shards = {shard_id: self.build_shard(book_graph, shard_id) for shard_id in dirty}
+        shards = {shard_id: data for shard_id, data in shards.items() if data or shard_id in shard_manager.shard_files}
+        header = self._build_book_metadata(book_graph)
+        header["chapters"] = self._build_chapters(book_graph)
+        header.update(self._build_preserved_sections(self.original_structure_data or shard_manager.manifest_header))
+        present = (set(shard_manager.shard_files) - dirty) | {shard_id for shard_id, data in shards.items() if data}
+        chapter_order = [chapter["id"] for chapter in header["chapters"]]
+        shard_ids = [shard_id for shard_id in chapter_order if shard_id in present]
+        shard_ids += sorted(present - set(chapter_order) - {UNASSIGNED_SHARD}) + ([UNASSIGNED_SHARD] if UNASSIGNED_SHARD in present else [])
+        manifest = shard_manager.build_manifest(header, shard_ids, node_shards)
+        if not membership_changed and shard_manager.is_manifest_current(manifest): manifest = None # Skip serializing the node index
+        log.info("BookStructureManager: Rebuilt %s shards%s.", len(shards), '' if manifest is None else ' and the manifest')
+        return {"shards": shards, "manifest": manifest}
+
+    def write_sharded_data(self, sharded_data):
+        """
+        Write data built by build_sharded_data to the shard files and manifest, as one transaction.
+        
+        Returns:
+            bool: True if saved successfully, False otherwise.
+        """
+        try:
+            written = self.structure_shard_manager.write_shards(sharded_data["shards"], sharded_data["manifest"])
+            log.info("BookStructureManager: Sharded save successful (%s of %s shards written).", written, len(sharded_data['shards']))
+            return True
+        except Exception as e:
+            log.error("ERROR saving sharded book structure: %s", e)
+            traceback.print_exc()
+            return False
+
+    def set_sharded(self, book_graph, sharded):
+        """
+        Convert the current project to or from the sharded format.
+        Converting writes every shard and the manifest; converting back writes
+        book-structure.json and deletes the manifest and shards.
+        
+        Returns:
+            bool: True if the project now uses the requested format.
+        """
+        if sharded == self.structure_shard_manager.is_sharded(): return True
+        if sharded:
+            self.structure_shard_manager.reset()
+            self.original_structure_data = self.original_structure_data or self.structure_shard_manager.manifest_header
+            return self.write_sharded_data(self.build_sharded_data(book_graph))
+        self.original_structure_data = self.original_structure_data or self.structure_shard_manager.manifest_header
+        if not self.write_structure_data(self.build_structure_data(book_graph)): return False
+        try:
+            self.structure_shard_manager.remove_all()
+            return True
+        except Exception as e:
+            log.error("ERROR removing sharded structure files: %s", e)
+            traceback.print_exc()
+            return False
+
+    @staticmethod
+    def build_node_positions(book_graph):
+        """Get node_id -> (x, y) for every node except the book node, as saved in node_positions."""
+        return {node.id: BookStructureManager._get_view_position(node) for node in book_graph.iter_node_views() if node.node_type != "book"}
+
+    @staticmethod
+    def _get_view_position(node):
+        """Get a node's position as a tuple of floats, or (0.0, 0.0) if it is malformed."""
+        pos = node.position
+        try: return (float(pos[0]), float(pos[1])) if isinstance(pos, (list, tuple)) and len(pos) == 2 else (0.0, 0.0)
+        except (ValueError, TypeError): return (0.0, 0.0)
+
+    def write_node_positions(self, positions):
+        """
+        Write node positions to the node-positions.json sidecar only (compact JSON).
+        
+        Returns:
+            bool: True if saved (or unchanged), False otherwise.
+        """
+        positions_path = self.path_manager.get_node_positions_path()
+        if not positions_path: log.warning("BookStructureManager: Cannot save positions, project root not set."); return False
+        try:
+            written = self.json_file_manager.write_json(positions_path, positions, indent=None)
+            if written: log.info("BookStructureManager: Saved %d node positions.", len(positions))
+            else: log.info("BookStructureManager: Node positions unchanged, write skipped.")
+            return True
+        except Exception as e:
+            log.error("ERROR saving node positions: %s", e)
+            traceback.print_exc()
+            return False
+
+    def write_structure_data(self, structure_data):
+        """
+        Write structure data built by build_structure_data to book-structure.json,
+        and its node_positions to the node-positions.json sidecar.
+        
+        Returns:
+            bool: True if saved successfully, False otherwise.
+        """
         structure_path = self.path_manager.get_book_structure_path()
-        if not structure_path: print("BookStructureManager: Cannot save, project root not set."); return False
-        print(f"BookStructureManager: Saving structure to {structure_path}")
+        if not structure_path: log.warning("BookStructureManager: Cannot save, project root not set."); return False
+        log.info("BookStructureManager: Saving structure to %s", structure_path)
         content_dir = os.path.dirname(structure_path)
-        if not self.path_manager.ensure_directory_exists(content_dir): print(f"BookStructureManager: ERROR - Could not ensure content dir exists: {content_dir}"); return False
-
+        if not self.path_manager.ensure_directory_exists(content_dir): log.error("BookStructureManager: ERROR - Could not ensure content dir exists: %s", content_dir); return False
         try:
-            structure_data = {}
-            book_node = book_graph.get_node("book")
-            if book_node:
-                structure_data["title"] = book_node.title
-                structure_data["author"] = book_node.metadata.get("author", "Author Name")
-                structure_data["version"] = book_node.metadata.get("version", "1.0")
-                structure_data["defaultStartNode"] = book_node.metadata.get("defaultStartNode", "")
-                structure_data["defaultPOV"] = book_node.metadata.get("defaultPOV", "Omniscient")
-            else: # Fallback
-                structure_data["title"] = book_graph.metadata.get("title", "Book Title"); structure_data["author"] = book_graph.metadata.get("author", "Author Name"); structure_data["version"] = book_graph.metadata.get("version", "1.0"); structure_data["defaultStartNode"] = book_graph.metadata.get("defaultStartNode", ""); structure_data["defaultPOV"] = book_graph.metadata.get("defaultPOV", "Omniscient")
-
-            # --- Rebuild sections from CURRENT BookGraph state ---
-            all_nodes_in_graph = book_graph.get_all_nodes() # Get nodes once
-
-            # 1. Node Positions 
-            structure_data["node_positions"] = {}
-            for node in all_nodes_in_graph:
-                if node.node_type != "book": 
-                    pos = node.position
-                    if isinstance(pos, (list, tuple)) and len(pos) == 2:
-                         try: structure_data["node_positions"][node.id] = (float(pos[0]), float(pos[1]))
-                         except (ValueError, TypeError): structure_data["node_positions"][node.id] = (0.0, 0.0)
-                    else: structure_data["node_positions"][node.id] = (0.0, 0.0)
-            print(f"BookStructureManager: Saving {len(structure_data['node_positions'])} node positions.")
-
-            # 2. Chapters (Rebuild completely based on node.chapter attribute)
-            rebuilt_chapters_dict = {}
-            for ch_id, ch_info in book_graph.chapter_info.items():
-                 rebuilt_chapters_dict[ch_id] = {"id": ch_id, "title": ch_info.get("title", ch_id), "description": ch_info.get("description", ""), "startNode": ch_info.get("startNode", ""), "nodes": []}
-            for node in all_nodes_in_graph: 
-                 if node.node_type != "book" and node.chapter and node.chapter in rebuilt_chapters_dict:
-                      if node.id not in rebuilt_chapters_dict[node.chapter]['nodes']:
-                           rebuilt_chapters_dict[node.chapter]['nodes'].append(node.id)
-                 elif node.node_type != "book" and node.chapter:
-                      print(f"BookStructureManager: Warning - Node {node.id} references chapter '{node.chapter}' which is not defined. Creating entry.")
-                      rebuilt_chapters_dict[node.chapter] = {"id": node.chapter, "title": node.chapter, "nodes": [node.id]} # Create chapter entry
-            structure_data["chapters"] = list(rebuilt_chapters_dict.values())
-            print(f"BookStructureManager: Saving {len(structure_data['chapters'])} chapters.")
-
-            # 3. Critical Path (List of non-POV, non-book nodes)
-            critical_path_list = []
-            for node in all_nodes_in_graph: 
-                if node.node_type != "book" and not self.character_pov_manager.is_character_pov_node(node.id):
-                    file_path = node.file_path or self.path_manager.get_default_file_path(node, False)
-                    node.file_path = self.path_manager.normalize_path(file_path) 
-                    critical_path_list.append({"id": node.id, "title": node.title, "type": node.node_type, "chapter": node.chapter, "filePath": node.file_path})
-            structure_data["criticalPath"] = critical_path_list
-            print(f"BookStructureManager: Saving {len(critical_path_list)} nodes in criticalPath list.")
-
-            # 4. Character POVs (Rebuild from graph edges and node metadata)
-            character_povs_dict = {}
-            for edge in book_graph.get_all_edges(): # Iterate through graph edges
-                if edge.edge_type == "character-pov":
-                    base_node_id = edge.source_id
-                    pov_node = book_graph.get_node(edge.target_id) # Get node object from graph
-                    if pov_node:
-                        character_name = pov_node.metadata.get("povCharacter")
-                        if not character_name:
-                             character_name = self.character_pov_manager.get_character_from_pov_node(pov_node.id) or "Unknown"
-                             print(f"BookStructureManager: Warning - povCharacter metadata missing for {pov_node.id}, inferred '{character_name}'.")
-                        file_path = pov_node.file_path or self.path_manager.get_default_file_path(pov_node, True)
-                        pov_node.file_path = self.path_manager.normalize_path(file_path) 
-                        character_povs_dict.setdefault(base_node_id, [])
-                        if not any(pov['nodeId'] == pov_node.id for pov in character_povs_dict[base_node_id]):
-                             character_povs_dict[base_node_id].append({"character": character_name, "nodeId": pov_node.id, "filePath": pov_node.file_path})
-            structure_data["characterPOVs"] = character_povs_dict
-            print(f"BookStructureManager: Saving {len(character_povs_dict)} character POV entries.")
-
-            # 5. Edges (Rebuild directly from graph)
-            edges_list = [edge.to_dict() for edge in book_graph.get_all_edges()] # Iterate through graph edges
-            structure_data["edges"] = edges_list
-            print(f"BookStructureManager: Saving {len(edges_list)} edges.")
-
-            # 6. Preserve other top-level keys from original data if they exist
-            if self.original_structure_data:
-                 preserved_keys = ["tracks", "relatedContent", "characters"] # Add others if needed
-                 for key in preserved_keys:
-                      if key in self.original_structure_data:
-                           structure_data[key] = self.original_structure_data[key]
-                      else: # Ensure key exists even if empty
-                           structure_data.setdefault(key, {} if key != "characters" else []) 
-            else: # Ensure default empty structures if no original data
-                 structure_data.setdefault("relatedContent", {})
-                 structure_data.setdefault("tracks", {})
-                 structure_data.setdefault("characters", [])
-
-
-            # --- Save to File ---
-            with open(structure_path, 'w', encoding='utf-8') as f:
-                json.dump(structure_data, f, indent=2, ensure_ascii=False)
+            # --- Save to File (skipped if the bytes on disk are identical) ---
+            written = self.json_file_manager.write_json(structure_path, structure_data)
             
-            self.original_structure_data = copy.deepcopy(structure_data)
-            print(f"BookStructureManager: Save successful.")
-            return True
+            # Rebuilt from the graph on every save, so it is adopted, not copied; only once the save has landed
+            self.json_file_manager.after_commit(lambda: self.set_original_structure_data(structure_data))
+            log.info("BookStructureManager: Save successful." if written else "BookStructureManager: Save successful (unchanged, write skipped).")
+            return self.write_node_positions(structure_data.get("node_positions", {}))
             
         except Exception as e: 
-            print(f"ERROR saving book structure: {e}")
+            log.error("ERROR saving book structure: %s", e)
             traceback.print_exc()
             return False
     
@@ -280,6 +514,6 @@ class BookStructureManager:
         return self.original_structure_data
     
     def set_original_structure_data(self, data):
-        """Set the original structure data (used after loading)."""
-        self.original_structure_data = copy.deepcopy(data)
+        """Set the original structure data (used after loading). The data is adopted, not copied."""
+        self.original_structure_data = data
 
@@ -2,6 +2,13 @@
 DataManager class for the Interactive Book Editor.
 REVISED: Removed pyqtSignal definition. Added signal_emitter reference
          to trigger signal emission on the owning QObject (e.g., MainWindow).
+ADDED: on_nodes_updated for batch updates such as moving a multi-selection.
+ADDED: is_sharded_structure/set_sharded_structure to switch a project to the sharded structure format.
+REVISED: Managers are created on first use, and the auto-save manager shares them instead of building its own.
+REVISED: The managers and the structure snapshot live in a ProjectSession, which also tracks
+         unsaved changes (has_unsaved_changes).
+REVISED: Auto-save settings are kept on the session, so setting them (or flushing) does not
+         create the auto-save manager before a project is opened.
 """
 
 import os 
@@ -9,34 +16,51 @@ import traceback
 # Removed pyqtSignal import as signal is defined elsewhere
 from path_manager import PathManager
 from character_pov_manager import CharacterPOVManager
-from project_manager import ProjectManager
-from book_structure_manager import BookStructureManager
-from node_file_manager import NodeFileManager
-from auto_save_manager import SimplifiedAutoSaveManager
-from node_content_updater import SimplifiedNodeContentUpdater
+from json_file_manager import JsonFileManager
+from project_session import ProjectSession
+from editor_log import get_logger
+
+log = get_logger(__name__)
 
 class DataManager:
     """
     Facade that provides a unified interface to the specialized manager classes.
     Manages the shared PathManager instance and project state.
     Does NOT define signals itself, but can trigger them on an emitter.
+    
+    The other managers belong to the ProjectSession: they are created (and their
+    modules imported) on first use, one instance each, and the auto-save manager
+    works with the same instances and structure snapshot.
     """
     
     def __init__(self):
         """Initialize a new DataManager instance."""
-        print("DataManager: Initializing...")
+        log.info("DataManager: Initializing...")
         self.path_manager = PathManager() 
         self.character_pov_manager = CharacterPOVManager()
-        self.project_manager = ProjectManager() 
-        self.book_structure_manager = BookStructureManager(self.path_manager, self.character_pov_manager)
-        self.node_file_manager = NodeFileManager(self.path_manager, self.character_pov_manager)
-        self.node_content_updater = SimplifiedNodeContentUpdater(self.path_manager)
-        self.auto_save_manager = SimplifiedAutoSaveManager(self.path_manager, self.character_pov_manager)
+        self.json_file_manager = JsonFileManager() # Shared so every manager sees the same file digests and journal
+        self.session = ProjectSession(self.path_manager, self.character_pov_manager, self.json_file_manager)
         
         self.project_root = None
         self.current_book_graph = None 
         self.signal_emitter = None # Reference to the object that will emit signals (e.g., MainWindow)
-        print("DataManager: Initialization complete.")
+        log.info("DataManager: Initialization complete.")
+
+    # --- Managers of the session, created on first use ---
+    @property
+    def project_manager(self): return self.session.project_manager
+    @property
+    def book_structure_manager(self): return self.session.book_structure_manager
+    @property
+    def node_file_manager(self): return self.session.node_file_manager
+    @property
+    def node_content_updater(self): return self.session.node_content_updater
+    @property
+    def auto_save_manager(self): return self.session.auto_save_manager
+
+    def has_unsaved_changes(self):
+        """True if a change to the current project has not been saved (e.g. its save failed or auto-save is debounced)."""
+        return self.session.is_dirty()
 
     # --- NEW: Method to set the signal emitter ---
     def set_signal_emitter(self, emitter):
@@ -47,33 +71,38 @@ class DataManager:
         Args:
             emitter: An object (usually a QObject like MainWindow) that has the necessary signals.
         """
-        print(f"DataManager: Setting signal emitter to {emitter}")
+        log.debug("DataManager: Setting signal emitter to %s", emitter)
         self.signal_emitter = emitter
     # --- End New Method ---
         
     # --- Project Manager Delegation ---
     def set_project_root(self, root_path):
-        print(f"DataManager: Setting project root to: {root_path}")
-        if not isinstance(root_path, str): print("DataManager: ERROR - Invalid root_path type."); self.project_root = None; self.path_manager.set_project_root(None); return False
+        log.info("DataManager: Setting project root to: %s", root_path)
+        self.flush_auto_save() # Pending changes belong to the current project root
+        if not isinstance(root_path, str): log.error("DataManager: ERROR - Invalid root_path type."); self.project_root = None; self.path_manager.set_project_root(None); self.json_file_manager.set_project_root(None); return False
         abs_path = os.path.abspath(root_path)
-        if os.path.exists(abs_path) and not os.path.isdir(abs_path): print(f"DataManager: ERROR - Path exists but is not a directory: {abs_path}"); self.project_root = None; self.path_manager.set_project_root(None); return False
-        self.project_root = abs_path; self.path_manager.set_project_root(self.project_root); print(f"DataManager: Project root set successfully to {self.project_root}"); return True
+        if os.path.exists(abs_path) and not os.path.isdir(abs_path): log.error("DataManager: ERROR - Path exists but is not a directory: %s", abs_path); self.project_root = None; self.path_manager.set_project_root(None); self.json_file_manager.set_project_root(None); return False
+        self.project_root = abs_path; self.path_manager.set_project_root(self.project_root)
+        self.json_file_manager.set_project_root(self.project_root) # Completes or rolls back a save interrupted by a crash
+        log.info("DataManager: Project root set successfully to %s", self.project_root); return True
 
     def create_new_project(self, root_path):
-        print(f"DataManager: Handling create_new_project for path: {root_path}")
+        log.info("DataManager: Handling create_new_project for path: %s", root_path)
+        self.flush_auto_save()
         success, book_graph = self.project_manager.create_new_project(root_path)
         if success and book_graph:
-            print("DataManager: Project structure created by ProjectManager.")
-            if not self.set_project_root(root_path): print("DataManager: ERROR - Failed to set project root after structure creation."); return False, None 
-            print("DataManager: Saving initial book-structure.json...")
+            log.info("DataManager: Project structure created by ProjectManager.")
+            if not self.set_project_root(root_path): log.error("DataManager: ERROR - Failed to set project root after structure creation."); return False, None 
+            log.info("DataManager: Saving initial book-structure.json...")
             save_success = self.book_structure_manager.save_book_structure(book_graph)
-            if not save_success: print("DataManager: ERROR - Failed to save initial book-structure.json."); return False, None 
-            print("DataManager: Initial book-structure.json saved.")
+            if not save_success: log.error("DataManager: ERROR - Failed to save initial book-structure.json."); return False, None 
+            log.info("DataManager: Initial book-structure.json saved.")
             self.current_book_graph = book_graph; self.auto_save_manager.set_book_graph(book_graph) 
             _, _ = self.book_structure_manager.load_book_structure() 
-            if not self.book_structure_manager.get_original_structure_data(): print("DataManager: WARNING - Could not load original structure data after project creation.")
-            print("DataManager: create_new_project completed successfully."); return True, book_graph 
-        else: print("DataManager: ProjectManager failed to create project structure."); self.project_root = None; self.current_book_graph = None; self.auto_save_manager.set_book_graph(None); return False, None 
+            self.session.mark_saved()
+            if not self.book_structure_manager.get_original_structure_data(): log.warning("DataManager: WARNING - Could not load original structure data after project creation.")
+            log.info("DataManager: create_new_project completed successfully."); return True, book_graph 
+        else: log.error("DataManager: ProjectManager failed to create project structure."); self.project_root = None; self.current_book_graph = None; self.auto_save_manager.set_book_graph(None); return False, None 
 
     # --- Path Manager Delegation ---
     def get_book_structure_path(self): return self.path_manager.get_book_structure_path()
@@ -86,19 +115,31 @@ class DataManager:
 
     # --- Book Structure Manager Delegation ---
     def load_book_structure(self):
-        if not self.project_root: print("DataManager: Cannot load structure, project root not set."); return None
-        print("DataManager: Delegating load_book_structure...")
+        if not self.project_root: log.warning("DataManager: Cannot load structure, project root not set."); return None
+        log.debug("DataManager: Delegating load_book_structure...")
         book_graph, _ = self.book_structure_manager.load_book_structure() 
-        if book_graph: print("DataManager: Book structure loaded successfully."); self.current_book_graph = book_graph; self.auto_save_manager.set_book_graph(book_graph) 
-        else: print("DataManager: Failed to load book structure."); self.current_book_graph = None; self.auto_save_manager.set_book_graph(None)
+        if book_graph: log.info("DataManager: Book structure loaded successfully."); self.current_book_graph = book_graph; self.auto_save_manager.set_book_graph(book_graph); self.session.mark_saved() 
+        else: log.error("DataManager: Failed to load book structure."); self.current_book_graph = None; self.auto_save_manager.set_book_graph(None)
         return book_graph 
 
     def save_book_structure(self, book_graph):
-        if not self.project_root: print("DataManager: Cannot save structure, project root not set."); return False
-        print("DataManager: Delegating save_book_structure...")
-        if book_graph != self.current_book_graph: print("DataManager: WARNING - Saving a different book graph instance than the one managed.")
+        if not self.project_root: log.warning("DataManager: Cannot save structure, project root not set."); return False
+        log.debug("DataManager: Delegating save_book_structure...")
+        if book_graph != self.current_book_graph: log.warning("DataManager: WARNING - Saving a different book graph instance than the one managed.")
         return self.book_structure_manager.save_book_structure(book_graph)
 
+    def is_sharded_structure(self): return self.book_structure_manager.structure_shard_manager.is_sharded()
+
+    def set_sharded_structure(self, book_graph, sharded):
+        """Convert the project to (or from) the sharded structure format."""
+        if not self.project_root or not book_graph: log.warning("DataManager: Cannot change structure format, no project loaded."); return False
+        log.info("DataManager: Converting project to %s structure...", 'sharded' if sharded else 'single-file')
+        self.flush_auto_save() # Pending changes are written in the current format first
+        with self.get_model_lock():
+            success = self.book_structure_manager.set_sharded(book_graph, sharded)
+        self.book_structure_manager.structure_shard_manager.reset() # Re-read from the new files on the next save
+        return success
+
     # --- Node File Manager Delegation ---
     def save_node_content_file(self, node):
         if not self.project_root: return False 
@@ -107,36 +148,50 @@ class DataManager:
     
     def remove_node(self, node_id, book_graph):
         if not self.project_root: return False 
-        print(f"DataManager: Delegating remove_node for {node_id}")
-        result = book_graph.remove_node(node_id) 
-        if result: self.auto_save_manager.on_node_removed(node_id) 
-        else: print(f"DataManager: BookGraph node removal failed for {node_id}")
+        log.debug("DataManager: Delegating remove_node for %s", node_id)
+        with self.get_model_lock(): # A background save may be reading the graph
+            # Capture incident edges before removal so only the neighbours' navigation is rebuilt
+            removed_edges = list(book_graph.graph.in_edges(node_id)) + list(book_graph.graph.out_edges(node_id)) if node_id in book_graph.graph else []
+            result = book_graph.remove_node(node_id) 
+        if result: self.auto_save_manager.on_node_removed(node_id, removed_edges) 
+        else: log.error("DataManager: BookGraph node removal failed for %s", node_id)
         return result
     
     def import_node(self, file_path, book_graph):
         if not self.project_root: return None 
-        print(f"DataManager: Delegating import_node for {file_path}")
+        log.debug("DataManager: Delegating import_node for %s", file_path)
         original_data = self.book_structure_manager.get_original_structure_data()
-        node = self.node_file_manager.import_node(file_path, book_graph, original_data) 
+        with self.get_model_lock(): node = self.node_file_manager.import_node(file_path, book_graph, original_data) # Adds the node to the graph
         if node and book_graph == self.current_book_graph: self.auto_save_manager.on_node_added(node) 
-        elif not node: print(f"DataManager: Node import failed for {file_path}")
+        elif not node: log.error("DataManager: Node import failed for %s", file_path)
         return node
 
     # --- Node Content Updater Delegation ---
     def update_node_navigation(self, node_id, book_graph):
         if not self.project_root: return False 
         return self.node_content_updater.update_node_navigation(node_id, book_graph)
-    def update_all_node_navigation(self, book_graph):
+    def update_all_node_navigation(self, book_graph, progress_callback=None):
         if not self.project_root: return 0 
-        return self.node_content_updater.update_all_node_navigation(book_graph)
+        return self.node_content_updater.update_all_node_navigation(book_graph, progress_callback=progress_callback)
     def update_critical_path(self, book_graph):
         if not self.project_root: return False 
         return self.node_content_updater.update_critical_path_nodes(book_graph)
 
     # --- Auto-save Delegation ---
-    def enable_auto_save(self, enabled=True): self.auto_save_manager.enable_auto_save(enabled)
+    # The settings are kept on the session and applied when the auto-save manager is created,
+    # and a manager that was never created has nothing to flush.
+    def enable_auto_save(self, enabled=True):
+        self.session.auto_save_enabled = enabled
+        if self.session.has_auto_save_manager(): self.auto_save_manager.enable_auto_save(enabled)
+    def set_auto_save_delay(self, quiet_period):
+        self.session.auto_save_delay = None if quiet_period is None or quiet_period < 0 else quiet_period
+        if self.session.has_auto_save_manager(): self.auto_save_manager.set_save_delay(quiet_period)
+    def flush_auto_save(self): return self.auto_save_manager.flush() if self.session.has_auto_save_manager() else True
+    def shutdown_auto_save(self): return self.auto_save_manager.shutdown() if self.session.has_auto_save_manager() else True
+    def get_model_lock(self): return self.session.model_lock
     def on_node_added(self, node): self.auto_save_manager.on_node_added(node)
     def on_node_updated(self, node): self.auto_save_manager.on_node_updated(node)
+    def on_nodes_updated(self, nodes, positions_only=False): self.auto_save_manager.on_nodes_updated(nodes, positions_only)
     # on_node_removed is handled via self.remove_node
 
     def on_edge_added(self, edge):
@@ -144,10 +199,10 @@ class DataManager:
         self.auto_save_manager.on_edge_added(edge)
         # --- Trigger signal on emitter ---
         if self.signal_emitter and hasattr(self.signal_emitter, 'model_edge_changed'):
-            print("DataManager: Triggering model_edge_changed signal emission.")
+            log.debug("DataManager: Triggering model_edge_changed signal emission.")
             self.signal_emitter.model_edge_changed.emit(edge.source_id, edge.target_id)
         else:
-             print("DataManager: Warning - Signal emitter not set or missing signal for on_edge_added.")
+             log.warning("DataManager: Warning - Signal emitter not set or missing signal for on_edge_added.")
         # --- End Trigger ---
     
     def on_edge_updated(self, edge):
@@ -155,7 +210,7 @@ class DataManager:
         self.auto_save_manager.on_edge_updated(edge)
         # Optionally trigger signal here too if UI needs refresh on edge type/metadata change
         if self.signal_emitter and hasattr(self.signal_emitter, 'model_edge_changed'):
-             print("DataManager: Triggering model_edge_changed signal emission (on update).")
+             log.debug("DataManager: Triggering model_edge_changed signal emission (on update).")
              self.signal_emitter.model_edge_changed.emit(edge.source_id, edge.target_id)
 
     
@@ -164,10 +219,10 @@ class DataManager:
         self.auto_save_manager.on_edge_removed(source_id, target_id)
         # --- Trigger signal on emitter ---
         if self.signal_emitter and hasattr(self.signal_emitter, 'model_edge_changed'):
-            print("DataManager: Triggering model_edge_changed signal emission.")
+            log.debug("DataManager: Triggering model_edge_changed signal emission.")
             self.signal_emitter.model_edge_changed.emit(source_id, target_id)
         else:
-             print("DataManager: Warning - Signal emitter not set or missing signal for on_edge_removed.")
+             log.warning("DataManager: Warning - Signal emitter not set or missing signal for on_edge_removed.")
         # --- End Trigger ---
 
     def on_chapter_updated(self, chapter_id): self.auto_save_manager.on_chapter_updated(chapter_id)
@@ -1,6 +1,7 @@
 """
 Edge editor panel for the Interactive Book Editor.
 FIXED: Removed redundant layout creation conflicting with base class.
+REVISED: Output goes through the edge_editor logger (editor_log) instead of print().
 """
 
 import json 
@@ -11,6 +12,9 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import pyqtSignal
 
 from editor_panel import EditorPanel
+from editor_log import get_logger
+
+log = get_logger(__name__)
 
 # --- BasicEdgePropertiesTab and EdgeMetadataTab remain unchanged ---
 # --- from edge_editor_fix (the version with QLineEdit imported) ---
@@ -45,7 +49,7 @@ class EdgeMetadataTab(QWidget):
         if is_branch_point: self.branch_text_edit.setText(self.current_metadata.get("text", ""))
         else: self.branch_text_edit.clear() 
         try: raw_text = json.dumps(self.current_metadata, indent=2) if self.current_metadata else "{}"; self.raw_metadata_edit.setText(raw_text)
-        except Exception as e: print(f"Error formatting metadata: {e}"); self.raw_metadata_edit.setText(str(self.current_metadata)) 
+        except Exception as e: log.error("Error formatting metadata: %s", e); self.raw_metadata_edit.setText(str(self.current_metadata)) 
         self.branch_text_edit.blockSignals(False); self.raw_metadata_edit.blockSignals(False)
     def _on_metadata_field_changed(self):
         new_metadata = {}; 
@@ -54,9 +58,9 @@ class EdgeMetadataTab(QWidget):
         try:
             raw_data = json.loads(self.raw_metadata_edit.toPlainText() or '{}')
             if isinstance(raw_data, dict): temp_metadata = new_metadata.copy(); temp_metadata.update(raw_data); new_metadata = temp_metadata # Raw overrides specific fields if keys match
-            else: print("Warning: Raw metadata not dict."); new_metadata = {k:v for k,v in new_metadata.items()} 
-        except json.JSONDecodeError: print("Warning: Invalid JSON in raw metadata."); new_metadata = {k:v for k,v in new_metadata.items()} 
-        if new_metadata != self.current_metadata: self.current_metadata = new_metadata; print(f"Metadata changed, emitting: {self.current_metadata}"); self.metadata_changed.emit(self.current_metadata) 
+            else: log.warning("Warning: Raw metadata not dict."); new_metadata = {k:v for k,v in new_metadata.items()} 
+        except json.JSONDecodeError: log.warning("Warning: Invalid JSON in raw metadata."); new_metadata = {k:v for k,v in new_metadata.items()} 
+        if new_metadata != self.current_metadata: self.current_metadata = new_metadata; log.debug("Metadata changed, emitting: %s", self.current_metadata); self.metadata_changed.emit(self.current_metadata) 
 
 
 # --- EdgeEditorPanel MODIFIED ---
@@ -68,7 +72,7 @@ class EdgeEditorPanel(EditorPanel):
         """Initialize a new EdgeEditorPanel instance."""
         # Call base class __init__ which sets up self.layout
         super().__init__(parent)
-        print("EdgeEditorPanel: Initializing...") # Debug
+        log.debug("EdgeEditorPanel: Initializing...")
         self.current_edge = None
         
         # --- Use the layout from the base class (self.layout) ---
@@ -95,18 +99,17 @@ class EdgeEditorPanel(EditorPanel):
         # Connect signals
         self.basic_tab.property_changed.connect(self.on_property_changed)
         self.metadata_tab.metadata_changed.connect(self.on_metadata_changed) 
-        print("EdgeEditorPanel: Initialization complete.") # Debug
-
+        log.debug("EdgeEditorPanel: Initialization complete.")
     def update_for_edge(self, edge):
         """Update the panel for the selected edge."""
-        print(f"EdgeEditorPanel: update_for_edge called for edge: {getattr(edge, 'source_id', 'N/A')}->{getattr(edge, 'target_id', 'N/A')}") # Debug
+        log.debug("EdgeEditorPanel: update_for_edge called for edge: %s->%s", getattr(edge, 'source_id', 'N/A'), getattr(edge, 'target_id', 'N/A'))
         self.current_edge = edge
         self.basic_tab.update_for_edge(edge)
         self.metadata_tab.update_for_edge(edge) 
 
     def clear_panel(self):
         """Clear the panel."""
-        print("EdgeEditorPanel: Clearing panel.") # Debug
+        log.debug("EdgeEditorPanel: Clearing panel.")
         self.current_edge = None
         # Optionally clear fields
         # from node import Edge # Local import
@@ -126,6 +129,6 @@ class EdgeEditorPanel(EditorPanel):
         """Handle when metadata is changed in the metadata tab."""
         if self.current_edge:
             self.current_edge.metadata = new_metadata 
-            print(f"EdgeEditorPanel: Metadata updated on edge object: {self.current_edge.metadata}") 
+            log.debug("EdgeEditorPanel: Metadata updated on edge object: %s", self.current_edge.metadata) 
             self.edge_updated.emit(self.current_edge) 
 
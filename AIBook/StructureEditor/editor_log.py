@@ -0,0 +1,104 @@
+"""
+Logging for the Interactive Book Editor.
+Every module gets a logger named after its subsystem (get_logger(__name__)) under
+the "aibook" root, so levels can be set per subsystem. Messages use %-style
+arguments, which are only formatted when the level is enabled; a disabled
+call costs one level check.
+
+Levels come from the AIBOOK_LOG environment variable or the --log / --quiet /
+--verbose command line options, as a spec such as "warning" (every subsystem)
+or "info,book_graph=debug,graph_view=warning" (a default plus per-subsystem levels).
+"""
+
+import os
+import sys
+import logging
+
+ROOT_LOGGER = "aibook"
+ENV_VARIABLE = "AIBOOK_LOG"
+DEFAULT_LEVEL = logging.INFO
+QUIET_SPEC = "warning" # Production mode: only warnings and errors
+VERBOSE_SPEC = "debug" # Also the per-node messages of loading, saving and editing
+
+class _StdoutHandler(logging.StreamHandler):
+    """Writes to whatever sys.stdout is at the time, like the print() calls it replaces."""
+
+    def __init__(self):
+        super().__init__(sys.stdout)
+
+    @property
+    def stream(self): return sys.stdout
+
+    @stream.setter
+    def stream(self, value): pass
+
+_root = logging.getLogger(ROOT_LOGGER)
+_root.propagate = False
+_handler = _StdoutHandler()
+_handler.setFormatter(logging.Formatter("%(message)s"))
+_root.addHandler(_handler)
+_configured_levels = {} # subsystem -> level set by the last configure_logging call
+
+def get_logger(subsystem):
+    """Get the logger of a subsystem (normally the module's __name__)."""
+    return logging.getLogger(f"{ROOT_LOGGER}.{subsystem}")
+
+def parse_log_spec(spec):
+    """
+    Parse a level spec.
+
+    Args:
+        spec (str): Comma-separated entries, each a level name ("debug", "info",
+            "warning", "error", "critical", "off") or subsystem=level.
+
+    Returns:
+        tuple: (default level or None, dict of subsystem -> level).
+    """
+    default_level = None
+    levels = {}
+    for entry in (spec or "").split(","):
+        entry = entry.strip()
+        if not entry: continue
+        subsystem, _, level_name = entry.rpartition("=")
+        level_name = level_name.strip().upper()
+        level = logging.CRITICAL + 1 if level_name == "OFF" else logging.getLevelName(level_name)
+        if not isinstance(level, int): raise ValueError(f"Unknown log level '{level_name.lower()}' in '{entry}'")
+        if subsystem.strip(): levels[subsystem.strip()] = level
+        else: default_level = level
+    return default_level, levels
+
+def configure_logging(spec=None):
+    """
+    Set the default and per-subsystem levels. Without a spec, AIBOOK_LOG is used
+    (and the default level if that is unset). Levels set by an earlier call are reset.
+    An invalid spec is reported and ignored.
+    """
+    if spec is None: spec = os.environ.get(ENV_VARIABLE, "")
+    try:
+        default_level, levels = parse_log_spec(spec)
+    except ValueError as e:
+        _root.warning("editor_log: WARNING - %s; keeping the current log levels.", e); return False
+    for subsystem in _configured_levels: get_logger(subsystem).setLevel(logging.NOTSET)
+    _root.setLevel(DEFAULT_LEVEL if default_level is None else default_level)
+    for subsystem, level in levels.items(): get_logger(subsystem).setLevel(level)
+    _configured_levels.clear(); _configured_levels.update(levels)
+    return True
+
+def configure_from_args(argv):
+    """
+    Apply --log=SPEC (or --log SPEC), --quiet and --verbose options, which override
+    AIBOOK_LOG, and return argv without them.
+    """
+    remaining = []
+    spec = None
+    args = iter(argv)
+    for arg in args:
+        if arg == "--quiet": spec = QUIET_SPEC
+        elif arg == "--verbose": spec = VERBOSE_SPEC
+        elif arg.startswith("--log="): spec = arg[len("--log="):]
+        elif arg == "--log": spec = next(args, "")
+        else: remaining.append(arg)
+    if spec is not None: configure_logging(spec)
+    return remaining
+
+configure_logging()
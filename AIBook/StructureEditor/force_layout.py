@@ -0,0 +1,109 @@
+"""
+Force-directed layout for the Interactive Book Editor.
+Runs Fruchterman-Reingold style iterations on NumPy arrays: positions are an N x 2
+array, edges are index arrays, and repulsion is approximated on a uniform grid
+(exact within a cell, cell centroids for everything else).
+NumPy is optional; without it FORCE_LAYOUT_AVAILABLE is False. It is imported on first use.
+"""
+
+import math
+from importlib.util import find_spec
+
+np = None # numpy, imported by the first layout (it is slow to import and only the force-directed layout needs it)
+FORCE_LAYOUT_AVAILABLE = find_spec("numpy") is not None # Optional dependency
+
+IDEAL_DISTANCE = 150.0 # Preferred edge length in scene units
+ITERATIONS = 50
+MIN_CELL_SIZE = 16 # Nodes per grid cell is about sqrt(N), which balances exact pairs against centroids
+GRAVITY = 0.02 # Pull towards the centre so disconnected parts do not drift apart
+
+def force_directed_layout(positions, edges, fixed_ids=(), iterations=ITERATIONS, ideal_distance=IDEAL_DISTANCE):
+    """
+    Improve node positions with a force-directed simulation.
+
+    Args:
+        positions (dict): node_id -> (x, y) starting position for every node taking part.
+        edges (iterable): (source_id, target_id, ...) tuples; edges to unknown nodes are ignored.
+        fixed_ids (iterable, optional): Nodes that push and pull others but do not move.
+        iterations (int, optional): Number of simulation steps.
+        ideal_distance (float, optional): Preferred distance between connected nodes.
+
+    Returns:
+        dict: node_id -> (x, y) for the nodes that are not fixed, in the order of positions.
+    """
+    global np
+    if np is None:
+        if not FORCE_LAYOUT_AVAILABLE: raise RuntimeError("force_directed_layout requires NumPy")
+        import numpy as np
+    node_ids = list(positions)
+    count = len(node_ids)
+    if count == 0: return {}
+    index = {node_id: i for i, node_id in enumerate(node_ids)}
+    pos = np.array([positions[node_id] for node_id in node_ids], dtype=np.float64).reshape(count, 2)
+    movable = np.ones(count, dtype=bool)
+    for node_id in fixed_ids:
+        if node_id in index: movable[index[node_id]] = False
+    pairs = [(index[edge[0]], index[edge[1]]) for edge in edges if edge[0] in index and edge[1] in index and edge[0] != edge[1]]
+    sources, targets = (np.array(side, dtype=np.intp) for side in zip(*pairs)) if pairs else (np.empty(0, np.intp), np.empty(0, np.intp))
+
+    # Separate coincident starting points, deterministically
+    pos += np.random.default_rng(0).uniform(-1.0, 1.0, pos.shape) * movable[:, None]
+    k2 = ideal_distance * ideal_distance
+    span = max(float(np.ptp(pos[:, 0])), float(np.ptp(pos[:, 1])), math.sqrt(count) * ideal_distance)
+    temperature = span / 10.0
+    cooling = temperature / (iterations + 1)
+
+    for _ in range(iterations):
+        force = _grid_repulsion(pos, k2)
+        if len(sources):
+            delta = pos[targets] - pos[sources]
+            pull = delta * (np.hypot(delta[:, 0], delta[:, 1]) / ideal_distance)[:, None]
+            for axis in (0, 1):
+                force[:, axis] += np.bincount(sources, pull[:, axis], count) - np.bincount(targets, pull[:, axis], count)
+        force += (pos.mean(axis=0) - pos) * GRAVITY
+        force[~movable] = 0.0
+        length = np.maximum(np.hypot(force[:, 0], force[:, 1]), 1e-9)
+        pos += force * (np.minimum(length, temperature) / length)[:, None]
+        temperature -= cooling
+
+    return {node_id: (float(pos[i, 0]), float(pos[i, 1])) for i, node_id in enumerate(node_ids) if movable[i]}
+
+def _grid_repulsion(pos, k2):
+    """
+    Get the repulsive force on every node (k^2 / distance, away from the others).
+    Nodes are split into an adaptive grid of about sqrt(N) nodes per cell: vertical strips
+    by x, each cut into cells by y. Nodes in the same cell repel each other exactly;
+    other cells act through their centroid weighted by their node count.
+    """
+    count = len(pos)
+    cell_size = max(MIN_CELL_SIZE, int(math.sqrt(count)))
+    cell_count = -(-count // cell_size) # Ceiling division
+    cells_per_strip = max(1, int(math.sqrt(cell_count)))
+    strip_of = np.empty(count, dtype=np.intp)
+    strip_of[np.argsort(pos[:, 0], kind='stable')] = np.arange(count) // (cell_size * cells_per_strip)
+    order = np.lexsort((pos[:, 1], strip_of)) # By strip, then by y inside the strip
+    cell_of = np.empty(count, dtype=np.intp)
+    cell_of[order] = np.arange(count) // cell_size
+    mass = np.bincount(cell_of, minlength=cell_count).astype(np.float64)
+    centroid = np.stack([np.bincount(cell_of, pos[:, axis], cell_count) for axis in (0, 1)], axis=1) / mass[:, None]
+
+    # Far field: every node against every other cell's centroid
+    dx = pos[:, 0:1] - centroid[:, 0]
+    dy = pos[:, 1:2] - centroid[:, 1]
+    weight = mass * k2 / np.maximum(dx * dx + dy * dy, 1.0)
+    weight[np.arange(count), cell_of] = 0.0 # Own cell is handled exactly below
+    force = np.stack([np.einsum('nc,nc->n', weight, dx), np.einsum('nc,nc->n', weight, dy)], axis=1)
+
+    # Near field: exact pairs inside each cell (the last cell is padded with far away points)
+    padded = np.full((cell_count * cell_size, 2), np.inf)
+    padded[:count] = pos[order]
+    blocks = padded.reshape(cell_count, cell_size, 2)
+    with np.errstate(invalid='ignore'): # inf - inf for padding pairs
+        dx = blocks[:, :, None, 0] - blocks[:, None, :, 0]
+        dy = blocks[:, :, None, 1] - blocks[:, None, :, 1]
+    real = np.isfinite(dx)
+    dx[~real] = 0.0; dy[~real] = 0.0 # Padding contributes nothing; the diagonal already has zero delta
+    weight = k2 / np.maximum(dx * dx + dy * dy, 1.0)
+    near = np.stack([np.einsum('cij,cij->ci', weight, dx), np.einsum('cij,cij->ci', weight, dy)], axis=2)
+    force[order] += near.reshape(-1, 2)[:count]
+    return force
@@ -1,13 +1,25 @@
 """
 GraphNodeItem and GraphEdgeItem classes for the Interactive Book Editor.
 These classes handle the visual representation of nodes and edges in the graph view.
+ADDED: Level of detail. In overview mode (zoomed out) titles are hidden and edges
+       are plain solid lines without arrowheads.
+REVISED: Pens, brushes and fonts are shared per node/edge type, and node items are
+         rendered through a configurable QGraphicsItem cache.
 """
 
 import math
+from collections import namedtuple
 from PyQt5.QtWidgets import QGraphicsItem, QGraphicsEllipseItem, QGraphicsPathItem, QGraphicsTextItem
 from PyQt5.QtCore import Qt, QRectF, QPointF
 from PyQt5.QtGui import QPen, QBrush, QColor, QPainterPath, QFont
 
+# View scale below which the graph is drawn in the cheap overview style
+DETAIL_LEVEL = 0.5
+
+# Shared drawing resources for one node type
+NodeStyle = namedtuple("NodeStyle", ["radius", "brush", "pen", "font"])
+NO_PEN = QPen(Qt.NoPen)
+
 class GraphNodeItem(QGraphicsEllipseItem):
     """
     Visual representation of a node in the graph view.
@@ -25,6 +37,22 @@ class GraphNodeItem(QGraphicsEllipseItem):
         "world": QColor(205, 133, 63),  # Peru (brownish)
         "default": QColor(200, 200, 200)  # Light gray
     }
+
+    # Cache mode for node items and their titles; nodes rarely change, so they are blitted from the cache
+    cache_mode = QGraphicsItem.DeviceCoordinateCache
+    _styles = {} # node_type -> NodeStyle shared by every item of that type
+
+    @classmethod
+    def style_for(cls, node_type):
+        """Get the shared NodeStyle for a node type (book nodes are larger, with a thicker border and bold title)."""
+        style = cls._styles.get(node_type)
+        if style is None:
+            is_book = node_type == "book"
+            font = QFont("Arial", 10)
+            font.setBold(is_book)
+            color = cls.TYPE_COLORS.get(node_type or "default", cls.TYPE_COLORS["default"])
+            style = cls._styles[node_type] = NodeStyle(40 if is_book else 30, QBrush(color), QPen(Qt.black, 2 if is_book else 1), font)
+        return style
     
     def __init__(self, node, parent=None):
         """
@@ -35,17 +63,21 @@ class GraphNodeItem(QGraphicsEllipseItem):
             parent (QGraphicsItem, optional): Parent item
         """
         # Use a different size for book nodes
-        node_radius = 40 if node.node_type == "book" else 30
+        style = self.style_for(node.node_type)
+        node_radius = style.radius
         
         # Create a circle with the appropriate radius
         super().__init__(-node_radius, -node_radius, node_radius * 2, node_radius * 2, parent)
         self.node = node
+        self.detailed = True
+        self.style = style
         
         # Ensure the item is selectable and movable
         self.setFlag(QGraphicsItem.ItemIsMovable, True)
         self.setFlag(QGraphicsItem.ItemIsSelectable, True)
         self.setFlag(QGraphicsItem.ItemSendsGeometryChanges, True)
         self.setFlag(QGraphicsItem.ItemSendsScenePositionChanges, True)
+        self.setCacheMode(self.cache_mode)
         
         # Ensure the item receives context menu events
         self.setAcceptedMouseButtons(Qt.LeftButton | Qt.RightButton)
@@ -56,32 +88,26 @@ class GraphNodeItem(QGraphicsEllipseItem):
         x, y = node.position
         self.setPos(x, y)
         
-        # Set appearance based on node type
-        node_type = node.node_type or "default"
-        color = self.TYPE_COLORS.get(node_type, self.TYPE_COLORS["default"])
-        self.setBrush(QBrush(color))
-        
-        # Use a thicker border for book nodes
-        pen_width = 2 if node.node_type == "book" else 1
-        self.setPen(QPen(Qt.black, pen_width))
+        # Set appearance based on node type (shared brush, pen and font)
+        self.setBrush(style.brush)
+        self.setPen(style.pen)
         
         # Add title text
         self.title_item = QGraphicsTextItem(node.title, self)
-        
-        # Use bold font for book nodes
-        font = QFont("Arial", 10)
-        if node.node_type == "book":
-            font.setBold(True)
-        self.title_item.setFont(font)
+        self.title_item.setFont(style.font)
+        self.title_item.setCacheMode(self.cache_mode)
         
         # Make text transparent to mouse events
         self.title_item.setFlag(QGraphicsItem.ItemIgnoresParentOpacity, False)
         self.title_item.setAcceptedMouseButtons(Qt.NoButton)
         
         # Center the text on the node
-        text_width = self.title_item.boundingRect().width()
-        text_height = self.title_item.boundingRect().height()
-        self.title_item.setPos(-text_width/2, -text_height/2)
+        self._center_title()
+
+    def _center_title(self):
+        """Center the title text on the node."""
+        text_rect = self.title_item.boundingRect()
+        self.title_item.setPos(-text_rect.width()/2, -text_rect.height()/2)
     
     def itemChange(self, change, value):
         """
@@ -99,45 +125,43 @@ class GraphNodeItem(QGraphicsEllipseItem):
             # Update the node position
             new_pos = value
             self.node.position = (new_pos.x(), new_pos.y())
+        # Once moved, let the view know so attached edges are re-pathed on the next frame
+        elif change == QGraphicsItem.ItemPositionHasChanged and self.scene():
+            for view in self.scene().views():
+                node_item_moved = getattr(view, "node_item_moved", None)
+                if node_item_moved: node_item_moved(self)
         
         return super().itemChange(change, value)
+
+    def set_detailed(self, detailed):
+        """Switch between full detail and the overview style (no title, no outline)."""
+        if detailed == self.detailed: return
+        self.detailed = detailed
+        self.title_item.setVisible(detailed)
+        self.setPen(self.style.pen if detailed else NO_PEN)
     
     def update_appearance(self):
-        """Update the appearance based on the current node data."""
+        """Update the appearance based on the current node data. Only what changed is touched."""
         # Update position
         x, y = self.node.position
         self.setPos(x, y)
         
-        # Update color based on node type
-        node_type = self.node.node_type or "default"
-        color = self.TYPE_COLORS.get(node_type, self.TYPE_COLORS["default"])
-        self.setBrush(QBrush(color))
-        
-        # Update title
-        self.title_item.setPlainText(self.node.title)
-        
-        # Re-center the text
-        text_width = self.title_item.boundingRect().width()
-        text_height = self.title_item.boundingRect().height()
-        self.title_item.setPos(-text_width/2, -text_height/2)
-        
-        # Check if node type changed
-        node_radius = 40 if self.node.node_type == "book" else 30
-        current_radius = self.rect().width() / 2
-        
-        if node_radius != current_radius:
-            # Update the circle size
-            self.setRect(-node_radius, -node_radius, node_radius * 2, node_radius * 2)
-            
-            # Update the pen width
-            pen_width = 2 if self.node.node_type == "book" else 1
-            self.setPen(QPen(Qt.black, pen_width))
-            
-            # Update font
-            font = QFont("Arial", 10)
-            if self.node.node_type == "book":
-                font.setBold(True)
-            self.title_item.setFont(font)
+        # Update brush, size, border and font if the node type changed
+        style = self.style_for(self.node.node_type)
+        title_changed = self.title_item.toPlainText() != self.node.title
+        if style is not self.style:
+            old_style, self.style = self.style, style
+            self.setBrush(style.brush)
+            if style.radius != old_style.radius:
+                self.setRect(-style.radius, -style.radius, style.radius * 2, style.radius * 2)
+            if self.detailed: self.setPen(style.pen)
+            if style.font != old_style.font:
+                self.title_item.setFont(style.font); title_changed = True
+        
+        # Update title, re-centering the text only when it changed
+        if title_changed:
+            self.title_item.setPlainText(self.node.title)
+            self._center_title()
 
 
 class GraphEdgeItem(QGraphicsPathItem):
@@ -168,6 +192,23 @@ class GraphEdgeItem(QGraphicsPathItem):
         "fiction-nonfiction": Qt.DashDotDotLine,
         "default": Qt.SolidLine
     }
+
+    _pens = {} # (edge_type, detailed) -> QPen shared by every edge of that type
+
+    @classmethod
+    def pen_for(cls, edge_type, detailed=True):
+        """Get the shared pen for an edge type: styled and 2px wide, or a solid cosmetic pen for the overview."""
+        pen = cls._pens.get((edge_type, detailed))
+        if pen is None:
+            color = cls.TYPE_COLORS.get(edge_type or "default", cls.TYPE_COLORS["default"])
+            if detailed:
+                pen = QPen(color, 2, cls.TYPE_STYLES.get(edge_type or "default", cls.TYPE_STYLES["default"]))
+                pen.setCapStyle(Qt.RoundCap)
+                pen.setJoinStyle(Qt.RoundJoin)
+            else:
+                pen = QPen(color, 0)
+            cls._pens[(edge_type, detailed)] = pen
+        return pen
     
     def __init__(self, edge, source_item, target_item, parent=None):
         """
@@ -183,6 +224,7 @@ class GraphEdgeItem(QGraphicsPathItem):
         self.edge = edge
         self.source_item = source_item
         self.target_item = target_item
+        self.detailed = True
         self.setZValue(0)  # Make sure edges appear below nodes
         
         # Set appearance based on edge type
@@ -218,6 +260,9 @@ class GraphEdgeItem(QGraphicsPathItem):
         path = QPainterPath()
         path.moveTo(source_x, source_y)
         path.lineTo(target_x, target_y)
+        if not self.detailed: # Overview: the line alone
+            self.setPath(path)
+            return
         
         # Add arrowhead at the target end
         arrow_size = 10
@@ -250,12 +295,11 @@ class GraphEdgeItem(QGraphicsPathItem):
         # Update the path
         self.update_path()
         
-        # Set color and style based on edge type
-        edge_type = self.edge.edge_type or "default"
-        color = self.TYPE_COLORS.get(edge_type, self.TYPE_COLORS["default"])
-        style = self.TYPE_STYLES.get(edge_type, self.TYPE_STYLES["default"])
-        
-        pen = QPen(color, 2, style)
-        pen.setCapStyle(Qt.RoundCap)
-        pen.setJoinStyle(Qt.RoundJoin)
-        self.setPen(pen)
\ No newline at end of file
+        # Set color and style based on edge type (solid cosmetic pen in the overview)
+        self.setPen(self.pen_for(self.edge.edge_type, self.detailed))
+
+    def set_detailed(self, detailed):
+        """Switch between full detail and the overview style (solid line, no arrowhead)."""
+        if detailed == self.detailed: return
+        self.detailed = detailed
+        self.update_appearance()
\ No newline at end of file
@@ -4,16 +4,37 @@ REVISED: Restored RubberBandDrag for left-click selection.
          Re-implemented custom middle-button panning logic.
          Ensured default cursor is ArrowCursor.
 FIXED: Included complete implementations for all methods.
+REVISED: refresh_graph reconciles the scene with the graph instead of rebuilding it.
+         Items are moved to their model position, and a different graph replaces every item.
+ADDED: node_id -> edge keys incidence index, so moving a node touches only its own edges.
+REVISED: Edge paths of moved nodes are recomputed once per frame from a dirty set.
+ADDED: Level of detail. Zoomed out past DETAIL_LEVEL, antialiasing is switched off and
+       items are put in their overview style.
+ADDED: set_node_cache_mode to choose how node items are cached.
+ADDED: Virtualized mode for large books. Items exist only for nodes near the viewport
+       (found through a SpatialGrid) and are recycled while panning and zooming.
+REVISED: node_moved (one signal per selected node) replaced by nodes_moved, emitted once per
+         drag with the nodes whose position actually changed.
+ADDED: set_node_positions to move many nodes at once (e.g. streamed layout results).
+       Large moves suspend the scene's BSP index, which is very slow to update when many
+       items move, and rebuild it once they settle.
+REVISED: Virtualized mode no longer materializes the neighbours of visible nodes: through a hub
+         (the book or a chapter node) that pulled in most of the book. Edges are drawn when
+         both endpoints are within the margin around the viewport.
 """
 
 import math 
 import traceback # For debugging potential errors
 from PyQt5.QtWidgets import QGraphicsView, QGraphicsScene, QMenu, QAction, QInputDialog
-from PyQt5.QtCore import Qt, pyqtSignal, QRectF, QPointF, QLineF 
-from PyQt5.QtGui import QPainter, QPen, QColor, QKeyEvent, QWheelEvent 
+from PyQt5.QtCore import Qt, pyqtSignal, QRectF, QPointF, QLineF, QTimer 
+from PyQt5.QtGui import QPainter, QPen, QColor, QKeyEvent, QWheelEvent, QPolygonF 
 
-from graph_items import GraphNodeItem, GraphEdgeItem
+from graph_items import GraphNodeItem, GraphEdgeItem, DETAIL_LEVEL
 from node import Edge # Assuming Edge class is in node.py
+from spatial_grid import SpatialGrid
+from editor_log import get_logger
+
+log = get_logger(__name__)
 
 class GraphView(QGraphicsView):
     """
@@ -23,8 +44,18 @@ class GraphView(QGraphicsView):
     
     # Signals
     node_selected = pyqtSignal(object); edge_selected = pyqtSignal(object) 
-    selection_cleared = pyqtSignal(); node_moved = pyqtSignal(object)  
+    selection_cleared = pyqtSignal(); nodes_moved = pyqtSignal(list) # Nodes dragged to a new position, once per drag
     edge_created = pyqtSignal(object); edge_deleted = pyqtSignal(object) 
+
+    EDGE_UPDATE_INTERVAL_MS = 16 # About one display frame at 60 Hz
+    # Virtualized mode (see set_virtualization)
+    VIRTUALIZE_THRESHOLD = 2000 # Node count from which the view virtualizes automatically
+    CULL_MARGIN = 0.5 # Extra area around the viewport, as a fraction of its size, kept materialized (and where edges are drawn)
+    MAX_MATERIALIZED_NODES = 3000 # Above this many visible nodes, nodes are drawn as points instead
+    ITEM_POOL_SIZE = 500 # Released items kept for reuse
+    VISIBLE_UPDATE_INTERVAL_MS = 30
+    BULK_MOVE_THRESHOLD = 100 # Moving more nodes than this at once suspends the scene index
+    INDEX_RESTORE_DELAY_MS = 500 # Quiet time after a bulk move before the index is rebuilt
     
     def __init__(self, parent=None):
         """Initialize a new GraphView instance."""
@@ -48,6 +79,14 @@ class GraphView(QGraphicsView):
         self.book_graph = None
         self.node_items = {}  
         self.edge_items = {}  
+        self.node_edge_keys = {} # node_id -> set of edge_items keys incident to it
+        
+        # Edges whose endpoints moved since the last frame, re-pathed together by a timer
+        self._dirty_edge_keys = set()
+        self._edge_update_timer = QTimer(self)
+        self._edge_update_timer.setSingleShot(True)
+        self._edge_update_timer.setInterval(self.EDGE_UPDATE_INTERVAL_MS)
+        self._edge_update_timer.timeout.connect(self.flush_dirty_edges)
         
         # Panning state for middle-button
         self.is_panning = False
@@ -59,71 +98,298 @@ class GraphView(QGraphicsView):
         self.temp_edge = None 
         self.edge_types = ["critical-path", "character-pov", "branch-point", "concept-sequence", "related-concept", "fiction-nonfiction", "default"]
         self.current_edge_type = "default" 
+        self.detailed = True # Level of detail currently applied to the items
+        self._drag_start_positions = {} # node_id -> position of selected nodes when the left button went down
+        
+        # Virtualized mode state
+        self.virtualization = None # None: automatic by node count; True/False: forced
+        self.virtualized = False
+        self.spatial_grid = None # SpatialGrid of node positions while virtualized
+        self._node_item_pool = []
+        self._edge_item_pool = []
+        self._point_overview = False # Too many visible nodes: drawn as points in drawBackground
+        self._overview_points = None # node_type -> (QPen, QPolygonF), rebuilt when positions change
+        self._visible_update_timer = QTimer(self)
+        self._visible_update_timer.setSingleShot(True)
+        self._visible_update_timer.setInterval(self.VISIBLE_UPDATE_INTERVAL_MS)
+        self._visible_update_timer.timeout.connect(self.update_visible_items)
+        self._index_restore_timer = QTimer(self)
+        self._index_restore_timer.setSingleShot(True)
+        self._index_restore_timer.setInterval(self.INDEX_RESTORE_DELAY_MS)
+        self._index_restore_timer.timeout.connect(self._restore_scene_index)
+        self.horizontalScrollBar().valueChanged.connect(self._schedule_visible_update)
+        self.verticalScrollBar().valueChanged.connect(self._schedule_visible_update)
 
     # --- Graph Management Methods ---
 
     def set_book_graph(self, book_graph):
-        """Set the book graph to display and refresh the view."""
+        """Set the book graph to display and refresh the view. A different graph replaces every item."""
+        if book_graph is not self.book_graph: self._clear_items() # Items of another graph must not be reused
         self.book_graph = book_graph
         self.refresh_graph()
 
+    def _clear_items(self):
+        """Remove every item from the scene and drop the state that refers to them."""
+        self.scene.clear() 
+        self.node_items.clear()
+        self.edge_items.clear()
+        self.node_edge_keys.clear()
+        self._dirty_edge_keys.clear(); self._drag_start_positions.clear()
+        self.is_creating_edge = False; self.edge_source_item = None; self.temp_edge = None
+        self._node_item_pool.clear(); self._edge_item_pool.clear()
+        self.virtualized = False; self.spatial_grid = None; self._point_overview = False; self._overview_points = None
+        self.setSceneRect(QRectF()) # Back to the scene's own growing rect
+
     def refresh_graph(self):
-        """Refresh the graph display based on the current book graph."""
+        """
+        Reconcile the scene with the current book graph.
+        Items are added, updated or removed only where the graph differs from what is
+        displayed, so existing items keep their scene positions, selection and the
+        view transform, and Qt's scene index is not rebuilt. In virtualized mode only
+        the nodes around the viewport get items.
+        """
         if not self.book_graph:
-            print("GraphView: Cannot refresh, book_graph is not set.")
-            self.scene.clear() 
-            self.node_items.clear()
-            self.edge_items.clear()
+            log.warning("GraphView: Cannot refresh, book_graph is not set.")
+            self._clear_items()
             return
         
-        print("GraphView: Refreshing graph display...")
+        log.debug("GraphView: Refreshing graph display...")
         try:
-            current_transform = self.transform()
-            selected_ids = [item.node.id for item in self.scene.selectedItems() if isinstance(item, GraphNodeItem)]
-            positions = {node_id: item.pos() for node_id, item in self.node_items.items()}
+            graph = self.book_graph.graph
+            self.virtualized = self.virtualization if self.virtualization is not None else graph.number_of_nodes() >= self.VIRTUALIZE_THRESHOLD
+            if self.virtualized:
+                self._rebuild_spatial_grid()
+                counts = self._reconcile_items(self._wanted_node_ids())
+            else:
+                if self.spatial_grid is not None: # Leaving virtualized mode
+                    self.spatial_grid = None; self._point_overview = False; self._overview_points = None
+                    self._node_item_pool.clear(); self._edge_item_pool.clear()
+                    self.setSceneRect(QRectF()) # Back to the scene's own growing rect
+                counts = self._reconcile_items()
+            mode = f" (virtualized, {len(self.node_items)} of {graph.number_of_nodes()} nodes materialized)" if self.virtualized else ""
+            log.info("GraphView: Graph refreshed. Nodes +%d ~%d -%d, edges +%d ~%d -%d%s.", *counts, mode)
+        except Exception as e:
+             log.error("ERROR during GraphView.refresh_graph: %s", e)
+             traceback.print_exc()
 
-            self.scene.clear()
-            self.node_items.clear()
-            self.edge_items.clear()
-            
-            nodes_added = 0
-            all_nodes = self.book_graph.get_all_nodes() 
-            for node in all_nodes:
-                pos_data = node.position; initial_pos_tuple = (10.0, 10.0) # Default if error
-                if isinstance(pos_data, (list, tuple)) and len(pos_data) == 2:
-                     try: initial_pos_tuple = (float(pos_data[0]), float(pos_data[1]))
-                     except (ValueError, TypeError): pass 
-                
-                initial_pos = positions.get(node.id, QPointF(*initial_pos_tuple)) 
-                
-                node_item = GraphNodeItem(node)
-                node_item.setPos(initial_pos) 
+    def _reconcile_items(self, wanted_node_ids=None):
+        """
+        Make node_items/edge_items match the graph, limited to wanted_node_ids if given.
+        An edge gets an item when both of its endpoints have one.
+        
+        Returns:
+            tuple: Counts of nodes added, updated, removed and edges added, updated, removed.
+        """
+        graph = self.book_graph.graph
+        nodes_added = nodes_updated = nodes_removed = 0
+        edges_added = edges_updated = edges_removed = 0
+        resized_ids = set() # Nodes whose radius or position changed, so attached edges need new paths
+
+        # --- Nodes ---
+        for node_id in [node_id for node_id in self.node_items if node_id not in graph or (wanted_node_ids is not None and node_id not in wanted_node_ids)]:
+            self._release_node_item(node_id); nodes_removed += 1
+        node_views = self.book_graph.iter_node_views() if wanted_node_ids is None else \
+                     (self.book_graph.get_node_view(node_id) for node_id in wanted_node_ids if node_id in graph)
+        for node_view in node_views:
+            node_item = self.node_items.get(node_view.id)
+            if node_item is None:
+                node = node_view.to_node() # Items own a mutable copy that tracks drags
+                node.position = self._model_position(node) or (10.0, 10.0) # Default if error
+                node_item = self._acquire_node_item(node)
                 self.scene.addItem(node_item)
                 self.node_items[node.id] = node_item
                 nodes_added += 1
-                
-            edges_added = 0
-            for edge in self.book_graph.get_all_edges(): 
-                source_item = self.node_items.get(edge.source_id)
-                target_item = self.node_items.get(edge.target_id)
+                continue
+            shown = node_item.node
+            model_position = self._model_position(node_view)
+            displayed_position = (node_item.pos().x(), node_item.pos().y())
+            moved = model_position is not None and model_position != displayed_position
+            if moved or (shown.title, shown.node_type, shown.chapter, shown.file_path, shown.metadata) != \
+               (node_view.title, node_view.node_type, node_view.chapter, node_view.file_path, dict(node_view.metadata)):
+                node = node_view.to_node()
+                node.position = model_position if moved else displayed_position # A malformed model position keeps the displayed one
+                old_radius = node_item.rect().width()
+                node_item.node = node
+                node_item.update_appearance() # Also moves the item to node.position
+                if moved or node_item.rect().width() != old_radius: resized_ids.add(node.id)
+                nodes_updated += 1
+
+        # --- Edges ---
+        for edge_key in [edge_key for edge_key, edge_item in self.edge_items.items()
+                         if not graph.has_edge(*edge_key) or edge_item.source_item is not self.node_items.get(edge_key[0])
+                         or edge_item.target_item is not self.node_items.get(edge_key[1])]:
+            self._release_edge_item(edge_key); edges_removed += 1
+        if wanted_node_ids is None: edges = graph.edges(data=True)
+        else: edges = ((source_id, target_id, data) for source_id in self.node_items
+                       for target_id, data in graph.succ[source_id].items() if target_id in self.node_items)
+        for source_id, target_id, data in edges:
+            edge_key = (source_id, target_id)
+            edge_item = self.edge_items.get(edge_key)
+            if edge_item is None:
+                source_item = self.node_items.get(source_id)
+                target_item = self.node_items.get(target_id)
                 if source_item and target_item: 
-                    edge_item = GraphEdgeItem(edge, source_item, target_item)
+                    edge = Edge(source_id=source_id, target_id=target_id, edge_type=data.get('edge_type'), metadata=data.get('metadata', {}).copy())
+                    edge_item = self._acquire_edge_item(edge, source_item, target_item)
                     self.scene.addItem(edge_item)
-                    self.edge_items[(edge.source_id, edge.target_id)] = edge_item
+                    self._put_edge_item(edge_key, edge_item)
                     edges_added += 1
                 else:
-                     print(f"GraphView: Warning - Cannot draw edge {edge.source_id}->{edge.target_id}, node item missing.")
-
-            for node_id in selected_ids:
-                if node_id in self.node_items: 
-                    self.node_items[node_id].setSelected(True)
-                    
-            self.setTransform(current_transform)
-            print(f"GraphView: Graph refreshed. Added {nodes_added} nodes and {edges_added} edges.")
+                     log.warning("GraphView: Warning - Cannot draw edge %s->%s, node item missing.", source_id, target_id)
+            elif (edge_item.edge.edge_type, edge_item.edge.metadata) != (data.get('edge_type'), data.get('metadata', {})):
+                edge_item.edge = Edge(source_id=source_id, target_id=target_id, edge_type=data.get('edge_type'), metadata=data.get('metadata', {}).copy())
+                edge_item.update_appearance()
+                edges_updated += 1
+            elif source_id in resized_ids or target_id in resized_ids:
+                edge_item.update_path()
+        return (nodes_added, nodes_updated, nodes_removed, edges_added, edges_updated, edges_removed)
+
+    @staticmethod
+    def _model_position(node):
+        """Get a node's position in the model as a tuple of floats, or None if it is malformed."""
+        pos_data = node.position
+        if not isinstance(pos_data, (list, tuple)) or len(pos_data) != 2: return None
+        try: return (float(pos_data[0]), float(pos_data[1]))
+        except (ValueError, TypeError): return None
+
+    # --- Item Creation and Recycling ---
+
+    def _acquire_node_item(self, node):
+        """Get a node item for a node, reusing a released one in virtualized mode."""
+        if self._node_item_pool:
+            node_item = self._node_item_pool.pop()
+            node_item.node = node
+            node_item.update_appearance() # Style, title and position of the new node
+        else:
+            node_item = GraphNodeItem(node)
+            node_item.setPos(QPointF(*node.position))
+        node_item.set_detailed(self.detailed)
+        return node_item
+
+    def _release_node_item(self, node_id):
+        """Remove a node item from the scene; in virtualized mode keep it for reuse."""
+        node_item = self.node_items.pop(node_id)
+        node_item.setSelected(False)
+        self.scene.removeItem(node_item)
+        if self.virtualized and len(self._node_item_pool) < self.ITEM_POOL_SIZE: self._node_item_pool.append(node_item)
+
+    def _acquire_edge_item(self, edge, source_item, target_item):
+        """Get an edge item between two node items, reusing a released one in virtualized mode."""
+        if self._edge_item_pool:
+            edge_item = self._edge_item_pool.pop()
+            edge_item.edge = edge; edge_item.source_item = source_item; edge_item.target_item = target_item
+            edge_item.detailed = self.detailed
+            edge_item.update_appearance()
+        else:
+            edge_item = GraphEdgeItem(edge, source_item, target_item)
+            edge_item.set_detailed(self.detailed)
+        return edge_item
+
+    def _release_edge_item(self, edge_key):
+        """Remove an edge item from the scene; in virtualized mode keep it for reuse."""
+        edge_item = self._pop_edge_item(edge_key)
+        edge_item.setSelected(False)
+        if edge_item.scene() is self.scene: self.scene.removeItem(edge_item)
+        if self.virtualized and len(self._edge_item_pool) < self.ITEM_POOL_SIZE: self._edge_item_pool.append(edge_item)
+
+    # --- Virtualized Mode ---
+
+    def set_virtualization(self, enabled):
+        """
+        Choose whether only nodes near the viewport get scene items.
+        
+        Args:
+            enabled (bool or None): True/False to force the mode, None to virtualize
+                automatically for books with VIRTUALIZE_THRESHOLD nodes or more.
+        """
+        self.virtualization = enabled
+        if self.book_graph: self.refresh_graph()
+
+    def _rebuild_spatial_grid(self):
+        """Index every node position of the book graph and size the scene to cover them."""
+        self.spatial_grid = SpatialGrid()
+        for node_view in self.book_graph.iter_node_views():
+            item = self.node_items.get(node_view.id)
+            if item is not None: # Displayed position wins, as for materialized items
+                x, y = item.pos().x(), item.pos().y()
+            else:
+                try: x, y = float(node_view.position[0]), float(node_view.position[1])
+                except (TypeError, ValueError, IndexError): x, y = 10.0, 10.0
+            self.spatial_grid.insert(node_view.id, x, y)
+        self._overview_points = None
+        self._update_virtual_scene_rect()
+
+    def _update_virtual_scene_rect(self):
+        """Make the scene rect cover all node positions, so scrolling reaches nodes without items."""
+        bounds = self.spatial_grid.bounds() if self.spatial_grid else None
+        if not bounds: return
+        left, top, right, bottom = bounds
+        self.setSceneRect(QRectF(left, top, right - left, bottom - top).adjusted(-200, -200, 200, 200) | self.sceneRect())
+
+    def _wanted_node_ids(self):
+        """
+        Get the nodes that should have items: those inside the viewport plus CULL_MARGIN,
+        and selected nodes. Neighbours outside the margin are not added, so an edge is
+        drawn only once both of its endpoints are near the viewport.
+        """
+        rect = self.mapToScene(self.viewport().rect()).boundingRect()
+        rect.adjust(-rect.width() * self.CULL_MARGIN, -rect.height() * self.CULL_MARGIN, rect.width() * self.CULL_MARGIN, rect.height() * self.CULL_MARGIN)
+        visible = self.spatial_grid.query(rect.left(), rect.top(), rect.right(), rect.bottom())
+        point_overview = len(visible) > self.MAX_MATERIALIZED_NODES
+        if point_overview != self._point_overview:
+            self._point_overview = point_overview
+            self.viewport().update()
+        wanted = set() if point_overview else set(visible)
+        wanted.update(item.node.id for item in self.scene.selectedItems() if isinstance(item, GraphNodeItem)) # e.g. mid-drag
+        return wanted
+
+    def _schedule_visible_update(self, *args):
+        """Queue update_visible_items after the view scrolled, zoomed or resized."""
+        if self.virtualized and not self._visible_update_timer.isActive(): self._visible_update_timer.start()
+
+    def update_visible_items(self):
+        """Materialize items for nodes that came into view and release those that left it."""
+        if not self.virtualized or not self.book_graph or self.spatial_grid is None: return
+        try:
+            self._reconcile_items(self._wanted_node_ids())
         except Exception as e:
-             print(f"ERROR during GraphView.refresh_graph: {e}")
+             log.error("ERROR during GraphView.update_visible_items: %s", e)
              traceback.print_exc()
 
+    def node_item_moved(self, node_item):
+        """Called from GraphNodeItem.itemChange after a node item moved."""
+        node_id = node_item.node.id
+        self.mark_edges_dirty(node_id)
+        if self.spatial_grid is not None and node_id in self.spatial_grid:
+            self.spatial_grid.move(node_id, node_item.pos().x(), node_item.pos().y())
+            self._overview_points = None
+
+    def drawBackground(self, painter, rect):
+        """Draw the background; with too many visible nodes, draw them as points instead of items."""
+        super().drawBackground(painter, rect)
+        if not self._point_overview or self.spatial_grid is None or not self.book_graph: return
+        if self._overview_points is None:
+            graph = self.book_graph.graph
+            points = {}
+            for node_id, (x, y) in self.spatial_grid.positions.items():
+                node_type = graph.nodes[node_id].get('node_type') if node_id in graph else None
+                points.setdefault(node_type, QPolygonF()).append(QPointF(x, y))
+            self._overview_points = {}
+            for node_type, polygon in points.items():
+                pen = QPen(GraphNodeItem.TYPE_COLORS.get(node_type or "default", GraphNodeItem.TYPE_COLORS["default"]), 4)
+                pen.setCosmetic(True); pen.setCapStyle(Qt.RoundCap)
+                self._overview_points[node_type] = (pen, polygon)
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing, False)
+        for pen, polygon in self._overview_points.values():
+            painter.setPen(pen); painter.drawPoints(polygon)
+        painter.restore()
+
+    def resizeEvent(self, event):
+        """Re-cull after the viewport changed size."""
+        super().resizeEvent(event)
+        self._schedule_visible_update()
+
 
     def update_node(self, node):
         """Update the visual appearance of a node."""
@@ -133,12 +399,33 @@ class GraphView(QGraphicsView):
                 node_item.node = node 
                 node_item.update_appearance() 
                 self.update_connected_edges(node_item) 
-                # print(f"GraphView: Updated node item {node.id}") # Less verbose
+                log.debug("GraphView: Updated node item %s", node.id)
             except Exception as e:
-                 print(f"ERROR during GraphView.update_node for {node.id}: {e}")
+                 log.error("ERROR during GraphView.update_node for %s: %s", node.id, e)
                  traceback.print_exc()
 
 
+    def set_node_positions(self, positions):
+        """Move nodes to new positions, e.g. a batch from the LayoutService. Culled nodes only move in the index."""
+        if len(positions) > self.BULK_MOVE_THRESHOLD:
+            if self.scene.itemIndexMethod() != QGraphicsScene.NoIndex: self.scene.setItemIndexMethod(QGraphicsScene.NoIndex)
+            self._index_restore_timer.start()
+        for node_id, (x, y) in positions.items():
+            node_item = self.node_items.get(node_id)
+            if node_item is not None: node_item.setPos(QPointF(x, y)) # itemChange tracks node.position, edges and the grid
+            elif self.spatial_grid is not None and node_id in self.spatial_grid: self.spatial_grid.move(node_id, x, y)
+        if self.spatial_grid is not None:
+            self._overview_points = None
+            self._update_virtual_scene_rect()
+            self._schedule_visible_update()
+            self.viewport().update()
+
+
+    def _restore_scene_index(self):
+        """Rebuild the BSP scene index once a bulk move has settled."""
+        self.flush_dirty_edges()
+        self.scene.setItemIndexMethod(QGraphicsScene.BspTreeIndex)
+
     def update_edge(self, edge):
         """Update the visual appearance of an edge."""
         edge_key = (edge.source_id, edge.target_id)
@@ -147,32 +434,67 @@ class GraphView(QGraphicsView):
             try:
                 edge_item.edge = edge 
                 edge_item.update_appearance() 
-                # print(f"GraphView: Updated edge item {edge_key}") # Less verbose
+                log.debug("GraphView: Updated edge item %s", edge_key)
             except Exception as e:
-                 print(f"ERROR during GraphView.update_edge for {edge_key}: {e}")
+                 log.error("ERROR during GraphView.update_edge for %s: %s", edge_key, e)
                  traceback.print_exc()
 
 
+    def _put_edge_item(self, edge_key, edge_item):
+        """Register an edge item in edge_items and the incidence index."""
+        self.edge_items[edge_key] = edge_item
+        for node_id in edge_key: self.node_edge_keys.setdefault(node_id, set()).add(edge_key)
+
+    def _pop_edge_item(self, edge_key):
+        """Unregister an edge item from edge_items and the incidence index. Returns the item or None."""
+        edge_item = self.edge_items.pop(edge_key, None)
+        if edge_item is not None:
+            for node_id in edge_key:
+                keys = self.node_edge_keys.get(node_id)
+                if keys is not None:
+                    keys.discard(edge_key)
+                    if not keys: del self.node_edge_keys[node_id]
+        return edge_item
+
+    def mark_edges_dirty(self, node_id):
+        """Queue the edges attached to a moved node for re-pathing on the next frame (called from GraphNodeItem.itemChange)."""
+        edge_keys = self.node_edge_keys.get(node_id)
+        if not edge_keys: return
+        self._dirty_edge_keys.update(edge_keys)
+        if not self._edge_update_timer.isActive(): self._edge_update_timer.start()
+
+    def flush_dirty_edges(self):
+        """Re-path every queued edge once."""
+        self._edge_update_timer.stop()
+        dirty_edge_keys, self._dirty_edge_keys = self._dirty_edge_keys, set()
+        for edge_key in dirty_edge_keys:
+            edge_item = self.edge_items.get(edge_key)
+            if edge_item is None: continue # Removed since it was queued
+            try:
+                edge_item.update_path()
+            except Exception as e:
+                 log.error("ERROR during GraphView.flush_dirty_edges for edge %s: %s", edge_key, e)
+                 traceback.print_exc()
+
     def update_connected_edges(self, node_item):
         """Helper to update paths of edges connected to a node."""
         if not node_item or not hasattr(node_item, 'node'): return
-        node_id = node_item.node.id
-        for edge_key, edge_item in self.edge_items.items():
-            if node_id in edge_key: 
-                try:
-                    edge_item.update_path()
-                except Exception as e:
-                     print(f"ERROR during GraphView.update_connected_edges for edge {edge_key}: {e}")
-                     traceback.print_exc()
+        for edge_key in self.node_edge_keys.get(node_item.node.id, ()):
+            try:
+                self.edge_items[edge_key].update_path()
+            except Exception as e:
+                 log.error("ERROR during GraphView.update_connected_edges for edge %s: %s", edge_key, e)
+                 traceback.print_exc()
 
 
     def add_node(self, node, position=None):
         """Add a new node visually to the graph view."""
-        if not node or not hasattr(node, 'id'): print("GraphView: ERROR - Cannot add invalid node object."); return None
-        if node.id in self.node_items: print(f"GraphView: Node item {node.id} already exists."); return self.node_items[node.id]
+        if not node or not hasattr(node, 'id'): log.error("GraphView: ERROR - Cannot add invalid node object."); return None
+        if node.id in self.node_items: log.debug("GraphView: Node item %s already exists.", node.id); return self.node_items[node.id]
             
         try:
             node_item = GraphNodeItem(node)
+            node_item.set_detailed(self.detailed)
             pos_tuple = (10.0, 10.0) # Default position
             
             pos_to_use = position if position else node.position
@@ -185,20 +507,23 @@ class GraphView(QGraphicsView):
                 
             self.scene.addItem(node_item)
             self.node_items[node.id] = node_item
-            print(f"GraphView: Added node item {node.id}")
+            if self.spatial_grid is not None:
+                self.spatial_grid.insert(node.id, *pos_tuple); self._overview_points = None
+                self._update_virtual_scene_rect()
+            log.debug("GraphView: Added node item %s", node.id)
             return node_item
         except Exception as e:
-             print(f"ERROR during GraphView.add_node for {getattr(node, 'id', 'N/A')}: {e}")
+             log.error("ERROR during GraphView.add_node for %s: %s", getattr(node, 'id', 'N/A'), e)
              traceback.print_exc()
              return None
 
 
     def add_edge(self, edge):
         """Add a new edge visually to the graph view."""
-        if not edge or not hasattr(edge, 'source_id') or not hasattr(edge, 'target_id'): print("GraphView: ERROR - Cannot add invalid edge object."); return None
+        if not edge or not hasattr(edge, 'source_id') or not hasattr(edge, 'target_id'): log.error("GraphView: ERROR - Cannot add invalid edge object."); return None
         
         edge_key = (edge.source_id, edge.target_id)
-        if edge_key in self.edge_items: print(f"GraphView: Edge item {edge_key} already exists."); return self.edge_items[edge_key]
+        if edge_key in self.edge_items: log.debug("GraphView: Edge item %s already exists.", edge_key); return self.edge_items[edge_key]
             
         source_item = self.node_items.get(edge.source_id)
         target_item = self.node_items.get(edge.target_id)
@@ -206,63 +531,92 @@ class GraphView(QGraphicsView):
         if source_item and target_item:
             try:
                 edge_item = GraphEdgeItem(edge, source_item, target_item)
+                edge_item.set_detailed(self.detailed)
                 self.scene.addItem(edge_item)
-                self.edge_items[edge_key] = edge_item
-                print(f"GraphView: Added edge item {edge_key}")
+                self._put_edge_item(edge_key, edge_item)
+                log.debug("GraphView: Added edge item %s", edge_key)
                 return edge_item
             except Exception as e:
-                 print(f"ERROR during GraphView.add_edge for {edge_key}: {e}")
+                 log.error("ERROR during GraphView.add_edge for %s: %s", edge_key, e)
                  traceback.print_exc()
                  return None
+        elif self.virtualized and edge.source_id in self.spatial_grid and edge.target_id in self.spatial_grid:
+            return None # An endpoint is culled; the item is created when both come into view
         else:
-            print(f"GraphView: ERROR - Cannot add edge item {edge_key}, source or target node item not found.")
+            log.error("GraphView: ERROR - Cannot add edge item %s, source or target node item not found.", edge_key)
             return None
 
     def remove_node(self, node_id):
         """Remove a node and its connected edges visually from the graph view."""
+        if self.spatial_grid is not None and node_id in self.spatial_grid:
+            self.spatial_grid.remove(node_id); self._overview_points = None
+            if node_id not in self.node_items: return # Culled, so nothing is displayed
         node_item = self.node_items.pop(node_id, None) 
         if node_item:
             try:
                 edges_to_remove = []
-                for edge_key in list(self.edge_items.keys()): 
-                    if node_id in edge_key: 
-                        edge_item = self.edge_items.pop(edge_key, None)
-                        if edge_item: self.scene.removeItem(edge_item); edges_to_remove.append(edge_key) 
+                for edge_key in list(self.node_edge_keys.get(node_id, ())): 
+                    edge_item = self._pop_edge_item(edge_key)
+                    if edge_item: self.scene.removeItem(edge_item); edges_to_remove.append(edge_key) 
                 self.scene.removeItem(node_item)
-                print(f"GraphView: Removed node item {node_id} and {len(edges_to_remove)} edges.")
+                log.debug("GraphView: Removed node item %s and %s edges.", node_id, len(edges_to_remove))
             except Exception as e:
-                 print(f"ERROR during GraphView.remove_node for {node_id}: {e}")
+                 log.error("ERROR during GraphView.remove_node for %s: %s", node_id, e)
                  traceback.print_exc()
                  # Attempt to restore item if removal failed partially? Complex.
         else:
-             print(f"GraphView: Node item {node_id} not found for removal.")
+             log.warning("GraphView: Node item %s not found for removal.", node_id)
 
     def remove_edge(self, source_id, target_id):
         """Remove an edge visually from the graph view."""
         edge_key = (source_id, target_id)
-        edge_item = self.edge_items.pop(edge_key, None) 
+        edge_item = self._pop_edge_item(edge_key) 
         if edge_item:
             try:
                 self.scene.removeItem(edge_item)
-                print(f"GraphView: Removed edge item {edge_key}")
+                log.debug("GraphView: Removed edge item %s", edge_key)
             except Exception as e:
-                 print(f"ERROR during GraphView.remove_edge for {edge_key}: {e}")
+                 log.error("ERROR during GraphView.remove_edge for %s: %s", edge_key, e)
                  traceback.print_exc()
                  # Add item back to dict if removal failed?
                  # self.edge_items[edge_key] = edge_item 
         else:
-             print(f"GraphView: Edge item {edge_key} not found for removal.")
+             log.warning("GraphView: Edge item %s not found for removal.", edge_key)
+
+    def update_level_of_detail(self):
+        """Apply full detail or the overview style to all items when the zoom crosses DETAIL_LEVEL."""
+        detailed = self.transform().m11() >= DETAIL_LEVEL
+        if detailed == self.detailed: return
+        self.detailed = detailed
+        self.setRenderHint(QPainter.Antialiasing, detailed)
+        for item in self.node_items.values(): item.set_detailed(detailed)
+        for item in self.edge_items.values(): item.set_detailed(detailed)
+        log.info("GraphView: Switched to %s rendering.", 'full detail' if detailed else 'overview')
+
+    def set_node_cache_mode(self, cache_mode):
+        """
+        Set the QGraphicsItem cache mode of node items (and their titles), existing and new.
+        DeviceCoordinateCache (the default) blits unchanged nodes; NoCache repaints them every frame.
+        """
+        GraphNodeItem.cache_mode = cache_mode
+        for item in self.node_items.values():
+            item.setCacheMode(cache_mode); item.title_item.setCacheMode(cache_mode)
 
     def fit_in_view(self):
         """Fit all items in the view with padding."""
         try:
-            if not self.scene.items(): return 
-            rect = self.scene.itemsBoundingRect()
+            bounds = self.spatial_grid.bounds() if self.spatial_grid is not None else None
+            if bounds: # Culled nodes have no items, so use the indexed positions
+                rect = QRectF(bounds[0], bounds[1], bounds[2] - bounds[0], bounds[3] - bounds[1])
+            elif not self.scene.items(): return 
+            else: rect = self.scene.itemsBoundingRect()
             rect.adjust(-50, -50, 50, 50) # Add padding
             self.fitInView(rect, Qt.KeepAspectRatio)
-            print("GraphView: Fit content in view.")
+            self.update_level_of_detail()
+            self._schedule_visible_update()
+            log.info("GraphView: Fit content in view.")
         except Exception as e:
-             print(f"ERROR during GraphView.fit_in_view: {e}")
+             log.error("ERROR during GraphView.fit_in_view: %s", e)
              traceback.print_exc()
 
 
@@ -273,11 +627,11 @@ class GraphView(QGraphicsView):
         if not isinstance(source_item, GraphNodeItem): return
         try:
             self.is_creating_edge = True; self.edge_source_item = source_item; self.current_edge_type = edge_type
-            color = GraphEdgeItem.TYPE_COLORS.get(edge_type, GraphEdgeItem.TYPE_COLORS["default"]); style = GraphEdgeItem.TYPE_STYLES.get(edge_type, GraphEdgeItem.TYPE_STYLES["default"]); pen = QPen(color, 2, style); pen.setCapStyle(Qt.RoundCap); pen.setJoinStyle(Qt.RoundJoin)
+            pen = GraphEdgeItem.pen_for(edge_type)
             start_pos = source_item.scenePos() + source_item.boundingRect().center(); self.temp_edge = self.scene.addLine(QLineF(start_pos, start_pos), pen); self.temp_edge.setZValue(-1) # Ensure edge is below nodes
-            self.setCursor(Qt.CrossCursor); print(f"GraphView: Started edge creation from {source_item.node.id} (type: {edge_type})")
+            self.setCursor(Qt.CrossCursor); log.info("GraphView: Started edge creation from %s (type: %s)", source_item.node.id, edge_type)
         except Exception as e:
-             print(f"ERROR during GraphView.start_edge_creation: {e}")
+             log.error("ERROR during GraphView.start_edge_creation: %s", e)
              traceback.print_exc()
              self.cancel_edge_creation()
 
@@ -287,9 +641,9 @@ class GraphView(QGraphicsView):
         try:
             if self.is_creating_edge:
                 if self.temp_edge: self.scene.removeItem(self.temp_edge); self.temp_edge = None
-                self.is_creating_edge = False; self.edge_source_item = None; self.unsetCursor(); print("GraphView: Edge creation cancelled.")
+                self.is_creating_edge = False; self.edge_source_item = None; self.unsetCursor(); log.info("GraphView: Edge creation cancelled.")
         except Exception as e:
-             print(f"ERROR during GraphView.cancel_edge_creation: {e}")
+             log.error("ERROR during GraphView.cancel_edge_creation: %s", e)
              traceback.print_exc()
              # Ensure state is reset even on error
              self.is_creating_edge = False; self.edge_source_item = None; self.temp_edge = None; self.unsetCursor(); 
@@ -297,18 +651,18 @@ class GraphView(QGraphicsView):
 
     def finish_edge_creation(self, target_item):
         """Complete edge creation when a target node is clicked."""
-        if not self.is_creating_edge or not self.edge_source_item or not target_item: print("GraphView: ERROR - Cannot finish edge creation, invalid state."); self.cancel_edge_creation(); return
+        if not self.is_creating_edge or not self.edge_source_item or not target_item: log.error("GraphView: ERROR - Cannot finish edge creation, invalid state."); self.cancel_edge_creation(); return
         if not isinstance(target_item, GraphNodeItem): self.cancel_edge_creation(); return # Clicked on non-node
-        if self.edge_source_item == target_item: print("GraphView: Cannot create self-loop."); self.cancel_edge_creation(); return
+        if self.edge_source_item == target_item: log.warning("GraphView: Cannot create self-loop."); self.cancel_edge_creation(); return
         
         try:
             if self.temp_edge: self.scene.removeItem(self.temp_edge); self.temp_edge = None
             self.is_creating_edge = False; self.unsetCursor()
             
             source_id = self.edge_source_item.node.id; target_id = target_item.node.id
-            print(f"GraphView: Finishing edge creation: {source_id} -> {target_id} [{self.current_edge_type}]")
+            log.info("GraphView: Finishing edge creation: %s -> %s [%s]", source_id, target_id, self.current_edge_type)
             
-            if self.book_graph and self.book_graph.graph.has_edge(source_id, target_id): print(f"GraphView: Edge {source_id} -> {target_id} already exists."); return 
+            if self.book_graph and self.book_graph.graph.has_edge(source_id, target_id): log.info("GraphView: Edge %s -> %s already exists.", source_id, target_id); return 
                 
             edge = Edge(source_id=source_id, target_id=target_id, edge_type=self.current_edge_type)
             
@@ -321,14 +675,14 @@ class GraphView(QGraphicsView):
             # If model add fails, visual edge might appear temporarily until next refresh.
             if self.book_graph and self.book_graph.graph.has_edge(source_id, target_id):
                  self.add_edge(edge) # Add visually
-                 print(f"GraphView: Edge created signal emitted and edge added visually.")
+                 log.info("GraphView: Edge created signal emitted and edge added visually.")
             else:
                  # This might happen if the signal handler didn't add it immediately
-                 print(f"GraphView: Edge created signal emitted, but edge not found in model yet. Adding visually anyway.")
+                 log.warning("GraphView: Edge created signal emitted, but edge not found in model yet. Adding visually anyway.")
                  self.add_edge(edge) # Add visually anyway for responsiveness
 
         except Exception as e:
-             print(f"ERROR during GraphView.finish_edge_creation: {e}")
+             log.error("ERROR during GraphView.finish_edge_creation: %s", e)
              traceback.print_exc()
              self.cancel_edge_creation() # Ensure cleanup on error
 
@@ -365,14 +719,14 @@ class GraphView(QGraphicsView):
 
             menu.exec_(event.globalPos()) 
         except Exception as e:
-             print(f"ERROR during GraphView.contextMenuEvent: {e}")
+             log.error("ERROR during GraphView.contextMenuEvent: %s", e)
              traceback.print_exc()
 
 
     def delete_node(self, node):
         """Requests node deletion via parent."""
         try:
-            print(f"GraphView: Requesting deletion of node {node.id}")
+            log.info("GraphView: Requesting deletion of node %s", node.id)
             # Trigger MainWindow's deletion logic
             if hasattr(self.parent(), 'on_delete_selected_node'): 
                 self.scene.clearSelection() 
@@ -381,17 +735,17 @@ class GraphView(QGraphicsView):
                     node_item.setSelected(True)
                     self.parent().on_delete_selected_node()
         except Exception as e:
-             print(f"ERROR during GraphView.delete_node request for {getattr(node, 'id', 'N/A')}: {e}")
+             log.error("ERROR during GraphView.delete_node request for %s: %s", getattr(node, 'id', 'N/A'), e)
              traceback.print_exc()
 
 
     def delete_edge(self, edge):
         """Requests edge deletion via signal."""
         try:
-            print(f"GraphView: Requesting deletion of edge {edge.source_id} -> {edge.target_id}")
+            log.info("GraphView: Requesting deletion of edge %s -> %s", edge.source_id, edge.target_id)
             self.edge_deleted.emit(edge) # Signal MainWindow/DataManager
         except Exception as e:
-             print(f"ERROR during GraphView.delete_edge request for {getattr(edge, 'source_id', 'N/A')}->{getattr(edge, 'target_id', 'N/A')}: {e}")
+             log.error("ERROR during GraphView.delete_edge request for %s->%s: %s", getattr(edge, 'source_id', 'N/A'), getattr(edge, 'target_id', 'N/A'), e)
              traceback.print_exc()
 
 
@@ -421,6 +775,7 @@ class GraphView(QGraphicsView):
                      # Handle left-click selection (using RubberBandDrag)
                      super().mousePressEvent(event) # Let base class handle selection/drag start
                      selected_items = self.scene.selectedItems()
+                     self._drag_start_positions = {item.node.id: item.pos() for item in selected_items if isinstance(item, GraphNodeItem)}
                      if len(selected_items) == 1:
                           item = selected_items[0]
                           if isinstance(item, GraphNodeItem): self.node_selected.emit(item.node)
@@ -433,7 +788,7 @@ class GraphView(QGraphicsView):
             # Handle other buttons (Right for context menu)
             super().mousePressEvent(event) 
         except Exception as e:
-             print(f"ERROR during GraphView.mousePressEvent: {e}")
+             log.error("ERROR during GraphView.mousePressEvent: %s", e)
              traceback.print_exc()
 
     def mouseMoveEvent(self, event):
@@ -456,17 +811,11 @@ class GraphView(QGraphicsView):
                 self.temp_edge.setLine(QLineF(start_pos, end_pos)) 
                 event.accept(); return
                 
-            # Let base class handle other movements (drag selection box or item drag)
+            # Let base class handle other movements (drag selection box or item drag).
+            # Dragged nodes queue their edges via itemChange; they are re-pathed once per frame.
             super().mouseMoveEvent(event)
-            
-            # Update connected edges if an item is being dragged by the base class
-            if event.buttons() & Qt.LeftButton and self.dragMode() == QGraphicsView.RubberBandDrag:
-                selected_nodes = [item for item in self.scene.selectedItems() if isinstance(item, GraphNodeItem)]
-                if selected_nodes:
-                     for node_item in selected_nodes:
-                          self.update_connected_edges(node_item)
         except Exception as e:
-             print(f"ERROR during GraphView.mouseMoveEvent: {e}")
+             log.error("ERROR during GraphView.mouseMoveEvent: %s", e)
              traceback.print_exc()
 
 
@@ -484,15 +833,14 @@ class GraphView(QGraphicsView):
             # Let base class handle release first
             super().mouseReleaseEvent(event)
 
-            # Emit node_moved signal after left button release if nodes were moved
+            # Emit one nodes_moved signal after left button release for the nodes that moved
             if event.button() == Qt.LeftButton and not self.is_creating_edge: 
-                 moved_items = [item for item in self.scene.selectedItems() if isinstance(item, GraphNodeItem)]
-                 # Check if node position actually changed (more complex)
-                 # Simplified: Emit for any selected node after left-release
+                 start_positions, self._drag_start_positions = self._drag_start_positions, {}
+                 moved_items = [item for item in self.scene.selectedItems() if isinstance(item, GraphNodeItem)
+                                and item.node.id in start_positions and start_positions[item.node.id] != item.pos()]
                  if moved_items:
-                      for item in moved_items:
-                           self.update_connected_edges(item) # Ensure edges are updated
-                           self.node_moved.emit(item.node) # Emit signal
+                      self.flush_dirty_edges() # Ensure edges match the final positions
+                      self.nodes_moved.emit([item.node for item in moved_items])
                       if not event.isAccepted(): event.accept() # Accept if we handled it
                       return # Return after handling node move emission
 
@@ -500,7 +848,7 @@ class GraphView(QGraphicsView):
             if not event.isAccepted():
                  event.accept()
         except Exception as e:
-             print(f"ERROR during GraphView.mouseReleaseEvent: {e}")
+             log.error("ERROR during GraphView.mouseReleaseEvent: %s", e)
              traceback.print_exc()
 
 
@@ -513,10 +861,12 @@ class GraphView(QGraphicsView):
             
             # Anchor is set to AnchorUnderMouse in __init__
             self.scale(zoom_factor, zoom_factor)
+            self.update_level_of_detail()
+            self._schedule_visible_update()
             
             event.accept() # We handled the zoom
         except Exception as e:
-             print(f"ERROR during GraphView.wheelEvent: {e}")
+             log.error("ERROR during GraphView.wheelEvent: %s", e)
              traceback.print_exc()
 
 
@@ -528,6 +878,6 @@ class GraphView(QGraphicsView):
                 
             super().keyPressEvent(event) # Pass other keys to base class
         except Exception as e:
-             print(f"ERROR during GraphView.keyPressEvent: {e}")
+             log.error("ERROR during GraphView.keyPressEvent: %s", e)
              traceback.print_exc()
 
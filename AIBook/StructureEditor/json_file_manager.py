@@ -0,0 +1,550 @@
+"""
+JsonFileManager class for the Interactive Book Editor.
+Reads and writes project JSON files, skipping writes whose bytes are unchanged.
+REVISED: Writes are atomic (temp file + fsync + rename). Multi-file saves can be
+         grouped in a transaction that is journaled, so after a crash the next
+         open either completes the whole save or discards it.
+ADDED: remove() deletes a file, deferred until commit inside a transaction.
+REVISED: A transaction can be aborted when one of its writes fails, so none of its files
+         land. Deletions are journaled with the staged files and completed by recovery.
+REVISED: Each transaction writes its own commit record, and commits are serialized, so a
+         background auto-save and a GUI-thread save can commit at the same time.
+ADDED: after_commit() defers in-memory state that must match the files on disk until the
+       transaction commits, so an aborted save leaves it untouched.
+REVISED: Recovery only discards journal files no open transaction in this process still needs,
+         so opening a project never drops another session's save in progress.
+"""
+
+import os
+import json
+import uuid
+import shutil
+import hashlib
+import weakref
+import threading
+import traceback # For detailed error logging
+from contextlib import contextmanager
+from editor_log import get_logger
+
+log = get_logger(__name__)
+
+JOURNAL_DIR_NAME = ".save-journal" # Created inside the project root
+COMMIT_RECORD_PREFIX = "commit-" # Each transaction's record is commit-<id>.json
+COMMIT_RECORD_SUFFIX = ".json"
+TEMP_FILE_SUFFIX = ".tmp"
+
+_open_transactions = weakref.WeakSet() # Every SaveTransaction in the process, whichever JsonFileManager owns it
+_open_transactions_lock = threading.Lock()
+
+def _journal_files_in_use(staging_dir):
+    """Get the journal files that open transactions staging into a directory still need."""
+    with _open_transactions_lock: transactions = list(_open_transactions)
+    in_use = set()
+    for transaction in transactions:
+        if transaction.staging_dir == staging_dir: in_use |= transaction.files_in_use()
+    return in_use
+
+def _fsync_directory(directory):
+    """Flush a directory entry (renames) to disk. Not supported on Windows, where it is skipped."""
+    if os.name == 'nt': return
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def _write_synced(path, payload):
+    """Write bytes to a new file and fsync it. Returns the file's stat result."""
+    with open(path, 'wb') as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+        return os.fstat(f.fileno())
+
+
+class SaveTransaction:
+    """
+    Files staged by one logical save.
+
+    Each write is first fully written and fsynced to a temp file. Nothing
+    replaces a real file until the whole transaction commits.
+    """
+
+    def __init__(self, staging_dir=None):
+        """
+        Initialize a new SaveTransaction.
+
+        Args:
+            staging_dir (str, optional): Journal directory for temp files. If None,
+                temp files are placed next to their targets and no journal is kept.
+        """
+        self.staging_dir = staging_dir
+        self.staged = [] # (temp_path, target_path, digest) in write order
+        self.latest = {} # absolute target path -> (temp_path, digest) of its most recent staged write
+        self.removals = [] # Absolute paths deleted after the staged files are committed
+        self.aborted = None # Reason given to abort(); an aborted transaction is discarded instead of committed
+        self.on_commit = [] # Callbacks run after the transaction commits, dropped if it is discarded
+        self.in_use = set() # Temp files and commit record not yet moved or deleted, kept safe from recover()
+        self._lock = threading.Lock() # Writes may be staged from worker threads
+        with _open_transactions_lock: _open_transactions.add(self)
+
+    def stage(self, target_path, payload, digest):
+        """Write payload to a temp file that will replace target_path on commit."""
+        target_path = os.path.abspath(target_path)
+        directory = self.staging_dir or os.path.dirname(target_path)
+        temp_path = os.path.join(directory, f".{os.path.basename(target_path)}.{uuid.uuid4().hex}{TEMP_FILE_SUFFIX}")
+        with self._lock: self.in_use.add(temp_path) # Before the file exists, so recovery never sees it unclaimed
+        _write_synced(temp_path, payload)
+        with self._lock:
+            self.staged.append((temp_path, target_path, digest))
+            self.latest[target_path] = (temp_path, digest)
+
+    def abort(self, reason):
+        """Mark the transaction as failed: when its block ends, every staged write is discarded."""
+        with self._lock:
+            if not self.aborted: self.aborted = reason
+
+    def get_staged(self, target_path):
+        """Get (temp_path, digest) of the latest staged write for a target, or None."""
+        with self._lock:
+            return self.latest.get(os.path.abspath(target_path))
+
+    def files_in_use(self):
+        """Get the journal files this transaction still needs."""
+        with self._lock:
+            return set(self.in_use)
+
+    def discard(self):
+        """Delete all staged temp files (rollback)."""
+        for temp_path, _, _ in self.staged:
+            try: os.remove(temp_path)
+            except OSError: pass
+        self.staged = []
+        self.latest = {}
+        self.removals = []
+        self.on_commit = []
+        with self._lock: self.in_use.clear()
+
+
+class JsonFileManager:
+    """
+    Handles reading and writing the project's JSON files.
+
+    Responsible for:
+    - Serializing JSON the same way everywhere (indent=2, UTF-8, non-ASCII kept)
+    - Remembering a digest of the last bytes read or written for each path
+    - Skipping the write (and fsync) when the new bytes match the file on disk,
+      so unchanged files keep their mtime and do not show up as modified
+    - Replacing files atomically, and journaling multi-file transactions so a
+      crash never leaves a project half-saved
+    """
+
+    def __init__(self, project_root=None):
+        """
+        Initialize a new JsonFileManager instance.
+
+        Args:
+            project_root (str, optional): Project root; its journal directory is used for transactions.
+        """
+        self._digests = {} # absolute path -> (digest, size, mtime_ns) of the bytes last seen
+        self._lock = threading.Lock()
+        self._commit_lock = threading.RLock() # Commits (and recovery) apply one transaction at a time
+        self._local = threading.local() # Active transaction for the current thread
+        self.journal_dir = None
+        self.writes_done = 0
+        self.writes_skipped = 0
+        if project_root: self.set_project_root(project_root)
+
+    def set_project_root(self, root_path):
+        """
+        Point the journal at a project and recover any save interrupted by a crash.
+
+        Args:
+            root_path (str): Path to the project root, or None.
+
+        Returns:
+            tuple: (files rolled forward, temp files discarded) by recovery.
+        """
+        self.journal_dir = os.path.join(os.path.abspath(root_path), JOURNAL_DIR_NAME) if root_path else None
+        self.forget()
+        return self.recover()
+
+    @staticmethod
+    def serialize(data, indent=2):
+        """
+        Serialize data to the bytes stored on disk.
+
+        Args:
+            data: JSON-serializable data.
+            indent (int, optional): Indentation, or None for compact single-line JSON.
+
+        Returns:
+            bytes: UTF-8 encoded JSON.
+        """
+        separators = (',', ':') if indent is None else None
+        return json.dumps(data, indent=indent, separators=separators, ensure_ascii=False).encode('utf-8')
+
+    @staticmethod
+    def _digest(payload):
+        """Hash a byte string."""
+        return hashlib.blake2b(payload, digest_size=16).digest()
+
+    def exists(self, path):
+        """Check whether a file exists, counting files staged by the current transaction."""
+        transaction = self.current_transaction()
+        return bool(transaction and transaction.get_staged(path)) or os.path.exists(path)
+
+    def read_json(self, path):
+        """
+        Load a JSON file and remember the digest of its bytes.
+        Inside a transaction, a file staged earlier is read back from its staged copy.
+
+        Args:
+            path (str): Absolute path to the file.
+
+        Returns:
+            The parsed JSON data.
+        """
+        return json.loads(self._read_payload(path).decode('utf-8'))
+
+    def iter_json_items(self, path):
+        """
+        Parse a file holding a JSON object one top-level key at a time.
+        Each section is decoded only when the caller asks for it, so a loader can
+        build from the sections already read while the rest is still unparsed.
+
+        Args:
+            path (str): Absolute path to the file.
+
+        Yields:
+            tuple: (key, value) pairs in file order.
+        """
+        text = self._read_payload(path).decode('utf-8')
+        decoder = json.JSONDecoder()
+        skip = lambda index: json.decoder.WHITESPACE.match(text, index).end()
+        index = skip(0)
+        if text[index:index + 1] != '{': raise ValueError(f"Expected a JSON object in {path}")
+        index = skip(index + 1)
+        if text[index:index + 1] == '}': return
+        while True:
+            key, index = decoder.raw_decode(text, index)
+            if not isinstance(key, str): raise ValueError(f"Expected a string key at offset {index} in {path}")
+            index = skip(index)
+            if text[index:index + 1] != ':': raise ValueError(f"Expected ':' at offset {index} in {path}")
+            value, index = decoder.raw_decode(text, skip(index + 1))
+            yield key, value
+            index = skip(index)
+            if text[index:index + 1] == ',': index = skip(index + 1); continue
+            if text[index:index + 1] == '}': return
+            raise ValueError(f"Expected ',' or '}}' at offset {index} in {path}")
+
+    def _read_payload(self, path):
+        """Read a file's bytes (or its staged copy inside a transaction) and remember their digest."""
+        transaction = self.current_transaction()
+        staged = transaction.get_staged(path) if transaction else None
+        if staged:
+            with open(staged[0], 'rb') as f: return f.read()
+        with open(path, 'rb') as f:
+            payload = f.read()
+            stat = os.fstat(f.fileno())
+        self._remember(path, self._digest(payload), stat)
+        return payload
+
+    def write_json(self, path, data, indent=2):
+        """
+        Write data as JSON unless the file already holds exactly these bytes.
+
+        Args:
+            path (str): Absolute path to the file.
+            data: JSON-serializable data.
+            indent (int, optional): Indentation, or None for compact single-line JSON.
+
+        Returns:
+            bool: True if the file was written (or staged), False if the write was skipped.
+        """
+        return self.write_bytes(path, self.serialize(data, indent))
+
+    def write_bytes(self, path, payload):
+        """
+        Write raw bytes unless the file already holds exactly these bytes.
+        Inside a transaction the write is staged and applied on commit;
+        otherwise the file is replaced atomically right away.
+
+        Args:
+            path (str): Absolute path to the file.
+            payload (bytes): The new file contents.
+
+        Returns:
+            bool: True if the file was written (or staged), False if the write was skipped.
+        """
+        digest = self._digest(payload)
+        transaction = self.current_transaction()
+        staged = transaction.get_staged(path) if transaction else None
+        if (staged[1] == digest) if staged else self.is_unchanged(path, digest, len(payload)):
+            with self._lock: self.writes_skipped += 1
+            return False
+        if transaction:
+            transaction.stage(path, payload, digest)
+        else:
+            temp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.{uuid.uuid4().hex}.tmp")
+            try:
+                _write_synced(temp_path, payload)
+                os.replace(temp_path, path)
+            except BaseException:
+                if os.path.exists(temp_path): os.remove(temp_path)
+                raise
+            _fsync_directory(os.path.dirname(path))
+            self._remember(path, digest, os.stat(path))
+        with self._lock: self.writes_done += 1
+        return True
+
+    def remove(self, path):
+        """
+        Delete a file. Inside a transaction the file is deleted only after the
+        transaction commits, so it stays in place if the save is rolled back.
+        Deletions are journaled with the staged files, so recovery completes them too.
+
+        Returns:
+            bool: True if the file was deleted (or scheduled), False if it does not exist.
+        """
+        transaction = self.current_transaction()
+        if transaction:
+            if not os.path.exists(path): return False
+            with transaction._lock: transaction.removals.append(os.path.abspath(path))
+            return True
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return False
+        self.forget(path)
+        return True
+
+    def is_unchanged(self, path, digest, size):
+        """
+        Check whether the file at path already holds bytes with the given digest.
+        The cached digest is trusted only while the file's size and mtime match
+        what was last seen; otherwise the file on disk is hashed again.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        if stat.st_size != size: return False
+        with self._lock:
+            cached = self._digests.get(os.path.abspath(path))
+        if cached and cached[1] == stat.st_size and cached[2] == stat.st_mtime_ns:
+            return cached[0] == digest
+        # Unknown or modified outside the editor: compare with the bytes on disk
+        try:
+            with open(path, 'rb') as f: on_disk = f.read()
+        except OSError:
+            return False
+        on_disk_digest = self._digest(on_disk)
+        self._remember(path, on_disk_digest, stat)
+        return on_disk_digest == digest
+
+    def forget(self, path=None):
+        """Drop the cached digest for a path, or for all paths if none is given."""
+        with self._lock:
+            if path is None: self._digests.clear()
+            else: self._digests.pop(os.path.abspath(path), None)
+
+    def _remember(self, path, digest, stat):
+        """Cache the digest of the bytes currently in a file."""
+        with self._lock:
+            self._digests[os.path.abspath(path)] = (digest, stat.st_size, stat.st_mtime_ns)
+
+    # --- Transactions ---
+
+    def current_transaction(self):
+        """Get the transaction active on the calling thread, or None."""
+        return getattr(self._local, 'transaction', None)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Group writes so they are committed together, or not at all.
+
+        Usage:
+            with json_file_manager.transaction():
+                json_file_manager.write_json(path_a, data_a)
+                json_file_manager.write_json(path_b, data_b)
+
+        Nested transactions join the outer one. If the block raises, or a write
+        failed and the transaction was aborted (transaction.abort()), every staged
+        write is discarded and no target file is touched.
+        """
+        outer = self.current_transaction()
+        if outer:
+            yield outer
+            return
+        staging_dir = self.journal_dir if self._ensure_journal_dir() else None
+        transaction = SaveTransaction(staging_dir)
+        self._local.transaction = transaction
+        try:
+            yield transaction
+        except BaseException:
+            self._local.transaction = None
+            transaction.discard()
+            raise
+        self._local.transaction = None
+        if transaction.aborted:
+            log.warning("JsonFileManager: Save aborted (%s); discarding %s staged files.", transaction.aborted, len(transaction.staged))
+            transaction.discard()
+            return
+        self._commit(transaction)
+        for callback in transaction.on_commit: callback()
+
+    def after_commit(self, callback):
+        """
+        Run callback once the current transaction commits, or right away outside a transaction.
+        Callbacks of an aborted or rolled-back transaction never run, so in-memory state
+        updated this way always matches what is on disk.
+        """
+        transaction = self.current_transaction()
+        if not transaction: callback(); return
+        with transaction._lock: transaction.on_commit.append(callback)
+
+    @contextmanager
+    def join_transaction(self, transaction):
+        """Make another thread's transaction active on the calling thread (e.g. in a worker pool)."""
+        previous = self.current_transaction()
+        self._local.transaction = transaction
+        try:
+            yield transaction
+        finally:
+            self._local.transaction = previous
+
+    def _ensure_journal_dir(self):
+        """Create the journal directory if a project is set. Returns True if it can be used."""
+        if not self.journal_dir: return False
+        try:
+            os.makedirs(self.journal_dir, exist_ok=True)
+            return True
+        except OSError as e:
+            log.warning("JsonFileManager: WARNING - Cannot create journal directory %s: %s", self.journal_dir, e)
+            return False
+
+    @staticmethod
+    def _is_commit_record(name):
+        """Check whether a journal file name is a commit record."""
+        return name.startswith(COMMIT_RECORD_PREFIX) and name.endswith(COMMIT_RECORD_SUFFIX)
+
+    def _commit(self, transaction):
+        """Journal the staged files and deletions, apply them and clear the transaction's record."""
+        if not transaction.staged and not transaction.removals: return
+        with self._commit_lock: # Concurrent commits (e.g. auto-save worker and GUI thread) apply one at a time
+            # A target written several times only needs its latest version
+            superseded = [entry for entry in transaction.staged if transaction.latest[entry[1]][0] != entry[0]]
+            for temp_path, _, _ in superseded:
+                try: os.remove(temp_path)
+                except OSError: pass
+            transaction.staged = [entry for entry in transaction.staged if transaction.latest[entry[1]][0] == entry[0]]
+            record_path = None
+            if transaction.staging_dir:
+                # The commit record makes the transaction durable: from here on, recovery rolls it forward
+                project_root = os.path.dirname(transaction.staging_dir)
+                record = {"files": [[os.path.relpath(temp_path, project_root), os.path.relpath(target_path, project_root)]
+                                    for temp_path, target_path, _ in transaction.staged],
+                          "removals": [os.path.relpath(path, project_root) for path in transaction.removals]}
+                record_path = os.path.join(transaction.staging_dir, f"{COMMIT_RECORD_PREFIX}{uuid.uuid4().hex}{COMMIT_RECORD_SUFFIX}")
+                record_temp_path = record_path + TEMP_FILE_SUFFIX
+                with transaction._lock: transaction.in_use.update((record_path, record_temp_path))
+                _write_synced(record_temp_path, self.serialize(record))
+                os.replace(record_temp_path, record_path)
+                _fsync_directory(transaction.staging_dir)
+            directories = set()
+            for temp_path, target_path, digest in transaction.staged:
+                self._move_into_place(temp_path, target_path)
+                self._remember(target_path, digest, os.stat(target_path))
+                directories.add(os.path.dirname(target_path))
+            for path in transaction.removals:
+                try: os.remove(path)
+                except FileNotFoundError: pass
+                self.forget(path)
+                directories.add(os.path.dirname(path))
+            for directory in directories: _fsync_directory(directory)
+            if record_path:
+                try: os.remove(record_path)
+                except FileNotFoundError: pass # Already completed by recover()
+                _fsync_directory(transaction.staging_dir)
+            transaction.staged = []
+            transaction.latest = {}
+            transaction.removals = []
+            with transaction._lock: transaction.in_use.clear()
+
+    @staticmethod
+    def _move_into_place(temp_path, target_path):
+        """Rename a staged file over its target, copying first if they are on different filesystems."""
+        try:
+            os.replace(temp_path, target_path)
+        except OSError:
+            if not os.path.exists(temp_path): raise
+            local_temp_path = os.path.join(os.path.dirname(target_path), os.path.basename(temp_path))
+            shutil.copyfile(temp_path, local_temp_path)
+            with open(local_temp_path, 'rb') as f: os.fsync(f.fileno())
+            os.replace(local_temp_path, target_path)
+            os.remove(temp_path)
+
+    def recover(self):
+        """
+        Finish or undo saves interrupted by a crash.
+        Every committed transaction is rolled forward in commit order, including its
+        deletions; staged files of uncommitted ones are discarded, leaving the previous
+        files untouched. Files of transactions still open in this process (another
+        session's save in progress) are left alone, as is anything recovery did not stage.
+
+        Returns:
+            tuple: (files rolled forward or deleted, temp files discarded).
+        """
+        if not self.journal_dir or not os.path.isdir(self.journal_dir): return 0, 0
+        with self._commit_lock: # Never roll forward a record while this manager is still applying it
+            rolled_forward = 0
+            discarded = 0
+            project_root = os.path.dirname(self.journal_dir)
+            in_use = _journal_files_in_use(self.journal_dir)
+            record_paths = [os.path.join(self.journal_dir, name) for name in os.listdir(self.journal_dir) if self._is_commit_record(name)]
+            record_paths = [path for path in record_paths if path not in in_use] # Being committed right now
+            record_paths.sort(key=lambda path: os.stat(path).st_mtime_ns) # Later commits win where they touch the same file
+            for record_path in record_paths:
+                try:
+                    with open(record_path, 'rb') as f: record = json.loads(f.read().decode('utf-8'))
+                except Exception as e:
+                    # The record is written atomically, so an unreadable one means the transaction never committed
+                    log.warning("JsonFileManager: WARNING - Discarding unreadable save journal %s: %s", record_path, e)
+                    continue
+                try:
+                    for temp_rel, target_rel in record.get("files", []):
+                        temp_path = os.path.join(project_root, temp_rel)
+                        if os.path.exists(temp_path): # Already-moved files were committed before the crash
+                            self._move_into_place(temp_path, os.path.join(project_root, target_rel))
+                            rolled_forward += 1
+                    for removal_rel in record.get("removals", []):
+                        try:
+                            os.remove(os.path.join(project_root, removal_rel))
+                            rolled_forward += 1
+                        except FileNotFoundError: pass # Deleted before the crash
+                except Exception as e:
+                    # Keep the journal so the next open can try again
+                    log.error("ERROR completing interrupted save from %s: %s", record_path, e)
+                    traceback.print_exc()
+                    return rolled_forward, 0
+            names = os.listdir(self.journal_dir)
+            in_use |= _journal_files_in_use(self.journal_dir) # Also files staged since the first check
+            for name in names:
+                path = os.path.join(self.journal_dir, name)
+                if path in in_use: continue
+                if not (name.endswith(TEMP_FILE_SUFFIX) or path in record_paths): continue
+                try:
+                    os.remove(path)
+                    discarded += 1
+                except OSError: pass
+            _fsync_directory(self.journal_dir)
+            if rolled_forward or discarded:
+                log.info("JsonFileManager: Recovered interrupted save - completed %s files, discarded %s staged files.", rolled_forward, discarded)
+            return rolled_forward, discarded
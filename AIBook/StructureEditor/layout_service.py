@@ -0,0 +1,329 @@
+"""
+LayoutService class for the Interactive Book Editor.
+Computes node positions on a background thread and streams them to the GUI in batches.
+Uses a chapter-aware layered layout along the critical path for unplaced books, and
+incremental placement next to existing neighbours for nodes added to a laid-out book.
+A force-directed refinement (force_layout.py, needs NumPy) can be requested instead.
+Nodes the user has positioned are never moved.
+"""
+
+import threading
+import time
+import traceback # For detailed error logging
+from collections import deque
+from PyQt5.QtCore import QObject, pyqtSignal
+from spatial_grid import SpatialGrid
+from force_layout import force_directed_layout, FORCE_LAYOUT_AVAILABLE
+from editor_log import get_logger
+
+log = get_logger(__name__)
+
+UNPLACED_POSITIONS = {(0.0, 0.0), (10.0, 10.0)} # Where nodes land before they are laid out (loader and GraphView defaults)
+COLUMN_SPACING = 160.0 # Horizontal distance between critical path steps
+ROW_SPACING = 90.0 # Vertical distance between nodes sharing a step
+BAND_GAP = 120.0 # Extra space between chapter bands
+ORIGIN = (100.0, 250.0) # Top left of the layered layout, below the default book node position
+MIN_DISTANCE = 60.0 # Incremental placement keeps at least this far from other nodes
+LAYERED = "layered" # Layout methods accepted by LayoutService.layout_graph
+FORCE_DIRECTED = "force-directed"
+
+def as_position(value):
+    """Get a position as a tuple of floats, or None if it is malformed."""
+    if isinstance(value, (list, tuple)) and len(value) == 2:
+        try: return (float(value[0]), float(value[1]))
+        except (ValueError, TypeError): pass
+    return None
+
+def is_unplaced(position):
+    """Check whether a position is one of the defaults given to nodes that were never laid out."""
+    position = as_position(position)
+    return position is None or position in UNPLACED_POSITIONS
+
+def snapshot_graph(book_graph):
+    """
+    Copy what the layout needs from a BookGraph, so the layout can run without touching it.
+
+    Returns:
+        tuple: ({node_id: (chapter, position)}, [(source_id, target_id, edge_type)], [chapter_id]) in graph order.
+    """
+    nodes = {view.id: (view.chapter, as_position(view.position)) for view in book_graph.iter_node_views()}
+    edges = [(source_id, target_id, data.get('edge_type')) for source_id, target_id, data in book_graph.graph.edges(data=True)]
+    return nodes, edges, list(book_graph.get_chapters())
+
+def critical_path_ranks(node_ids, edges):
+    """
+    Get the step of every node on a critical-path edge: the length of the longest
+    critical path leading to it. Nodes on a cycle are ranked after their ranked predecessors.
+    """
+    successors, predecessors = {}, {}
+    for source_id, target_id, edge_type in edges:
+        if edge_type != "critical-path" or source_id == target_id: continue
+        successors.setdefault(source_id, []).append(target_id)
+        predecessors.setdefault(target_id, []).append(source_id)
+    on_path = [node_id for node_id in node_ids if node_id in successors or node_id in predecessors]
+    waiting = {node_id: len(predecessors.get(node_id, ())) for node_id in on_path}
+    ranks = {}
+    queue = deque(node_id for node_id in on_path if not waiting[node_id])
+    for node_id in on_path:
+        if not queue:
+            if node_id in ranks: continue
+            queue.append(node_id) # Only cycles are left: break one open here
+        while queue:
+            current = queue.popleft()
+            if current in ranks: continue
+            ranks[current] = max((ranks[pred] + 1 for pred in predecessors.get(current, ()) if pred in ranks), default=0)
+            for succ in successors.get(current, ()):
+                waiting[succ] -= 1
+                if waiting[succ] <= 0 and succ not in ranks: queue.append(succ)
+    return ranks
+
+def layered_layout(nodes, edges, chapters, node_ids=None):
+    """
+    Lay nodes out in horizontal bands, one per chapter in chapter order, with the
+    critical path running left to right and starting again at the left in each band. Nodes off the critical path (character POVs,
+    related non-fiction, ...) share the step of the node they are connected to and
+    stack below it; unconnected nodes follow at the end of their chapter's band.
+
+    Args:
+        nodes (dict): node_id -> (chapter, position), as from snapshot_graph.
+        edges (list): (source_id, target_id, edge_type) tuples.
+        chapters (list): Chapter IDs in display order.
+        node_ids (iterable, optional): Nodes to lay out; defaults to all.
+
+    Returns:
+        dict: node_id -> (x, y), ordered band by band so it can be streamed.
+    """
+    node_ids = list(nodes) if node_ids is None else [node_id for node_id in node_ids if node_id in nodes]
+    wanted = set(node_ids)
+    ranks = critical_path_ranks(node_ids, [edge for edge in edges if edge[0] in wanted and edge[1] in wanted])
+
+    # Nodes off the path take the step of the nearest ranked neighbour (breadth first)
+    neighbours = {}
+    for source_id, target_id, _ in edges:
+        if source_id in wanted and target_id in wanted and source_id != target_id:
+            neighbours.setdefault(source_id, []).append(target_id)
+            neighbours.setdefault(target_id, []).append(source_id)
+    queue = deque(node_id for node_id in node_ids if node_id in ranks)
+    while queue:
+        current = queue.popleft()
+        for other in neighbours.get(current, ()):
+            if other not in ranks: ranks[other] = ranks[current]; queue.append(other)
+
+    band_of = {chapter_id: index for index, chapter_id in enumerate(chapters)}
+    last_step = {} # band -> highest step used
+    for node_id in node_ids:
+        if node_id in ranks:
+            band = band_of.get(nodes[node_id][0], len(chapters))
+            last_step[band] = max(last_step.get(band, -1), ranks[node_id])
+    # Components without a critical path get the next free steps of their band
+    for node_id in node_ids:
+        if node_id in ranks: continue
+        band = band_of.get(nodes[node_id][0], len(chapters))
+        step = last_step[band] = last_step.get(band, -1) + 1
+        ranks[node_id] = step; queue.append(node_id)
+        while queue:
+            current = queue.popleft()
+            for other in neighbours.get(current, ()):
+                if other not in ranks: ranks[other] = step; queue.append(other)
+
+    # Stack nodes sharing a band and step, then size the bands
+    first_step, slots, stacks = {}, {}, {}
+    for node_id in node_ids:
+        band = band_of.get(nodes[node_id][0], len(chapters))
+        first_step[band] = min(first_step.get(band, ranks[node_id]), ranks[node_id])
+    for node_id in node_ids:
+        key = (band_of.get(nodes[node_id][0], len(chapters)), ranks[node_id])
+        slots[node_id] = stacks.get(key, 0)
+        stacks[key] = slots[node_id] + 1
+    band_heights = {}
+    for (band, _), height in stacks.items(): band_heights[band] = max(band_heights.get(band, 0), height)
+    band_tops, top = {}, ORIGIN[1]
+    for band in sorted(band_heights):
+        band_tops[band] = top
+        top += band_heights[band] * ROW_SPACING + BAND_GAP
+
+    ordered = sorted(node_ids, key=lambda node_id: (band_of.get(nodes[node_id][0], len(chapters)), ranks[node_id], slots[node_id]))
+    positions = {}
+    for node_id in ordered:
+        band = band_of.get(nodes[node_id][0], len(chapters))
+        positions[node_id] = (ORIGIN[0] + (ranks[node_id] - first_step[band]) * COLUMN_SPACING, band_tops[band] + slots[node_id] * ROW_SPACING)
+    return positions
+
+def incremental_layout(nodes, edges, node_ids, fixed_positions):
+    """
+    Place nodes one at a time next to neighbours that already have a position:
+    after a critical-path predecessor, before a critical-path successor, below other
+    neighbours, or at the end of the node's chapter. Nodes are shifted down until they
+    keep MIN_DISTANCE from everything placed so far.
+
+    Args:
+        nodes (dict): node_id -> (chapter, position), as from snapshot_graph.
+        edges (list): (source_id, target_id, edge_type) tuples.
+        node_ids (iterable): Nodes to place, in order of preference.
+        fixed_positions (dict): node_id -> (x, y) of nodes that stay where they are.
+
+    Returns:
+        dict: node_id -> (x, y) for the placed nodes, in placement order.
+    """
+    placed = dict(fixed_positions)
+    grid = SpatialGrid()
+    for node_id, (x, y) in placed.items(): grid.insert(node_id, x, y)
+    chapter_ends = {} # chapter -> rightmost placed position
+    for node_id, position in placed.items():
+        chapter = nodes[node_id][0] if node_id in nodes else None
+        if chapter is not None and position[0] >= chapter_ends.get(chapter, (float('-inf'), 0))[0]: chapter_ends[chapter] = position
+    incident = {}
+    for edge in edges:
+        if edge[0] == edge[1]: continue
+        incident.setdefault(edge[0], []).append(edge); incident.setdefault(edge[1], []).append(edge)
+
+    def candidate(node_id):
+        predecessors, successors, others = [], [], []
+        for source_id, target_id, edge_type in incident.get(node_id, ()):
+            other = target_id if source_id == node_id else source_id
+            if other not in placed: continue
+            if edge_type == "critical-path": (predecessors if target_id == node_id else successors).append(placed[other])
+            else: others.append(placed[other])
+        if predecessors: return (predecessors[0][0] + COLUMN_SPACING, predecessors[0][1])
+        if successors: return (successors[0][0] - COLUMN_SPACING, successors[0][1])
+        if others: return (sum(x for x, _ in others) / len(others), sum(y for _, y in others) / len(others) + ROW_SPACING)
+        return None
+
+    pending = deque(node_id for node_id in node_ids if node_id in nodes)
+    stalled = 0 # Nodes re-queued in a row because no neighbour is placed yet
+    placed_now = {}
+    while pending:
+        node_id = pending.popleft()
+        position = candidate(node_id)
+        if position is None and stalled < len(pending) + 1:
+            pending.append(node_id); stalled += 1; continue # Wait for a neighbour to be placed
+        stalled = 0
+        chapter = nodes[node_id][0]
+        if position is None and chapter in chapter_ends: position = (chapter_ends[chapter][0] + COLUMN_SPACING, chapter_ends[chapter][1])
+        if position is None:
+            bounds = grid.bounds()
+            position = (bounds[2] + COLUMN_SPACING, bounds[1]) if bounds else ORIGIN
+        x, y = position
+        while grid.query(x - MIN_DISTANCE, y - MIN_DISTANCE, x + MIN_DISTANCE, y + MIN_DISTANCE): y += ROW_SPACING
+        placed[node_id] = placed_now[node_id] = (x, y)
+        grid.insert(node_id, x, y)
+        if chapter is not None and x >= chapter_ends.get(chapter, (float('-inf'), 0))[0]: chapter_ends[chapter] = (x, y)
+    return placed_now
+
+
+class LayoutService(QObject):
+    """
+    Runs node layout off the GUI thread.
+
+    Responsible for:
+    - Tracking pinned nodes (positioned by the user), which are never moved
+    - Laying out a whole book on a worker thread and streaming the positions in batches
+    - Placing single new nodes (e.g. imported ones) immediately
+    """
+
+    positions_ready = pyqtSignal(dict) # node_id -> (x, y); one batch of a running layout
+    layout_finished = pyqtSignal(int) # Number of nodes positioned
+    _batch_ready = pyqtSignal(int, dict) # Worker -> GUI thread: (generation, batch)
+    _worker_done = pyqtSignal(int, int) # Worker -> GUI thread: (generation, count)
+
+    BATCH_SIZE = 200 # Positions per streamed batch
+    FULL_LAYOUT_RATIO = 0.5 # Use the layered layout when fewer than this share of the nodes stay fixed
+
+    def __init__(self, parent=None):
+        """Initialize a new LayoutService instance."""
+        super().__init__(parent)
+        self.pinned = set()
+        self._generation = 0 # Bumped to cancel a running layout
+        self._worker = None
+        self._batch_ready.connect(self._on_batch_ready)
+        self._worker_done.connect(self._on_worker_done)
+
+    def pin(self, node_id): self.pinned.add(node_id)
+    def unpin(self, node_id): self.pinned.discard(node_id)
+    def on_nodes_moved(self, nodes): self.pinned.update(node.id for node in nodes) # Slot for GraphView.nodes_moved
+    def is_running(self): return self._worker is not None and self._worker.is_alive()
+
+    def cancel(self):
+        """Stop a running layout; batches it has not delivered yet are dropped."""
+        self._generation += 1
+
+    def layout_graph(self, book_graph, relayout=False, method=LAYERED):
+        """
+        Lay out a book on a worker thread. Positions arrive through positions_ready.
+
+        Args:
+            book_graph (BookGraph): The book to lay out. Read here, on the calling thread.
+            relayout (bool, optional): Move every node that is not pinned. By default only
+                nodes still at an unplaced default position are moved.
+            method (str, optional): LAYERED, or FORCE_DIRECTED to refine the result with a
+                force-directed simulation (falls back to LAYERED without NumPy).
+
+        Returns:
+            int: Number of nodes that will be positioned.
+        """
+        self.cancel()
+        nodes, edges, chapters = snapshot_graph(book_graph)
+        fixed = {node_id: position for node_id, (_, position) in nodes.items() if position is not None
+                 and (node_id in self.pinned or (not relayout and not is_unplaced(position)))}
+        movable = [node_id for node_id in nodes if node_id not in fixed]
+        if not movable: return 0
+        if method == FORCE_DIRECTED and not FORCE_LAYOUT_AVAILABLE:
+            log.info("LayoutService: NumPy is not installed, using the layered layout instead.")
+            method = LAYERED
+        generation = self._generation
+        log.info("LayoutService: Laying out %s of %s nodes in the background...", len(movable), len(nodes))
+        self._worker = threading.Thread(target=self._run, args=(generation, nodes, edges, chapters, movable, fixed, method),
+                                        name="LayoutWorker", daemon=True)
+        self._worker.start()
+        return len(movable)
+
+    def place_node(self, book_graph, node_id):
+        """
+        Find a position for one new node next to its neighbours.
+
+        Returns:
+            tuple or None: (x, y), or None if the node is unknown or already placed.
+        """
+        view = book_graph.get_node_view(node_id)
+        if view is None or (node_id in self.pinned or not is_unplaced(view.position)): return None
+        nodes, edges, _ = snapshot_graph(book_graph)
+        fixed = {other_id: position for other_id, (_, position) in nodes.items() if other_id != node_id and not is_unplaced(position)}
+        return incremental_layout(nodes, edges, [node_id], fixed).get(node_id)
+
+    def _run(self, generation, nodes, edges, chapters, movable, fixed, method):
+        """Worker thread: compute positions and hand them to the GUI thread in batches."""
+        count = 0
+        try:
+            start = time.perf_counter()
+            if len(fixed) < len(nodes) * self.FULL_LAYOUT_RATIO:
+                positions = layered_layout(nodes, edges, chapters, movable)
+            else:
+                positions = incremental_layout(nodes, edges, movable, fixed)
+            if method == FORCE_DIRECTED: # Start from the current positions, with new nodes seeded as above
+                seed = {node_id: position for node_id, (_, position) in nodes.items() if position is not None and not is_unplaced(position)}
+                seed.update(fixed); seed.update(positions)
+                positions = force_directed_layout(seed, edges, fixed_ids=fixed)
+            log.info("LayoutService: Computed %s positions in %.3fs.", len(positions), time.perf_counter() - start)
+            batch = {}
+            for node_id, position in positions.items():
+                batch[node_id] = position
+                if len(batch) >= self.BATCH_SIZE:
+                    if generation != self._generation: return # Cancelled
+                    self._batch_ready.emit(generation, batch); count += len(batch); batch = {}
+                    time.sleep(0.001) # Let the GUI thread apply the batch
+            if batch and generation == self._generation: self._batch_ready.emit(generation, batch); count += len(batch)
+        except Exception as e:
+            log.error("ERROR in LayoutService worker: %s", e)
+            traceback.print_exc()
+        finally:
+            self._worker_done.emit(generation, count)
+
+    def _on_batch_ready(self, generation, batch):
+        """GUI thread: forward a batch unless its layout was cancelled meanwhile."""
+        if generation == self._generation: self.positions_ready.emit(batch)
+
+    def _on_worker_done(self, generation, count):
+        """GUI thread: report the end of a layout unless it was cancelled."""
+        if generation != self._generation: return
+        log.info("LayoutService: Layout finished, %s nodes positioned.", count)
+        self.layout_finished.emit(count)
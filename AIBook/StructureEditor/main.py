@@ -1,20 +1,33 @@
 """
 Main entry point for the Interactive Book Editor application.
+REVISED: Logs a startup timing report (imports, QApplication, main window, first
+         event loop pass) once the window is interactive.
 """
 
+from startup_timer import StartupTimer
+startup_timer = StartupTimer() # Before the heavy imports below, so they are measured
+
 import sys
+from editor_log import configure_from_args
 from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QTimer
+startup_timer.mark("PyQt5 import")
 # This is the line causing the error if MainWindow isn't defined yet
 from main_window import MainWindow 
+startup_timer.mark("editor modules import")
 
 def main():
-    """Main entry point."""
-    app = QApplication(sys.argv)
+    """Main entry point. Accepts --log=SPEC, --quiet and --verbose (see editor_log) besides the Qt options."""
+    app = QApplication(configure_from_args(sys.argv))
     app.setApplicationName("Interactive Book Editor")
+    startup_timer.mark("QApplication")
     
     # Create and show the main window
     window = MainWindow()
+    startup_timer.mark("MainWindow")
     window.show()
+    startup_timer.mark("show")
+    QTimer.singleShot(0, lambda: (startup_timer.mark("first event loop pass"), startup_timer.report())) # Runs once the window is up
     
     # Run the application
     sys.exit(app.exec_())
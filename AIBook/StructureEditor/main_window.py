@@ -3,9 +3,17 @@ MainWindow class for the Interactive Book Editor.
 REVISED: Moved model_edge_changed signal here from DataManager.
          Passes self to DataManager to allow signal emission.
          Connects local signal.
+ADDED: Background auto layout through LayoutService: unplaced nodes are laid out after
+       loading, imported nodes are placed next to their neighbours, and nodes the user
+       drags are pinned.
+ADDED: File > Sharded Structure Files switches the project to one structure file per chapter.
+REVISED: Output goes through the main_window logger (editor_log), so --quiet and AIBOOK_LOG apply to it.
 """
 
-print("Importing main_window.py: Starting imports...") 
+from editor_log import get_logger # First, so the import progress below can be logged
+
+log = get_logger(__name__)
+log.debug("Importing main_window.py: Starting imports...")
 import os
 import sys
 import traceback 
@@ -14,33 +22,37 @@ from PyQt5.QtWidgets import (
     QApplication, QVBoxLayout, QWidget, QInputDialog
 )
 # Import pyqtSignal here
-from PyQt5.QtCore import Qt, QSettings, QPointF, pyqtSignal 
+from PyQt5.QtCore import Qt, QSettings, QPointF, QEventLoop, pyqtSignal 
 
-print("Importing main_window.py: Importing Node, Edge...")
+log.debug("Importing main_window.py: Importing Node, Edge...")
 from node import Node, Edge
-print("Importing main_window.py: Importing BookGraph...")
+log.debug("Importing main_window.py: Importing BookGraph...")
 from book_graph import BookGraph
-print("Importing main_window.py: Importing DataManager...")
+log.debug("Importing main_window.py: Importing DataManager...")
 from data_manager import DataManager 
-print("Importing main_window.py: Importing GraphView...")
+log.debug("Importing main_window.py: Importing GraphView...")
 from graph_view import GraphView
-print("Importing main_window.py: Importing PropertiesEditor...")
+log.debug("Importing main_window.py: Importing PropertiesEditor...")
 from properties_editor import PropertiesEditor
-print("Importing main_window.py: Importing GraphNodeItem...")
+log.debug("Importing main_window.py: Importing GraphNodeItem...")
 from graph_items import GraphNodeItem 
-print("Importing main_window.py: Finished importing project modules.")
+log.debug("Importing main_window.py: Importing LayoutService...")
+from layout_service import LayoutService, FORCE_DIRECTED, FORCE_LAYOUT_AVAILABLE
+log.debug("Importing main_window.py: Finished importing project modules.")
 
-print("Defining MainWindow class...") 
+log.debug("Defining MainWindow class...")
 class MainWindow(QMainWindow): # Inherits QObject via QMainWindow
     """ Main application window for the Interactive Book Editor. """
 
     # --- MOVED SIGNAL DEFINITION HERE ---
     model_edge_changed = pyqtSignal(str, str) 
     # --- End Moved Signal ---
+
+    AUTO_SAVE_DELAY = 0.5 # Seconds without changes before auto-save writes to disk
     
     def __init__(self):
         """Initialize a new MainWindow instance."""
-        print("MainWindow __init__ started.") 
+        log.debug("MainWindow __init__ started.")
         super().__init__()
         
         self.book_graph = None 
@@ -49,6 +61,7 @@ class MainWindow(QMainWindow): # Inherits QObject via QMainWindow
         self.data_manager.set_signal_emitter(self) 
         # --- End Pass Self ---
         self.project_path = None
+        self.layout_service = LayoutService(self)
         
         self.init_ui()
         self.setup_connections()
@@ -56,7 +69,8 @@ class MainWindow(QMainWindow): # Inherits QObject via QMainWindow
         self.setWindowTitle("Interactive Book Editor")
         self.resize(1200, 800)
         self.data_manager.enable_auto_save(False)
-        print("MainWindow __init__ finished.") 
+        self.data_manager.set_auto_save_delay(self.AUTO_SAVE_DELAY) # Debounce saves onto a background worker
+        log.debug("MainWindow __init__ finished.")
 
     def init_ui(self):
         """Initialize the UI components."""
@@ -68,7 +82,7 @@ class MainWindow(QMainWindow): # Inherits QObject via QMainWindow
 
     def create_menus(self):
         """Create the menu bar and menus."""
-        file_menu=self.menuBar().addMenu("&File");file_menu.addAction(QAction("&New Project...",self,shortcut="Ctrl+N",triggered=self.on_new_project));file_menu.addAction(QAction("&Open Project...",self,shortcut="Ctrl+O",triggered=self.on_open_project));file_menu.addSeparator();file_menu.addAction(QAction("&Import Node...",self,shortcut="Ctrl+I",triggered=self.on_import_node));file_menu.addSeparator();file_menu.addAction(QAction("&Save",self,shortcut="Ctrl+S",triggered=self.on_save));file_menu.addAction(QAction("Force Save &All",self,triggered=self.on_force_save_all));file_menu.addSeparator();file_menu.addAction(QAction("E&xit",self,shortcut="Alt+F4",triggered=self.close));edit_menu=self.menuBar().addMenu("&Edit");edit_menu.addAction(QAction("&Delete Selected Node",self,shortcut="Delete",triggered=self.on_delete_selected_node));view_menu=self.menuBar().addMenu("&View");view_menu.addAction(QAction("&Fit in View",self,shortcut="F",triggered=self.graph_view.fit_in_view));view_menu.addSeparator();properties_action=self.properties_dock.toggleViewAction();properties_action.setText("&Properties Panel");properties_action.setCheckable(True);properties_action.setChecked(True);view_menu.addAction(properties_action);debug_menu=self.menuBar().addMenu("&Debug");debug_menu.addAction(QAction("&Print Graph Structure",self,triggered=self.debug_print_graph_structure));debug_menu.addAction(QAction("&Force Create Connection",self,triggered=self.debug_force_create_connection));debug_menu.addAction(QAction("&Refresh Graph View",self,triggered=self.debug_refresh_graph_view));debug_menu.addAction(QAction("Create &Book Node",self,triggered=self.debug_create_book_node));debug_menu.addAction(QAction("Update &All Navigation",self,triggered=self.debug_update_all_navigation));
+        file_menu=self.menuBar().addMenu("&File");file_menu.addAction(QAction("&New Project...",self,shortcut="Ctrl+N",triggered=self.on_new_project));file_menu.addAction(QAction("&Open Project...",self,shortcut="Ctrl+O",triggered=self.on_open_project));file_menu.addSeparator();file_menu.addAction(QAction("&Import Node...",self,shortcut="Ctrl+I",triggered=self.on_import_node));file_menu.addSeparator();file_menu.addAction(QAction("&Save",self,shortcut="Ctrl+S",triggered=self.on_save));file_menu.addAction(QAction("Force Save &All",self,triggered=self.on_force_save_all));self.sharded_action=QAction("S&harded Structure Files",self,checkable=True,triggered=self.on_toggle_sharded_structure);file_menu.addAction(self.sharded_action);file_menu.addSeparator();file_menu.addAction(QAction("E&xit",self,shortcut="Alt+F4",triggered=self.close));edit_menu=self.menuBar().addMenu("&Edit");edit_menu.addAction(QAction("&Delete Selected Node",self,shortcut="Delete",triggered=self.on_delete_selected_node));view_menu=self.menuBar().addMenu("&View");view_menu.addAction(QAction("&Fit in View",self,shortcut="F",triggered=self.graph_view.fit_in_view));view_menu.addAction(QAction("Auto &Layout",self,shortcut="Ctrl+L",triggered=self.on_auto_layout));force_action=QAction("F&orce-Directed Layout",self,triggered=self.on_force_layout);force_action.setEnabled(FORCE_LAYOUT_AVAILABLE);view_menu.addAction(force_action);view_menu.addSeparator();properties_action=self.properties_dock.toggleViewAction();properties_action.setText("&Properties Panel");properties_action.setCheckable(True);properties_action.setChecked(True);view_menu.addAction(properties_action);debug_menu=self.menuBar().addMenu("&Debug");debug_menu.addAction(QAction("&Print Graph Structure",self,triggered=self.debug_print_graph_structure));debug_menu.addAction(QAction("&Force Create Connection",self,triggered=self.debug_force_create_connection));debug_menu.addAction(QAction("&Refresh Graph View",self,triggered=self.debug_refresh_graph_view));debug_menu.addAction(QAction("Create &Book Node",self,triggered=self.debug_create_book_node));debug_menu.addAction(QAction("Update &All Navigation",self,triggered=self.debug_update_all_navigation));
 
     def setup_connections(self):
         """Set up signal-slot connections."""
@@ -78,9 +92,14 @@ class MainWindow(QMainWindow): # Inherits QObject via QMainWindow
         self.graph_view.selection_cleared.connect(self.properties_editor.clear_display) 
         
         # Connect graph changes to handlers that update model first
-        self.graph_view.node_moved.connect(self.data_manager.on_node_updated) # AutoSave handles model update
+        self.graph_view.nodes_moved.connect(self.handle_nodes_moved_signal) # One save per drag, however many nodes
         self.graph_view.edge_created.connect(self.handle_edge_created_signal) 
         self.graph_view.edge_deleted.connect(self.handle_edge_deleted_signal) 
+        self.graph_view.nodes_moved.connect(self.layout_service.on_nodes_moved) # Dragged nodes keep their place
+
+        # Layout results stream in batches from the worker thread
+        self.layout_service.positions_ready.connect(self.apply_layout_positions)
+        self.layout_service.layout_finished.connect(self.handle_layout_finished)
 
         # Connect properties editor changes to handlers
         self.properties_editor.node_updated.connect(self.handle_node_updated_signal) 
@@ -96,20 +115,20 @@ class MainWindow(QMainWindow): # Inherits QObject via QMainWindow
     def handle_edge_created_signal(self, edge):
         """Adds edge to model BEFORE triggering auto-save/UI update."""
         if not self.book_graph: return
-        print(f"MainWindow: Handling edge created signal for {edge.source_id}->{edge.target_id}")
-        add_success = self.book_graph.add_edge(edge) # Add to model
+        log.debug("MainWindow: Handling edge created signal for %s->%s", edge.source_id, edge.target_id)
+        with self.data_manager.get_model_lock(): add_success = self.book_graph.add_edge(edge) # Add to model
         if add_success:
              # Trigger DataManager which calls AutoSave and emits model_edge_changed
              self.data_manager.on_edge_added(edge) 
         else:
-             print(f"MainWindow: ERROR - Failed to add edge {edge.source_id}->{edge.target_id} to BookGraph model.")
+             log.error("MainWindow: ERROR - Failed to add edge %s->%s to BookGraph model.", edge.source_id, edge.target_id)
              self.graph_view.remove_edge(edge.source_id, edge.target_id) # Remove visual if model add failed
 
     def handle_edge_deleted_signal(self, edge):
         """Removes edge from model BEFORE triggering auto-save/UI update."""
         if not self.book_graph: return
-        print(f"MainWindow: Handling edge deleted signal for {edge.source_id}->{edge.target_id}")
-        remove_success = self.book_graph.remove_edge(edge.source_id, edge.target_id) # Remove from model
+        log.debug("MainWindow: Handling edge deleted signal for %s->%s", edge.source_id, edge.target_id)
+        with self.data_manager.get_model_lock(): remove_success = self.book_graph.remove_edge(edge.source_id, edge.target_id) # Remove from model
         if remove_success:
             if self.properties_editor.current_edge and \
                self.properties_editor.current_edge.source_id == edge.source_id and \
@@ -119,51 +138,70 @@ class MainWindow(QMainWindow): # Inherits QObject via QMainWindow
             self.data_manager.on_edge_removed(edge.source_id, edge.target_id) 
             self.statusBar().showMessage(f"Deleted connection: {edge.source_id} -> {edge.target_id}", 3000)
         else:
-             print(f"MainWindow: ERROR - Failed to remove edge {edge.source_id}->{edge.target_id} from BookGraph model.")
+             log.error("MainWindow: ERROR - Failed to remove edge %s->%s from BookGraph model.", edge.source_id, edge.target_id)
 
     def handle_node_updated_signal(self, node):
         """Handles node property updates from editor: updates view then triggers save."""
         if not self.book_graph: return
-        print(f"MainWindow: Handling node updated signal for {node.id}")
+        log.debug("MainWindow: Handling node updated signal for %s", node.id)
         self.graph_view.update_node(node) # Update view first
         self.data_manager.on_node_updated(node) # Trigger save chain
         self.statusBar().showMessage(f"Node '{node.title}' updated", 3000)
 
+    def handle_nodes_moved_signal(self, nodes):
+        """Saves the new positions of dragged nodes as one change."""
+        if not self.book_graph: return
+        self.data_manager.on_nodes_updated(nodes, positions_only=True)
+        if len(nodes) > 1: self.statusBar().showMessage(f"Moved {len(nodes)} nodes", 3000)
+
     def handle_edge_updated_signal(self, edge):
         """Handles edge property updates from editor: updates view then triggers save."""
         if not self.book_graph: return
-        print(f"MainWindow: Handling edge updated signal for {edge.source_id}->{edge.target_id}")
+        log.debug("MainWindow: Handling edge updated signal for %s->%s", edge.source_id, edge.target_id)
         self.graph_view.update_edge(edge) # Update view first
         self.data_manager.on_edge_updated(edge) # Trigger save chain
         self.statusBar().showMessage(f"Connection {edge.source_id}->{edge.target_id} updated", 3000)
 
     def handle_chapters_updated_signal(self, chapters):
         """Handles chapter updates from editor: updates UI, model, then triggers save."""
-        print("MainWindow: Handling chapters updated signal...")
+        log.debug("MainWindow: Handling chapters updated signal...")
         self.properties_editor.set_available_chapters(chapters) 
         if self.book_graph:
              new_chapter_info = {ch['id']: ch for ch in chapters if 'id' in ch}
-             self.book_graph.chapter_info = new_chapter_info 
+             with self.data_manager.get_model_lock(): self.book_graph.chapter_info = new_chapter_info 
              if chapters: self.data_manager.on_chapter_updated(chapters[0]['id']) 
              else: self.data_manager.save_book_structure(self.book_graph)
         self.statusBar().showMessage("Chapters updated", 3000)
 
+    def apply_layout_positions(self, positions):
+        """Applies a batch of layout positions to the model and view, then triggers save."""
+        if not self.book_graph: return
+        with self.data_manager.get_model_lock():
+            positions = {node_id: position for node_id, position in positions.items()
+                         if node_id in self.book_graph.graph and node_id not in self.layout_service.pinned} # Dragged meanwhile
+            self.book_graph.update_node_positions(positions)
+        self.graph_view.set_node_positions(positions)
+        self.data_manager.on_nodes_updated([self.book_graph.get_node(node_id) for node_id in positions], positions_only=True)
+
+    def handle_layout_finished(self, count):
+        if count: self.statusBar().showMessage(f"Layout finished: {count} nodes positioned.", 3000)
+
     def handle_model_edge_changed(self, source_id, target_id):
         """Refreshes the properties editor if the currently selected node is affected."""
-        print(f"MainWindow: Model edge changed ({source_id} -> {target_id}). Checking properties editor.")
+        log.debug("MainWindow: Model edge changed (%s -> %s). Checking properties editor.", source_id, target_id)
         try: # Add try-except for safety
             current_node = self.properties_editor.current_node
             if current_node and (current_node.id == source_id or current_node.id == target_id):
-                print(f"MainWindow: Refreshing properties editor for node {current_node.id}")
+                log.debug("MainWindow: Refreshing properties editor for node %s", current_node.id)
                 # Get the potentially updated node object from the graph
                 updated_node_obj = self.book_graph.get_node(current_node.id)
                 if updated_node_obj:
                      self.properties_editor.display_node(updated_node_obj) 
                 else:
-                     print(f"MainWindow: Warning - Could not get updated node object for {current_node.id} during refresh.")
+                     log.warning("MainWindow: Warning - Could not get updated node object for %s during refresh.", current_node.id)
                      self.properties_editor.clear_display() # Clear if node somehow disappeared
         except Exception as e:
-             print(f"ERROR in MainWindow.handle_model_edge_changed: {e}")
+             log.error("ERROR in MainWindow.handle_model_edge_changed: %s", e)
              traceback.print_exc()
 
 
@@ -171,8 +209,11 @@ class MainWindow(QMainWindow): # Inherits QObject via QMainWindow
     # (Remain the same)
     def load_project_ui_update(self):
         if not self.book_graph: return
+        self.layout_service.cancel(); self.layout_service.pinned.clear()
         self.graph_view.set_book_graph(self.book_graph); self.properties_editor.set_book_graph(self.book_graph); self.properties_editor.set_available_chapters(list(self.book_graph.get_chapters().values()))
         self.setWindowTitle(f"Interactive Book Editor - {os.path.basename(self.project_path)}"); self.statusBar().showMessage(f"Project loaded: {self.project_path}", 5000); self.data_manager.enable_auto_save(True) 
+        if self.layout_service.layout_graph(self.book_graph): self.statusBar().showMessage("Laying out unplaced nodes...", 3000)
+        self.sharded_action.setChecked(self.data_manager.is_sharded_structure())
     def on_new_project(self):
         dir_path = QFileDialog.getExistingDirectory(self, "New Project Location", "", QFileDialog.ShowDirsOnly);
         if not dir_path: return
@@ -194,17 +235,33 @@ class MainWindow(QMainWindow): # Inherits QObject via QMainWindow
         if not file_path: return
         imported_node = self.data_manager.import_node(file_path, self.book_graph) 
         if not imported_node: QMessageBox.critical(self, "Error", "Failed to import node."); return
+        position = self.layout_service.place_node(self.book_graph, imported_node.id)
+        if position:
+            imported_node.position = position
+            self.data_manager.on_node_updated(imported_node) # Updates the model and saves the position
         self.graph_view.add_node(imported_node); QMessageBox.information(self, "Node Imported", f"Node '{imported_node.title}' imported successfully.")
     def on_save(self):
         if not self.project_path or not self.book_graph: QMessageBox.warning(self, "Warning", "No project open to save."); return
-        print("Manual Save: Triggering force_save_all...");
+        log.info("Manual Save: Triggering force_save_all...")
         if self.data_manager.force_save_all(): self.statusBar().showMessage("Project saved manually.", 3000)
         else: QMessageBox.critical(self, "Error", "Failed to save project.")
     def on_force_save_all(self):
         if not self.project_path or not self.book_graph: QMessageBox.warning(self, "Warning", "No project open to save."); return
-        print("Force Save All: Triggering..."); 
+        log.info("Force Save All: Triggering...")
         if self.data_manager.force_save_all(): self.statusBar().showMessage("Project force saved.", 3000)
         else: QMessageBox.critical(self, "Error", "Failed to force save project.")
+    def on_toggle_sharded_structure(self, checked):
+        if not self.project_path or not self.book_graph: QMessageBox.warning(self, "Warning", "Please open or create a project first."); self.sharded_action.setChecked(False); return
+        if self.data_manager.set_sharded_structure(self.book_graph, checked): self.statusBar().showMessage("Project now saves one structure file per chapter." if checked else "Project now saves a single book-structure.json.", 3000)
+        else: QMessageBox.critical(self, "Error", "Failed to change the structure file format."); self.sharded_action.setChecked(self.data_manager.is_sharded_structure())
+    def on_auto_layout(self):
+        if not self.book_graph: QMessageBox.warning(self, "Warning", "Please open or create a project first."); return
+        count = self.layout_service.layout_graph(self.book_graph, relayout=True)
+        self.statusBar().showMessage(f"Laying out {count} nodes..." if count else "All nodes are pinned.", 3000)
+    def on_force_layout(self):
+        if not self.book_graph: QMessageBox.warning(self, "Warning", "Please open or create a project first."); return
+        count = self.layout_service.layout_graph(self.book_graph, relayout=True, method=FORCE_DIRECTED)
+        self.statusBar().showMessage(f"Laying out {count} nodes..." if count else "All nodes are pinned.", 3000)
     def on_delete_selected_node(self):
         selected_items = self.graph_view.scene.selectedItems(); selected_nodes = [item for item in selected_items if isinstance(item, GraphNodeItem)] 
         if not selected_nodes: self.statusBar().showMessage("No node selected for deletion.", 3000); return
@@ -220,17 +277,17 @@ class MainWindow(QMainWindow): # Inherits QObject via QMainWindow
 
     # --- Debug Methods ---
     def debug_print_graph_structure(self):
-        if not self.book_graph: print("DEBUG: No book graph loaded."); return
-        print("\n=== DEBUG: BOOK GRAPH STRUCTURE ==="); print(f"Nodes ({self.book_graph.graph.number_of_nodes()}):")
-        for node_id, data in self.book_graph.graph.nodes(data=True): print(f"  - {node_id}: {data.get('title', 'N/A')} (Type: {data.get('node_type', 'N/A')}, Chapter: {data.get('chapter', 'N/A')}, Pos: {data.get('position')})") 
-        print(f"\nEdges ({self.book_graph.graph.number_of_edges()}):")
-        for source, target, data in self.book_graph.graph.edges(data=True): print(f"  - {source} -> {target} (Type: {data.get('edge_type', 'N/A')})")
-        print("\nChapters:"); 
-        for chapter_id, info in self.book_graph.chapter_info.items(): print(f"  - {chapter_id}: {info.get('title', 'N/A')} (Nodes: {info.get('nodes', [])})")
-        print("===================================\n")
+        if not self.book_graph: log.warning("DEBUG: No book graph loaded."); return
+        log.info("\n=== DEBUG: BOOK GRAPH STRUCTURE ==="); log.info("Nodes (%s):", self.book_graph.graph.number_of_nodes())
+        for node_id, data in self.book_graph.graph.nodes(data=True): log.info("  - %s: %s (Type: %s, Chapter: %s, Pos: %s)", node_id, data.get('title', 'N/A'), data.get('node_type', 'N/A'), data.get('chapter', 'N/A'), data.get('position'))
+        log.info("\nEdges (%s):", self.book_graph.graph.number_of_edges())
+        for source, target, data in self.book_graph.graph.edges(data=True): log.info("  - %s -> %s (Type: %s)", source, target, data.get('edge_type', 'N/A'))
+        log.info("\nChapters:")
+        for chapter_id, info in self.book_graph.chapter_info.items(): log.info("  - %s: %s (Nodes: %s)", chapter_id, info.get('title', 'N/A'), info.get('nodes', []))
+        log.info("===================================\n")
     def debug_force_create_connection(self):
-        if not self.book_graph or not self.graph_view.node_items: QMessageBox.warning(self, "Debug", "No nodes available."); return
-        node_ids = list(self.graph_view.node_items.keys()); source_id, ok1 = QInputDialog.getItem(self, "Debug Connect", "Source Node:", node_ids, 0, False);
+        if not self.book_graph or not self.book_graph.graph.number_of_nodes(): QMessageBox.warning(self, "Debug", "No nodes available."); return
+        node_ids = list(self.book_graph.graph.nodes()); source_id, ok1 = QInputDialog.getItem(self, "Debug Connect", "Source Node:", node_ids, 0, False);
         if not ok1: return; target_id, ok2 = QInputDialog.getItem(self, "Debug Connect", "Target Node:", node_ids, 0, False);
         if not ok2: return; edge_types = ["critical-path", "character-pov", "branch-point", "concept-sequence", "related-concept", "fiction-nonfiction", "default"]; edge_type, ok3 = QInputDialog.getItem(self, "Debug Connect", "Edge Type:", edge_types, 0, False);
         if not ok3: return;
@@ -238,17 +295,26 @@ class MainWindow(QMainWindow): # Inherits QObject via QMainWindow
         edge = Edge(source_id=source_id, target_id=target_id, edge_type=edge_type)
         self.handle_edge_created_signal(edge) # Use the proper handler
         self.statusBar().showMessage(f"Debug: Edge {source_id}->{target_id} created attempt.", 3000)
-    def debug_refresh_graph_view(self): print("DEBUG: Refreshing graph view..."); self.graph_view.refresh_graph(); print("DEBUG: Graph view refreshed."); self.statusBar().showMessage("Debug: Graph view refreshed.", 3000)
+    def debug_refresh_graph_view(self): log.info("DEBUG: Refreshing graph view..."); self.graph_view.refresh_graph(); log.info("DEBUG: Graph view refreshed."); self.statusBar().showMessage("Debug: Graph view refreshed.", 3000)
     def debug_create_book_node(self):
         if not self.book_graph: QMessageBox.warning(self, "Debug", "No project loaded."); return
         if self.book_graph.get_node("book"): QMessageBox.information(self, "Debug", "Book node already exists."); return
         book_node = Node(node_id="book", title="Book Properties", node_type="book", position=(50, 50), metadata={"author": "Author", "version": "1.0", "defaultStartNode": "", "defaultPOV": "Omniscient"})
-        if self.book_graph.add_node(book_node): self.graph_view.add_node(book_node); self.data_manager.on_node_added(book_node); QMessageBox.information(self, "Debug", "Book node created.")
+        with self.data_manager.get_model_lock(): added = self.book_graph.add_node(book_node)
+        if added: self.graph_view.add_node(book_node); self.data_manager.on_node_added(book_node); QMessageBox.information(self, "Debug", "Book node created.")
         else: QMessageBox.warning(self, "Debug", "Failed to add book node.")
     def debug_update_all_navigation(self):
         if not self.book_graph: QMessageBox.warning(self, "Debug", "No project loaded."); return
-        count = self.data_manager.update_all_node_navigation(self.book_graph); QMessageBox.information(self, "Debug", f"Updated navigation for {count} nodes.")
+        def report_progress(done, total):
+            self.statusBar().showMessage(f"Updating navigation... {done}/{total}"); QApplication.processEvents(QEventLoop.ExcludeUserInputEvents)
+        count = self.data_manager.update_all_node_navigation(self.book_graph, progress_callback=report_progress); self.statusBar().clearMessage()
+        failed = len(self.data_manager.node_content_updater.last_write_errors); missing = len(self.data_manager.node_content_updater.last_missing_files)
+        QMessageBox.information(self, "Debug", f"Updated navigation for {count} nodes." + (f"\n{failed} files failed; see the console for details." if failed else "") + (f"\n{missing} nodes have no content file." if missing else ""))
 
     # --- Window Close Event ---
-    def closeEvent(self, event): event.accept() 
+    def closeEvent(self, event):
+        """Write out pending auto-save changes before the window closes."""
+        self.layout_service.cancel()
+        if not self.data_manager.shutdown_auto_save() or self.data_manager.has_unsaved_changes(): QMessageBox.warning(self, "Auto-save", "Some changes could not be saved.")
+        event.accept() 
 
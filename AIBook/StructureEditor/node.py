@@ -1,8 +1,22 @@
 """
 Node and Edge classes for the Interactive Book Editor.
 These classes represent the fundamental data structures for the book graph.
+REVISED: Node and Edge use __slots__, and type and chapter strings are interned so
+         the many nodes and edges of a large book share one copy of each.
 """
 
+import sys
+from types import MappingProxyType
+from editor_log import get_logger
+
+log = get_logger(__name__)
+
+EMPTY_METADATA = MappingProxyType({}) # Shared by every node and edge without metadata; graph metadata is only ever replaced, never edited in place
+
+def intern_string(value):
+    """Intern a string so equal values share one object. Anything else is returned unchanged."""
+    return sys.intern(value) if type(value) is str else value
+
 class Node:
     """
     Represents a content node in the interactive book structure.
@@ -10,6 +24,7 @@ class Node:
     A node can be a fiction scene, non-fiction article, character profile, etc.
     Each node has a unique ID, title, type, and other metadata.
     """
+    __slots__ = ("id", "title", "node_type", "chapter", "file_path", "position", "metadata")
     
     def __init__(self, node_id, title=None, node_type=None, chapter=None, 
                  file_path=None, position=None, metadata=None):
@@ -27,8 +42,8 @@ class Node:
         """
         self.id = node_id
         self.title = title or node_id
-        self.node_type = node_type or "fiction"
-        self.chapter = chapter
+        self.node_type = intern_string(node_type or "fiction")
+        self.chapter = intern_string(chapter)
         self.file_path = file_path
         self.position = position or (0, 0)
         self.metadata = metadata or {}
@@ -82,7 +97,7 @@ class Node:
             raise ValueError("Node data must contain a valid ID (either 'id' or 'nodeId')")
         
         # Debug print the node ID
-        print(f"Creating node from data with ID: {node_id}")
+        log.debug("Creating node from data with ID: %s", node_id)
             
         title = data.get("title")
         node_type = data.get("type") or data.get("nodeType")
@@ -114,6 +129,7 @@ class Edge:
     An edge can represent various relationships like critical path, character POV alternatives,
     related content, etc.
     """
+    __slots__ = ("source_id", "target_id", "edge_type", "metadata")
     
     def __init__(self, source_id, target_id, edge_type=None, metadata=None):
         """
@@ -127,7 +143,7 @@ class Edge:
         """
         self.source_id = source_id
         self.target_id = target_id
-        self.edge_type = edge_type or "default"
+        self.edge_type = intern_string(edge_type or "default")
         self.metadata = metadata or {}
     
     def to_dict(self):
@@ -1,13 +1,25 @@
 """
 SimplifiedNodeContentUpdater class for the Interactive Book Editor.
 REVISED: Handles branch points in addition to other navigation types.
+REVISED: Bulk navigation rewrites read and write content files on a thread pool.
+REVISED: Navigation for the whole book is built in a single pass over the edges.
+REVISED: Navigation reads (source, target, edge_type) edges; only branch points look up edge metadata.
 """
 
 import os
-import json
 import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from path_manager import PathManager
 from character_pov_manager import CharacterPOVManager 
+from json_file_manager import JsonFileManager
+from editor_log import get_logger
+
+log = get_logger(__name__)
+
+# Edge types that link a node to related non-fiction content
+RELATED_NONFICTION_EDGE_TYPES = ("related-concept", "fiction-nonfiction")
+# Worker threads for bulk navigation rewrites (file I/O bound, so more than the CPU count helps)
+NAVIGATION_WORKERS = 8
 
 class SimplifiedNodeContentUpdater:
     """
@@ -21,15 +33,19 @@ class SimplifiedNodeContentUpdater:
     - Syncing node content files with graph structure
     """
     
-    def __init__(self, path_manager=None):
+    def __init__(self, path_manager=None, json_file_manager=None):
         """
         Initialize a new SimplifiedNodeContentUpdater instance.
         
         Args:
             path_manager (PathManager, optional): PathManager instance.
+            json_file_manager (JsonFileManager, optional): Shared JSON read/write layer.
         """
         self.path_manager = path_manager or PathManager()
+        self.json_file_manager = json_file_manager or JsonFileManager()
         self.character_pov_manager = CharacterPOVManager() 
+        self.last_write_errors = {} # node_id -> error message from the last write_navigation_updates
+        self.last_missing_files = [] # node_ids whose content file did not exist in the last write_navigation_updates
     
     def update_node_navigation(self, node_id, book_graph):
         """
@@ -42,150 +58,326 @@ class SimplifiedNodeContentUpdater:
         Returns:
             bool: True if successfully updated, False otherwise.
         """
-        node = book_graph.get_node(node_id)
+        node = book_graph.get_node_view(node_id)
         if not node or node.node_type == "book" or not node.file_path:
-            # print(f"Skipping navigation update for node_id={node_id}: invalid node, book node, or no file path.")
-            return False
-        
-        full_path = self.path_manager.get_full_content_path(node.file_path)
-        if not full_path or not os.path.exists(full_path):
-            print(f"Node content file not found for {node_id}: {full_path}")
+            log.debug("Skipping navigation update for node_id=%s: invalid node, book node, or no file path.", node_id)
             return False
-            
         try:
-            with open(full_path, 'r', encoding='utf-8') as f:
-                node_content = json.load(f)
-            
-            if "navigation" not in node_content:
-                node_content["navigation"] = {}
-            
-            # --- Update Navigation Fields ---
+            navigation = self.build_navigation(node_id, book_graph)
+        except Exception as e:
+            log.error("ERROR updating node navigation for %s: %s", node_id, e)
+            traceback.print_exc()
+            return False
+        return self.write_node_navigation(node_id, node.file_path, navigation)
+
+    def build_navigation(self, node_id, book_graph):
+        """
+        Compute a node's navigation block from its graph connections, without touching disk.
+        
+        Args:
+            node_id (str): ID of the node.
+            book_graph: The book graph containing connections.
             
-            # 1. Update next/previous based ONLY on 'critical-path' edges
-            next_node_id = self._get_critical_path_neighbor(node_id, book_graph, direction="next")
-            prev_node_id = self._get_critical_path_neighbor(node_id, book_graph, direction="previous")
+        Returns:
+            dict: Navigation fields. 'next'/'previous' are None when there is no
+                  'critical-path' neighbour in that direction.
+        """
+        table = {node_id: self._new_navigation()}
+        graph = book_graph.graph
+        # Out-edges, then in-edges (a self-loop is already covered by the out-edges)
+        edges = list(graph.out_edges(node_id, data='edge_type'))
+        edges.extend(edge for edge in graph.in_edges(node_id, data='edge_type') if edge[0] != node_id)
+        ambiguous_previous = self._collect_navigation(book_graph, edges, table)
+        return self._finish_navigation(book_graph, table, ambiguous_previous)[node_id]
+
+    def build_navigation_table(self, book_graph, node_ids=None):
+        """
+        Compute navigation blocks for many nodes in one pass over the graph's edges.
+        Gives the same result as calling build_navigation for each node, in time
+        linear in the number of edges.
+        
+        Args:
+            book_graph: The book graph containing connections.
+            node_ids (iterable, optional): Nodes to include (default: every node).
             
-            if next_node_id: node_content["navigation"]["next"] = next_node_id
-            elif "next" in node_content["navigation"]: del node_content["navigation"]["next"] 
-                
-            if prev_node_id: node_content["navigation"]["previous"] = prev_node_id
-            elif "previous" in node_content["navigation"]: del node_content["navigation"]["previous"] 
+        Returns:
+            dict: node_id -> navigation block.
+        """
+        graph = book_graph.graph
+        table = {node_id: self._new_navigation() for node_id in (graph.nodes() if node_ids is None else node_ids) if node_id in graph}
+        ambiguous_previous = self._collect_navigation(book_graph, graph.edges(data='edge_type'), table)
+        return self._finish_navigation(book_graph, table, ambiguous_previous)
 
-            # 2. Update alternateVersions based on 'character-pov' edges
-            alt_versions = self._get_alternate_versions(node_id, book_graph)
-            node_content["navigation"]["alternateVersions"] = alt_versions # Assign (will be empty list if none)
+    @staticmethod
+    def _new_navigation():
+        """Create an empty navigation block."""
+        return {"next": None, "previous": None, "alternateVersions": [], "relatedNonFiction": [], "branchPoints": []}
 
-            # 3. Update relatedNonFiction based on relevant edge types
-            related_nf = self._get_related_nonfiction(node_id, book_graph)
-            node_content["navigation"]["relatedNonFiction"] = related_nf # Assign (will be empty list if none)
+    def _collect_navigation(self, book_graph, edges, table):
+        """
+        Fold (source, target, edge_type) edges into the navigation blocks in table.
+        Only nodes that already have an entry in table are filled in.
+        
+        Returns:
+            set: IDs of nodes that got more than one 'critical-path' predecessor.
+        """
+        node_data = book_graph.graph.nodes
+        ambiguous_previous = set()
+        for source, target, edge_type in edges:
+            source_nav = table.get(source)
+            target_nav = table.get(target)
+            # 1. next/previous based ONLY on 'critical-path' edges
+            if edge_type == "critical-path":
+                if source_nav is not None and source_nav["next"] is None: source_nav["next"] = target
+                if target_nav is not None:
+                    if target_nav["previous"] is None: target_nav["previous"] = source
+                    else: ambiguous_previous.add(target)
+            # 2. alternateVersions based on 'character-pov' edges
+            elif edge_type == "character-pov":
+                if source_nav is not None:
+                    pov_character = node_data[target].get("metadata", {}).get("povCharacter") or \
+                                    self.character_pov_manager.get_character_from_pov_node(target) or \
+                                    "Unknown"
+                    source_nav["alternateVersions"].append({"povCharacter": pov_character, "nodeId": target})
+            # 3. relatedNonFiction based on relevant edge types (both directions)
+            elif edge_type in RELATED_NONFICTION_EDGE_TYPES:
+                if source_nav is not None and node_data[target].get("node_type") == "nonfiction": source_nav["relatedNonFiction"].append(target)
+                if target_nav is not None and node_data[source].get("node_type") == "nonfiction": target_nav["relatedNonFiction"].append(source)
+            # 4. branchPoints based on 'branch-point' edges
+            elif edge_type == "branch-point":
+                if source_nav is not None:
+                    # Assumes branch text might be stored in edge metadata
+                    branch_text = book_graph.graph.edges[source, target].get("metadata", {}).get("text", f"Branch to {target}")
+                    source_nav["branchPoints"].append({"text": branch_text, "targetNodeId": target})
+        return ambiguous_previous
 
-            # 4. Update branchPoints based on 'branch-point' edges (NEW)
-            branch_points = self._get_branch_points(node_id, book_graph)
-            node_content["navigation"]["branchPoints"] = branch_points # Assign (will be empty list if none)
+    @staticmethod
+    def _finish_navigation(book_graph, table, ambiguous_previous):
+        """Resolve ambiguous 'previous' links and de-duplicate and sort relatedNonFiction."""
+        # 'previous' is the first critical-path predecessor in in-edge order, which the edge
+        # order seen by _collect_navigation need not follow; re-resolve the (rare) nodes with several.
+        for node_id in ambiguous_previous:
+            table[node_id]["previous"] = next(source for source, data in book_graph.graph.pred[node_id].items() if data.get("edge_type") == "critical-path")
+        for navigation in table.values():
+            if navigation["relatedNonFiction"]: navigation["relatedNonFiction"] = sorted(set(navigation["relatedNonFiction"]))
+        return table
 
+    def build_navigation_updates(self, node_ids, book_graph):
+        """
+        Compute navigation blocks for several nodes from the in-memory graph.
+        
+        Args:
+            node_ids (iterable): IDs of the nodes to compute, or None for every node
+                (built with one pass over the edges by build_navigation_table).
+            book_graph: The book graph containing connections.
+            
+        Returns:
+            dict: node_id -> (file_path, navigation) for nodes that have a content file.
+        """
+        if node_ids is None: node_ids = list(book_graph.graph.nodes())
+        nodes = [book_graph.get_node_view(node_id) for node_id in node_ids]
+        nodes = [node for node in nodes if node and node.node_type != "book" and node.file_path]
+        if len(nodes) < 2 * len(book_graph.graph) ** 0.5: # Few nodes: walking their own edges is cheaper than a full sweep
+            return {node.id: (node.file_path, self.build_navigation(node.id, book_graph)) for node in nodes}
+        table = self.build_navigation_table(book_graph, [node.id for node in nodes])
+        return {node.id: (node.file_path, table[node.id]) for node in nodes}
 
-            # --- Save Updated Content ---
-            with open(full_path, 'w', encoding='utf-8') as f:
-                json.dump(node_content, f, indent=2, ensure_ascii=False)
+    def write_node_navigation(self, node_id, file_path, navigation):
+        """
+        Write a precomputed navigation block into a node's content file.
+        
+        Args:
+            node_id (str): ID of the node (for logging).
+            file_path (str): Content file path relative to the content directory.
+            navigation (dict): Navigation block as returned by build_navigation.
             
-            # print(f"Updated navigation data for node: {node_id}") # Less verbose logging
+        Returns:
+            bool: True if successfully updated, False otherwise.
+        """
+        try:
+            self._apply_navigation(file_path, navigation)
+            log.debug("Updated navigation data for node: %s", node_id)
             return True
-            
+        except FileNotFoundError as e:
+            log.warning("Node content file not found for %s: %s", node_id, e)
+            return False
         except Exception as e:
-            print(f"ERROR updating node navigation for {node_id}: {e}")
+            log.error("ERROR updating node navigation for %s: %s", node_id, e)
             traceback.print_exc()
             return False
 
-    def _get_critical_path_neighbor(self, node_id, book_graph, direction="next"):
-        """Get the next or previous node specifically connected by a 'critical-path' edge."""
-        if direction == "next":
-            for _, target, data in book_graph.graph.out_edges(node_id, data=True):
-                if data.get("edge_type") == "critical-path": return target 
-        elif direction == "previous":
-            for source, _, data in book_graph.graph.in_edges(node_id, data=True):
-                if data.get("edge_type") == "critical-path": return source 
-        return None 
-
-    def _get_alternate_versions(self, node_id, book_graph):
-        """Get alternate POV versions for a node based on 'character-pov' edges."""
-        alternate_versions = []
-        for _, target, data in book_graph.graph.out_edges(node_id, data=True):
-            if data.get("edge_type") == "character-pov":
-                target_node = book_graph.get_node(target)
-                pov_character = "Unknown"
-                if target_node:
-                    pov_character = target_node.metadata.get("povCharacter") or \
-                                    self.character_pov_manager.get_character_from_pov_node(target) or \
-                                    "Unknown"
-                alternate_versions.append({"povCharacter": pov_character, "nodeId": target})
-        return alternate_versions 
-
-    def _get_related_nonfiction(self, node_id, book_graph):
-        """Get related non-fiction nodes based on relevant edges."""
-        related_nonfiction_ids = set() 
-        for _, target, data in book_graph.graph.out_edges(node_id, data=True):
-            target_node = book_graph.get_node(target)
-            if target_node and target_node.node_type == "nonfiction":
-                if data.get("edge_type") in ["related-concept", "fiction-nonfiction"]:
-                    related_nonfiction_ids.add(target)
-        for source, _, data in book_graph.graph.in_edges(node_id, data=True):
-            source_node = book_graph.get_node(source)
-            if source_node and source_node.node_type == "nonfiction":
-                if data.get("edge_type") in ["related-concept", "fiction-nonfiction"]:
-                    related_nonfiction_ids.add(source) 
-        return sorted(list(related_nonfiction_ids)) 
-
-    def _get_branch_points(self, node_id, book_graph):
-        """
-        Get branch points originating from a node based on 'branch-point' edges.
+    def _apply_navigation(self, file_path, navigation):
+        """Read a node content file, replace its navigation fields and write it back. Raises on failure."""
+        full_path = self.path_manager.get_full_content_path(file_path)
+        if not full_path or not self.json_file_manager.exists(full_path):
+            raise FileNotFoundError(full_path)
+        node_content = self.json_file_manager.read_json(full_path)
+        
+        if "navigation" not in node_content:
+            node_content["navigation"] = {}
+        
+        # --- Update Navigation Fields ---
+        for key in ("next", "previous"):
+            if navigation[key]: node_content["navigation"][key] = navigation[key]
+            elif key in node_content["navigation"]: del node_content["navigation"][key] 
+        # Lists are always assigned (empty list if none)
+        for key in ("alternateVersions", "relatedNonFiction", "branchPoints"):
+            node_content["navigation"][key] = navigation[key]
+
+        # --- Save Updated Content (skipped if nothing changed) ---
+        self.json_file_manager.write_json(full_path, node_content)
+
+    def write_navigation_updates(self, updates, max_workers=1, progress_callback=None):
+        """
+        Write navigation blocks computed by build_navigation_updates.
+        With more than one worker, files are read and written concurrently; the
+        workers join the caller's transaction, if any. Failures are collected per
+        file in last_write_errors instead of stopping the batch; nodes without a
+        content file are skipped and listed in last_missing_files.
         
         Args:
-            node_id (str): The source node ID.
-            book_graph: The book graph.
+            updates (dict): node_id -> (file_path, navigation).
+            max_workers (int, optional): Number of worker threads (1 writes on the calling thread).
+            progress_callback (callable, optional): Called as progress_callback(done, total)
+                on the calling thread after each file.
+            
+        Returns:
+            int: Number of node content files successfully updated.
+        """
+        self.last_write_errors = {}
+        self.last_missing_files = []
+        total = len(updates)
+        success_count = 0
+        if max_workers <= 1 or total <= 1:
+            for done, (node_id, (file_path, navigation)) in enumerate(updates.items(), 1):
+                try:
+                    self._apply_navigation(file_path, navigation); success_count += 1
+                except FileNotFoundError:
+                    self.last_missing_files.append(node_id)
+                except Exception as e:
+                    self.last_write_errors[node_id] = f"{type(e).__name__}: {e}"
+                if progress_callback: progress_callback(done, total)
+        else:
+            transaction = self.json_file_manager.current_transaction()
+            def write_one(file_path, navigation):
+                with self.json_file_manager.join_transaction(transaction):
+                    self._apply_navigation(file_path, navigation)
+            with ThreadPoolExecutor(max_workers=min(max_workers, total), thread_name_prefix="NavigationWriter") as executor:
+                futures = {executor.submit(write_one, file_path, navigation): node_id for node_id, (file_path, navigation) in updates.items()}
+                for done, future in enumerate(as_completed(futures), 1):
+                    try:
+                        future.result(); success_count += 1
+                    except FileNotFoundError:
+                        self.last_missing_files.append(futures[future])
+                    except Exception as e:
+                        self.last_write_errors[futures[future]] = f"{type(e).__name__}: {e}"
+                    if progress_callback: progress_callback(done, total)
+        if self.last_missing_files: log.warning("Node content files not found for %s nodes, navigation not updated: %s", len(self.last_missing_files), self.last_missing_files)
+        for node_id, error in self.last_write_errors.items():
+            log.error("ERROR updating node navigation for %s: %s", node_id, error)
+        return success_count
+
+    def update_all_node_navigation(self, book_graph, max_workers=NAVIGATION_WORKERS, progress_callback=None):
+        """
+        Update navigation data for all nodes in the book graph.
+        All navigation blocks are computed from the graph first; the content
+        files are then rewritten concurrently by write_navigation_updates.
+        
+        Args:
+            book_graph: The book graph containing connections.
+            max_workers (int, optional): Number of worker threads for file I/O.
+            progress_callback (callable, optional): Called as progress_callback(done, total).
             
         Returns:
-            list: List of branch point dictionaries [{text, targetNodeId}], or empty list.
-        """
-        branch_points = []
-        for _, target, data in book_graph.graph.out_edges(node_id, data=True):
-            if data.get("edge_type") == "branch-point":
-                # Assumes branch text might be stored in edge metadata
-                branch_text = data.get("metadata", {}).get("text", f"Branch to {target}") 
-                branch_points.append({
-                    "text": branch_text, # Need a way to define this text, using placeholder
-                    "targetNodeId": target
-                })
-        return branch_points
-
-    def update_all_node_navigation(self, book_graph):
-        """Update navigation data for all nodes in the book graph."""
+            int: Number of node content files successfully updated.
+        """
+        log.info("Attempting to update navigation for %s nodes...", book_graph.graph.number_of_nodes())
+        try:
+            updates = self.build_navigation_updates(None, book_graph)
+        except Exception as e:
+            log.error("ERROR building navigation data: %s", e)
+            traceback.print_exc()
+            return 0
+        success_count = self.write_navigation_updates(updates, max_workers=max_workers, progress_callback=progress_callback)
+        log.info("Finished updating navigation data. Successfully updated %s node content files%s.", success_count, f' ({len(self.last_write_errors)} failed)' if self.last_write_errors else '')
+        return success_count
+
+    def get_affected_nodes(self, book_graph, node_ids=None, edges=None):
+        """
+        Work out the minimal set of nodes whose navigation block depends on a change set.
+        
+        A node's navigation is built only from its own incident edges, plus the
+        povCharacter/node_type of the node at the other end of 'character-pov' and
+        'related-concept'/'fiction-nonfiction' edges. So:
+        - an added, updated or removed edge affects its two endpoints (this covers
+          the critical-path neighbours of a 'critical-path' edge);
+        - an added or updated node affects itself, the base nodes pointing at it via
+          'character-pov' edges, and the counterparts of its
+          'related-concept'/'fiction-nonfiction' edges.
+        
+        Args:
+            book_graph: The book graph, already reflecting the change.
+            node_ids (iterable, optional): IDs of added or updated nodes.
+            edges (iterable, optional): (source_id, target_id) pairs of added,
+                updated or removed edges.
+            
+        Returns:
+            set: IDs of nodes still in the graph whose navigation may have changed.
+        """
+        graph = book_graph.graph
+        affected = set()
+        for source_id, target_id in edges or ():
+            affected.add(source_id)
+            affected.add(target_id)
+        for node_id in node_ids or ():
+            if node_id not in graph: continue
+            affected.add(node_id)
+            for source, _, data in graph.in_edges(node_id, data=True):
+                edge_type = data.get("edge_type")
+                if edge_type == "character-pov" or edge_type in RELATED_NONFICTION_EDGE_TYPES:
+                    affected.add(source)
+            for _, target, data in graph.out_edges(node_id, data=True):
+                if data.get("edge_type") in RELATED_NONFICTION_EDGE_TYPES:
+                    affected.add(target)
+        return {node_id for node_id in affected if node_id in graph}
+
+    def update_changed_node_navigation(self, book_graph, node_ids=None, edges=None):
+        """
+        Update navigation data only for the nodes affected by a change set.
+        
+        Args:
+            book_graph: The book graph, already reflecting the change.
+            node_ids (iterable, optional): IDs of added or updated nodes.
+            edges (iterable, optional): (source_id, target_id) pairs of added,
+                updated or removed edges.
+            
+        Returns:
+            int: Number of node content files successfully updated.
+        """
+        affected = self.get_affected_nodes(book_graph, node_ids=node_ids, edges=edges)
         success_count = 0
-        nodes_to_update = book_graph.get_all_nodes()
-        print(f"Attempting to update navigation for {len(nodes_to_update)} nodes...")
-        for node in nodes_to_update:
-            if node.node_type != "book": 
-                if self.update_node_navigation(node.id, book_graph):
-                    success_count += 1
-        print(f"Finished updating navigation data. Successfully updated {success_count} node content files.")
+        for node_id in affected:
+            if self.update_node_navigation(node_id, book_graph):
+                success_count += 1
+        log.info("Updated navigation for %s of %s affected nodes.", success_count, len(affected))
         return success_count
 
     def update_critical_path_nodes(self, book_graph):
         """Update the navigation only for nodes involved in 'critical-path' edges."""
         updated_nodes = set()
         success = True
-        print("Updating navigation for nodes in critical path...")
+        log.info("Updating navigation for nodes in critical path...")
         try:
-            for source, target, data in book_graph.graph.edges(data=True):
-                if data.get("edge_type") == "critical-path":
-                    if source not in updated_nodes:
-                        if not self.update_node_navigation(source, book_graph): success = False 
-                        updated_nodes.add(source)
-                    if target not in updated_nodes:
-                        if not self.update_node_navigation(target, book_graph): success = False 
-                        updated_nodes.add(target)
-            print(f"Finished updating critical path navigation for {len(updated_nodes)} nodes.")
+            for source, target in book_graph.get_edges_by_type("critical-path"):
+                if source not in updated_nodes:
+                    if not self.update_node_navigation(source, book_graph): success = False 
+                    updated_nodes.add(source)
+                if target not in updated_nodes:
+                    if not self.update_node_navigation(target, book_graph): success = False 
+                    updated_nodes.add(target)
+            log.info("Finished updating critical path navigation for %s nodes.", len(updated_nodes))
             return success
         except Exception as e:
-            print(f"ERROR updating critical path navigation: {e}")
+            log.error("ERROR updating critical path navigation: %s", e)
             traceback.print_exc()
             return False
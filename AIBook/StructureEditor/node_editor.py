@@ -3,6 +3,7 @@ Node editor panel for the Interactive Book Editor.
 FIXED: Ensured full implementations for all tab classes are included.
 FIXED: Corrected layout initialization in tab widgets to avoid conflicts.
 REVISED: Show 'POV Character' field for 'fiction' and 'character_pov' types.
+REVISED: Output goes through the node_editor logger (editor_log) instead of print().
 """
 
 from PyQt5.QtWidgets import (
@@ -13,6 +14,10 @@ from PyQt5.QtCore import pyqtSignal, Qt
 import traceback # For debugging potential errors in updates
 
 from editor_panel import EditorPanel
+from editor_log import get_logger
+
+log = get_logger(__name__)
+
 # Assuming Node is defined in node.py for type hints if needed
 # from node import Node
 
@@ -76,38 +81,38 @@ class BasicNodePropertiesTab(QWidget):
     def update_for_node(self, node):
         """Update the tab for the selected node."""
         try:
-            print(f"--- BasicNodePropertiesTab: update_for_node START (Node ID: {getattr(node, 'id', 'N/A')}) ---")
+            log.debug("--- BasicNodePropertiesTab: update_for_node START (Node ID: %s) ---", getattr(node, 'id', 'N/A'))
             if not node:
-                 print("BasicNodePropertiesTab: Received None node. Clearing fields."); self.node_id_label.setText(""); self.node_title_edit.setText(""); self.node_type_combo.setCurrentIndex(0); self.node_chapter_combo.setEditText(""); self.pov_character_edit.setText(""); self.pov_character_label.hide(); self.pov_character_edit.hide(); return
+                 log.debug("BasicNodePropertiesTab: Received None node. Clearing fields."); self.node_id_label.setText(""); self.node_title_edit.setText(""); self.node_type_combo.setCurrentIndex(0); self.node_chapter_combo.setEditText(""); self.pov_character_edit.setText(""); self.pov_character_label.hide(); self.pov_character_edit.hide(); return
 
-            print("BasicNodePropertiesTab: Blocking signals...")
+            log.debug("BasicNodePropertiesTab: Blocking signals...")
             self.node_title_edit.blockSignals(True); self.node_type_combo.blockSignals(True); self.node_chapter_combo.blockSignals(True); self.pov_character_edit.blockSignals(True)
 
-            node_id_val = node.id or "N/A"; print(f"BasicNodePropertiesTab: Setting ID Label to: '{node_id_val}'"); self.node_id_label.setText(node_id_val); print("BasicNodePropertiesTab: ID Label set.")
-            node_title_val = node.title or ""; print(f"BasicNodePropertiesTab: Setting Title Edit to: '{node_title_val}'"); self.node_title_edit.setText(node_title_val); print("BasicNodePropertiesTab: Title Edit set.")
-            node_type = node.node_type or "fiction"; print(f"BasicNodePropertiesTab: Setting Type Combo to: '{node_type}'"); index = self.node_type_combo.findText(node_type); target_index = index if index >= 0 else 0; self.node_type_combo.setCurrentIndex(target_index); print(f"BasicNodePropertiesTab: Type Combo index set to {target_index}.")
-            is_pov_editable = (node_type in ["fiction", "character_pov"]); print(f"BasicNodePropertiesTab: Setting POV fields visible: {is_pov_editable}"); self.pov_character_label.setVisible(is_pov_editable); self.pov_character_edit.setVisible(is_pov_editable)
-            if is_pov_editable: metadata = getattr(node, 'metadata', {}); pov_char_val = metadata.get("povCharacter", ""); print(f"BasicNodePropertiesTab: Setting POV Edit to: '{pov_char_val}'"); self.pov_character_edit.setText(pov_char_val); print("BasicNodePropertiesTab: POV Edit set.")
-            else: print("BasicNodePropertiesTab: Clearing POV Edit."); self.pov_character_edit.clear()
-            current_chapter = node.chapter or ""; print(f"BasicNodePropertiesTab: Setting Chapter Combo to: '{current_chapter}'"); index = self.node_chapter_combo.findText(current_chapter)
-            if index >= 0: self.node_chapter_combo.setCurrentIndex(index); print(f"BasicNodePropertiesTab: Chapter Combo index set to {index}.")
+            node_id_val = node.id or "N/A"; log.debug("BasicNodePropertiesTab: Setting ID Label to: '%s'", node_id_val); self.node_id_label.setText(node_id_val); log.debug("BasicNodePropertiesTab: ID Label set.")
+            node_title_val = node.title or ""; log.debug("BasicNodePropertiesTab: Setting Title Edit to: '%s'", node_title_val); self.node_title_edit.setText(node_title_val); log.debug("BasicNodePropertiesTab: Title Edit set.")
+            node_type = node.node_type or "fiction"; log.debug("BasicNodePropertiesTab: Setting Type Combo to: '%s'", node_type); index = self.node_type_combo.findText(node_type); target_index = index if index >= 0 else 0; self.node_type_combo.setCurrentIndex(target_index); log.debug("BasicNodePropertiesTab: Type Combo index set to %s.", target_index)
+            is_pov_editable = (node_type in ["fiction", "character_pov"]); log.debug("BasicNodePropertiesTab: Setting POV fields visible: %s", is_pov_editable); self.pov_character_label.setVisible(is_pov_editable); self.pov_character_edit.setVisible(is_pov_editable)
+            if is_pov_editable: metadata = getattr(node, 'metadata', {}); pov_char_val = metadata.get("povCharacter", ""); log.debug("BasicNodePropertiesTab: Setting POV Edit to: '%s'", pov_char_val); self.pov_character_edit.setText(pov_char_val); log.debug("BasicNodePropertiesTab: POV Edit set.")
+            else: log.debug("BasicNodePropertiesTab: Clearing POV Edit."); self.pov_character_edit.clear()
+            current_chapter = node.chapter or ""; log.debug("BasicNodePropertiesTab: Setting Chapter Combo to: '%s'", current_chapter); index = self.node_chapter_combo.findText(current_chapter)
+            if index >= 0: self.node_chapter_combo.setCurrentIndex(index); log.debug("BasicNodePropertiesTab: Chapter Combo index set to %s.", index)
             else:
-                print(f"BasicNodePropertiesTab: Chapter '{current_chapter}' not in list, setting edit text.")
+                log.debug("BasicNodePropertiesTab: Chapter '%s' not in list, setting edit text.", current_chapter)
                 # Check if lineEdit exists and text is different before setting
                 if self.node_chapter_combo.lineEdit() and self.node_chapter_combo.lineEdit().text() != current_chapter: self.node_chapter_combo.setEditText(current_chapter)
                 elif not self.node_chapter_combo.lineEdit(): self.node_chapter_combo.setEditText(current_chapter) # Safety check
-                print(f"BasicNodePropertiesTab: Chapter Combo edit text set.")
+                log.debug("BasicNodePropertiesTab: Chapter Combo edit text set.")
 
-            print("BasicNodePropertiesTab: Unblocking signals..."); self.node_title_edit.blockSignals(False); self.node_type_combo.blockSignals(False); self.node_chapter_combo.blockSignals(False); self.pov_character_edit.blockSignals(False)
-            print("BasicNodePropertiesTab: Forcing update/repaint..."); self.update(); print(f"--- BasicNodePropertiesTab: update_for_node END (Node ID: {getattr(node, 'id', 'N/A')}) ---")
+            log.debug("BasicNodePropertiesTab: Unblocking signals..."); self.node_title_edit.blockSignals(False); self.node_type_combo.blockSignals(False); self.node_chapter_combo.blockSignals(False); self.pov_character_edit.blockSignals(False)
+            log.debug("BasicNodePropertiesTab: Forcing update/repaint..."); self.update(); log.debug("--- BasicNodePropertiesTab: update_for_node END (Node ID: %s) ---", getattr(node, 'id', 'N/A'))
         except Exception as e:
-             print(f"ERROR in BasicNodePropertiesTab.update_for_node: {e}")
+             log.error("ERROR in BasicNodePropertiesTab.update_for_node: %s", e)
              traceback.print_exc()
 
     def set_available_chapters(self, chapters):
         """Set the available chapters for the chapter combo box."""
         try:
-            print(f"BasicNodePropertiesTab: Setting {len(chapters)} available chapters.")
+            log.debug("BasicNodePropertiesTab: Setting %s available chapters.", len(chapters))
             self.node_chapter_combo.blockSignals(True)
             current_text = self.node_chapter_combo.currentText(); self.node_chapter_combo.clear(); self.node_chapter_combo.addItem("")
             chapter_ids = set()
@@ -116,9 +121,9 @@ class BasicNodePropertiesTab(QWidget):
             index = self.node_chapter_combo.findText(current_text);
             if index >= 0: self.node_chapter_combo.setCurrentIndex(index)
             else: self.node_chapter_combo.setEditText(current_text);
-            self.node_chapter_combo.blockSignals(False); print("BasicNodePropertiesTab: Available chapters set.")
+            self.node_chapter_combo.blockSignals(False); log.debug("BasicNodePropertiesTab: Available chapters set.")
         except Exception as e:
-             print(f"ERROR in BasicNodePropertiesTab.set_available_chapters: {e}")
+             log.error("ERROR in BasicNodePropertiesTab.set_available_chapters: %s", e)
              traceback.print_exc()
 
 
@@ -149,7 +154,7 @@ class FileDetailsTab(QWidget):
                  except (ValueError, TypeError): self.node_position_label.setText("(Invalid Pos)")
             else: self.node_position_label.setText("(N/A)")
         except Exception as e:
-             print(f"ERROR in FileDetailsTab.update_for_node: {e}")
+             log.error("ERROR in FileDetailsTab.update_for_node: %s", e)
              traceback.print_exc()
 
 
@@ -208,11 +213,11 @@ class ConnectionsTab(QWidget):
                         if target_node:
                             self.outgoing_layout.addWidget(QLabel(f"{target_node.title} ({edge_type})"))
                             outgoing_found = True
-                        else: print(f"ConnectionsTab: Warning - Target node '{target}' not found.")
-                    except Exception as e_inner: print(f"ConnectionsTab: Error processing single outgoing edge to '{target}': {e_inner}")
+                        else: log.warning("ConnectionsTab: Warning - Target node '%s' not found.", target)
+                    except Exception as e_inner: log.error("ConnectionsTab: Error processing single outgoing edge to '%s': %s", target, e_inner)
             else:
-                 print(f"ConnectionsTab: Cannot get outgoing edges for invalid node object.")
-        except Exception as e_outer: print(f"ConnectionsTab: Error iterating outgoing edges for '{getattr(node, 'id', 'N/A')}': {e_outer}")
+                 log.warning("ConnectionsTab: Cannot get outgoing edges for invalid node object.")
+        except Exception as e_outer: log.error("ConnectionsTab: Error iterating outgoing edges for '%s': %s", getattr(node, 'id', 'N/A'), e_outer)
         if not outgoing_found: self.outgoing_layout.addWidget(QLabel("No outgoing connections"))
 
         # Add incoming connections
@@ -228,11 +233,11 @@ class ConnectionsTab(QWidget):
                         if source_node:
                             self.incoming_layout.addWidget(QLabel(f"{source_node.title} ({edge_type})"))
                             incoming_found = True
-                        else: print(f"ConnectionsTab: Warning - Source node '{source}' not found.")
-                    except Exception as e_inner: print(f"ConnectionsTab: Error processing single incoming edge from '{source}': {e_inner}")
+                        else: log.warning("ConnectionsTab: Warning - Source node '%s' not found.", source)
+                    except Exception as e_inner: log.error("ConnectionsTab: Error processing single incoming edge from '%s': %s", source, e_inner)
             else:
-                 print(f"ConnectionsTab: Cannot get incoming edges for invalid node object.")
-        except Exception as e_outer: print(f"ConnectionsTab: Error iterating incoming edges for '{getattr(node, 'id', 'N/A')}': {e_outer}")
+                 log.warning("ConnectionsTab: Cannot get incoming edges for invalid node object.")
+        except Exception as e_outer: log.error("ConnectionsTab: Error iterating incoming edges for '%s': %s", getattr(node, 'id', 'N/A'), e_outer)
         if not incoming_found: self.incoming_layout.addWidget(QLabel("No incoming connections"))
 
 
@@ -277,27 +282,27 @@ class NodeEditorPanel(EditorPanel):
 
     def update_for_node(self, node):
         """Update the panel for the selected node."""
-        print(f"NodeEditorPanel: update_for_node called for node ID: {getattr(node, 'id', 'N/A')}")
+        log.debug("NodeEditorPanel: update_for_node called for node ID: %s", getattr(node, 'id', 'N/A'))
         if not node: self.clear_panel(); return
         self.current_node = node
         try:
-            print("NodeEditorPanel: Updating Basic tab...")
+            log.debug("NodeEditorPanel: Updating Basic tab...")
             self.basic_tab.update_for_node(node)
-            print("NodeEditorPanel: Updating File tab...")
+            log.debug("NodeEditorPanel: Updating File tab...")
             self.file_tab.update_for_node(node)
             if self.book_graph:
-                print("NodeEditorPanel: Updating Connections tab...")
+                log.debug("NodeEditorPanel: Updating Connections tab...")
                 self.connections_tab.update_for_node(node, self.book_graph)
-            else: print("NodeEditorPanel: Warning - book_graph not set.")
-            print("NodeEditorPanel: update_for_node finished.")
+            else: log.warning("NodeEditorPanel: Warning - book_graph not set.")
+            log.debug("NodeEditorPanel: update_for_node finished.")
         except Exception as e:
-             print(f"ERROR in NodeEditorPanel.update_for_node: {e}")
+             log.error("ERROR in NodeEditorPanel.update_for_node: %s", e)
              traceback.print_exc()
 
 
     def clear_panel(self):
         """Clear the panel."""
-        print("NodeEditorPanel: Clearing panel.")
+        log.debug("NodeEditorPanel: Clearing panel.")
         # Import Node locally only when needed for the dummy object
         try:
             from node import Node
@@ -306,14 +311,14 @@ class NodeEditorPanel(EditorPanel):
             self.file_tab.update_for_node(dummy_node)
             self.connections_tab.update_for_node(dummy_node, None)
         except Exception as e:
-             print(f"ERROR in NodeEditorPanel.clear_panel: {e}")
+             log.error("ERROR in NodeEditorPanel.clear_panel: %s", e)
              traceback.print_exc()
         self.current_node = None
 
     def on_property_changed(self, property_name, new_value):
         """Handle when a property is changed."""
         if self.current_node:
-            print(f"NodeEditorPanel: Property '{property_name}' changed to '{new_value}' for node {self.current_node.id}")
+            log.debug("NodeEditorPanel: Property '%s' changed to '%s' for node %s", property_name, new_value, self.current_node.id)
             try:
                 if property_name.startswith("metadata."):
                      metadata_key = property_name.split(".", 1)[1]
@@ -324,17 +329,17 @@ class NodeEditorPanel(EditorPanel):
                      if new_value is None or new_value == "":
                           # Use pop with default to avoid KeyError if key doesn't exist
                           self.current_node.metadata.pop(metadata_key, None)
-                          print(f"NodeEditorPanel: Removed metadata key '{metadata_key}' (if existed)")
+                          log.debug("NodeEditorPanel: Removed metadata key '%s' (if existed)", metadata_key)
                      else:
                           self.current_node.metadata[metadata_key] = new_value
-                          print(f"NodeEditorPanel: Set metadata '{metadata_key}' to '{new_value}'")
+                          log.debug("NodeEditorPanel: Set metadata '%s' to '%s'", metadata_key, new_value)
                 else:
                      if hasattr(self.current_node, property_name):
                           setattr(self.current_node, property_name, new_value)
-                     else: print(f"NodeEditorPanel: Warning - Node object does not have attribute '{property_name}'")
+                     else: log.warning("NodeEditorPanel: Warning - Node object does not have attribute '%s'", property_name)
                 # Emit signal only after successful update attempt
                 self.node_updated.emit(self.current_node)
             except Exception as e:
-                 print(f"ERROR in NodeEditorPanel.on_property_changed: {e}")
+                 log.error("ERROR in NodeEditorPanel.on_property_changed: %s", e)
                  traceback.print_exc()
 
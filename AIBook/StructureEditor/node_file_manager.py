@@ -10,16 +10,21 @@ import traceback # For detailed error logging
 from node import Node
 from path_manager import PathManager
 from character_pov_manager import CharacterPOVManager
+from json_file_manager import JsonFileManager
+from editor_log import get_logger
+
+log = get_logger(__name__)
 
 class NodeFileManager:
     """
     Manages node content files.
     """
     
-    def __init__(self, path_manager=None, character_pov_manager=None):
+    def __init__(self, path_manager=None, character_pov_manager=None, json_file_manager=None):
         """Initialize a new NodeFileManager instance."""
         self.path_manager = path_manager or PathManager()
         self.character_pov_manager = character_pov_manager or CharacterPOVManager()
+        self.json_file_manager = json_file_manager or JsonFileManager()
     
     def save_node_content_file(self, node, structure_data=None):
         """Save a node's content to its JSON file."""
@@ -38,7 +43,7 @@ class NodeFileManager:
             
             os.makedirs(os.path.dirname(full_path), exist_ok=True)
             
-            if not os.path.exists(full_path):
+            if not self.json_file_manager.exists(full_path):
                 character_name = None
                 base_node_id = None
                 if is_pov_node:
@@ -60,11 +65,11 @@ class NodeFileManager:
                      povs = structure_data["characterPOVs"][node.id]
                      for pov in povs: node_content["navigation"]["alternateVersions"].append({"povCharacter": pov["character"], "nodeId": pov["nodeId"]})
                 
-                with open(full_path, 'w', encoding='utf-8') as f: json.dump(node_content, f, indent=2, ensure_ascii=False)
-                print(f"Created node content file: {full_path}")
+                self.json_file_manager.write_json(full_path, node_content)
+                log.info("Created node content file: %s", full_path)
             return True
         except Exception as e:
-            print(f"Error saving node content file {node.id}: {e}")
+            log.error("Error saving node content file %s: %s", node.id, e)
             traceback.print_exc()
             return False
 
@@ -74,9 +79,9 @@ class NodeFileManager:
         try:
             full_path = self.path_manager.get_full_content_path(file_path)
             if not full_path or not os.path.isfile(full_path): return None
-            with open(full_path, 'r', encoding='utf-8') as f: return json.load(f)
+            return self.json_file_manager.read_json(full_path)
         except Exception as e:
-            print(f"Error loading node content file {file_path}: {e}")
+            log.error("Error loading node content file %s: %s", file_path, e)
             traceback.print_exc()
             return None
     
@@ -85,7 +90,7 @@ class NodeFileManager:
         Import a node from an external JSON file. Ensures povCharacter metadata is stored.
         """
         if not os.path.isfile(file_path): return None
-        print(f"NodeFileManager: Importing node from {file_path}")
+        log.info("NodeFileManager: Importing node from %s", file_path)
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
                 node_data = json.load(f)
@@ -103,13 +108,13 @@ class NodeFileManager:
             
             if pov_character:
                  node.metadata["povCharacter"] = pov_character
-                 print(f"NodeFileManager: Stored povCharacter '{pov_character}' for node {node.id}")
+                 log.debug("NodeFileManager: Stored povCharacter '%s' for node %s", pov_character, node.id)
             elif self.character_pov_manager.is_character_pov_node(node.id):
                  # Try to infer if marked as POV node but missing explicit metadata
                  inferred_char = self.character_pov_manager.get_character_from_pov_node(node.id)
                  if inferred_char:
                       node.metadata["povCharacter"] = inferred_char
-                      print(f"NodeFileManager: Inferred and stored povCharacter '{inferred_char}' for node {node.id}")
+                      log.debug("NodeFileManager: Inferred and stored povCharacter '%s' for node %s", inferred_char, node.id)
 
 
             # --- Handle ID conflicts ---
@@ -119,7 +124,7 @@ class NodeFileManager:
                 counter = 1
                 while f"{base_id}_{counter}" in book_graph.graph.nodes: counter += 1
                 node.id = f"{base_id}_{counter}"
-                print(f"NodeFileManager: ID conflict. Renamed imported node from '{original_id}' to '{node.id}'")
+                log.info("NodeFileManager: ID conflict. Renamed imported node from '%s' to '%s'", original_id, node.id)
                 # Update ID in node_data if we copy it later? Less critical if we use the Node object.
 
             # --- Add Node to Graph ---
@@ -145,18 +150,18 @@ class NodeFileManager:
                               shutil.copy2(file_path, final_target_path) # Copy original file to new location/name
                               node.file_path = self.path_manager.normalize_path(final_rel_path)
                               book_graph.update_node(node) # Update graph with correct file path
-                              print(f"NodeFileManager: Copied node file to {final_target_path}")
+                              log.info("NodeFileManager: Copied node file to %s", final_target_path)
                          except Exception as copy_e:
-                              print(f"NodeFileManager: ERROR copying file to {final_target_path}: {copy_e}")
+                              log.error("NodeFileManager: ERROR copying file to %s: %s", final_target_path, copy_e)
                               # Should we remove the node from the graph if copy fails? Maybe.
                               book_graph.remove_node(node.id)
                               return None
                     else:
-                         print(f"NodeFileManager: ERROR ensuring target directory exists: {target_dir}")
+                         log.error("NodeFileManager: ERROR ensuring target directory exists: %s", target_dir)
                          book_graph.remove_node(node.id)
                          return None
                 else:
-                     print("NodeFileManager: ERROR could not determine target path.")
+                     log.error("NodeFileManager: ERROR could not determine target path.")
                      book_graph.remove_node(node.id)
                      return None
 
@@ -178,11 +183,11 @@ class NodeFileManager:
                                     "character": character_name, "nodeId": node.id, "filePath": node.file_path
                                 })
             
-            print(f"NodeFileManager: Node {node.id} imported successfully.")
+            log.info("NodeFileManager: Node %s imported successfully.", node.id)
             return node
             
         except Exception as e:
-            print(f"ERROR importing node from {file_path}: {e}")
+            log.error("ERROR importing node from %s: %s", file_path, e)
             traceback.print_exc()
             # Clean up if node was partially added?
             if 'node' in locals() and node.id in book_graph.graph.nodes:
@@ -231,9 +236,9 @@ class NodeFileManager:
                 # Update defaultStartNode
                 if structure_data.get("defaultStartNode") == node_id: structure_data["defaultStartNode"] = ""
             
-            print(f"NodeFileManager: Node {node_id} removed from model.")
+            log.info("NodeFileManager: Node %s removed from model.", node_id)
             return True
         except Exception as e:
-            print(f"ERROR removing node {node_id}: {e}")
+            log.error("ERROR removing node %s: %s", node_id, e)
             traceback.print_exc()
             return False
@@ -5,6 +5,10 @@ Removed self-import line.
 """
 
 import os
+from editor_log import get_logger
+
+log = get_logger(__name__)
+
 # Removed the problematic self-import: from path_manager import PathManager 
 
 class PathManager:
@@ -27,7 +31,7 @@ class PathManager:
         self.project_root = None # Initialize to None
         if project_root:
              self.set_project_root(project_root) # Use setter to validate
-        print(f"PathManager initialized. Project root: {self.project_root}")
+        log.info("PathManager initialized. Project root: %s", self.project_root)
 
 
     def set_project_root(self, root_path):
@@ -40,14 +44,14 @@ class PathManager:
         # Basic validation: check if it's a string and potentially exists
         if isinstance(root_path, str) and os.path.isdir(root_path):
              self.project_root = os.path.abspath(root_path) # Store absolute path
-             print(f"PathManager: Project root set to {self.project_root}")
+             log.info("PathManager: Project root set to %s", self.project_root)
         elif isinstance(root_path, str):
              # Allow setting path even if dir doesn't exist yet (e.g., during new project creation)
              self.project_root = os.path.abspath(root_path)
-             print(f"PathManager: Project root set to {self.project_root} (directory may not exist yet).")
+             log.info("PathManager: Project root set to %s (directory may not exist yet).", self.project_root)
         else:
              self.project_root = None
-             print(f"PathManager: Invalid project root path provided: {root_path}")
+             log.warning("PathManager: Invalid project root path provided: %s", root_path)
 
 
     def get_book_structure_path(self):
@@ -58,12 +62,42 @@ class PathManager:
             str: Absolute path to book-structure.json, or None if project root is not set.
         """
         if not self.project_root:
-            print("PathManager: Cannot get structure path, project root not set.")
+            log.warning("PathManager: Cannot get structure path, project root not set.")
             return None
         
         # Ensure using 'content' subdirectory
         return os.path.join(self.project_root, "content", "book-structure.json")
 
+    def get_node_positions_path(self):
+        """
+        Get the absolute path to the node-positions.json sidecar next to book-structure.json.
+        
+        Returns:
+            str: Absolute path to node-positions.json, or None if project root is not set.
+        """
+        if not self.project_root: return None
+        return os.path.join(self.project_root, "content", "node-positions.json")
+
+    def get_structure_dir(self):
+        """
+        Get the absolute path to the content/structure directory of a sharded project.
+        
+        Returns:
+            str: Absolute path to the structure directory, or None if project root is not set.
+        """
+        if not self.project_root: return None
+        return os.path.join(self.project_root, "content", "structure")
+
+    def get_structure_manifest_path(self):
+        """
+        Get the absolute path to the manifest.json of a sharded project.
+        
+        Returns:
+            str: Absolute path to structure/manifest.json, or None if project root is not set.
+        """
+        structure_dir = self.get_structure_dir()
+        return os.path.join(structure_dir, "manifest.json") if structure_dir else None
+
     def normalize_path(self, path):
         """
         Normalize a file path to use forward slashes for web/internal consistency.
@@ -90,7 +124,7 @@ class PathManager:
             str: The default relative file path (e.g., "fiction/node_id.json").
         """
         if not node or not hasattr(node, 'id') or not hasattr(node, 'node_type'):
-             print("PathManager: ERROR - Cannot generate default path, invalid node object.")
+             log.error("PathManager: ERROR - Cannot generate default path, invalid node object.")
              return f"unknown/{'unknown_node'}.json" # Fallback path
 
         node_id_safe = "".join(c for c in node.id if c.isalnum() or c in ('-', '_')) # Basic sanitize
@@ -119,10 +153,10 @@ class PathManager:
                  relative_path is not set/valid.
         """
         if not self.project_root:
-            print("PathManager: Cannot get full content path, project root not set.")
+            log.warning("PathManager: Cannot get full content path, project root not set.")
             return None
         if not relative_path:
-             print("PathManager: Cannot get full content path, relative path is empty.")
+             log.warning("PathManager: Cannot get full content path, relative path is empty.")
              return None
              
         # Ensure relative path uses correct separators for os.path.join
@@ -148,7 +182,7 @@ class PathManager:
             bool: True if the directory exists or was created, False otherwise.
         """
         if not path:
-             print("PathManager: Cannot ensure directory, path is empty.")
+             log.warning("PathManager: Cannot ensure directory, path is empty.")
              return False
              
         try:
@@ -160,10 +194,10 @@ class PathManager:
                  abs_path = path
                  
             os.makedirs(abs_path, exist_ok=True)
-            # print(f"PathManager: Ensured directory exists: {abs_path}") # Verbose
+            log.debug("PathManager: Ensured directory exists: %s", abs_path)
             return True
         except (IOError, OSError, TypeError) as e: # Added TypeError
-            print(f"PathManager: ERROR ensuring directory exists '{path}': {e}")
+            log.error("PathManager: ERROR ensuring directory exists '%s': %s", path, e)
             return False
 
     def join_paths(self, *paths):
@@ -207,6 +241,6 @@ class PathManager:
             relative = os.path.relpath(abs_full_path, content_dir)
             return self.normalize_path(relative)
         else:
-            print(f"PathManager: Path '{full_path}' is outside the content directory '{content_dir}'.")
+            log.info("PathManager: Path '%s' is outside the content directory '%s'.", full_path, content_dir)
             return None # Path is outside the content directory
 
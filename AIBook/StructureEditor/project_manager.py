@@ -6,11 +6,15 @@ default graph object, and default node file. Returns the graph object.
 """
 
 import os
-import json
 import traceback # For detailed error logging
 from path_manager import PathManager
 from node import Node # Required for creating default nodes
 from book_graph import BookGraph # Required for returning the graph object
+from json_file_manager import JsonFileManager
+from editor_log import get_logger
+
+log = get_logger(__name__)
+
 # Removed BookStructureManager and CharacterPOVManager imports as they are not used here anymore
 
 class ProjectManager:
@@ -20,11 +24,17 @@ class ProjectManager:
     the main book-structure.json file itself.
     """
     
-    def __init__(self):
-        """Initialize a new ProjectManager instance."""
+    def __init__(self, json_file_manager=None):
+        """
+        Initialize a new ProjectManager instance.
+        
+        Args:
+            json_file_manager (JsonFileManager, optional): Shared JSON read/write layer.
+        """
         self.project_root = None
         # Initialize PathManager internally
         self.path_manager = PathManager() 
+        self.json_file_manager = json_file_manager or JsonFileManager()
     
     def set_project_root(self, root_path):
         """
@@ -37,7 +47,7 @@ class ProjectManager:
             bool: True if path exists and is set, False otherwise.
         """
         if not isinstance(root_path, str):
-            print(f"ProjectManager: Invalid project root path type: {type(root_path)}")
+            log.warning("ProjectManager: Invalid project root path type: %s", type(root_path))
             self.project_root = None
             self.path_manager.set_project_root(None)
             return False
@@ -45,7 +55,7 @@ class ProjectManager:
         abs_path = os.path.abspath(root_path)
         # Check if it IS a directory (if it exists)
         if os.path.exists(abs_path) and not os.path.isdir(abs_path):
-             print(f"ProjectManager: Error - Path exists but is not a directory: {abs_path}")
+             log.error("ProjectManager: Error - Path exists but is not a directory: %s", abs_path)
              self.project_root = None
              self.path_manager.set_project_root(None)
              return False
@@ -53,7 +63,8 @@ class ProjectManager:
         # Set the path (it might not exist yet during creation)
         self.project_root = abs_path
         self.path_manager.set_project_root(self.project_root) # Update PathManager's root
-        print(f"ProjectManager: Project root set to: {self.project_root}")
+        self.json_file_manager.set_project_root(self.project_root) # Completes or rolls back a save interrupted by a crash
+        log.info("ProjectManager: Project root set to: %s", self.project_root)
         return True
     
     def get_project_root(self):
@@ -75,7 +86,7 @@ class ProjectManager:
         Returns:
             bool: True if created successfully, False otherwise.
         """
-        print(f"ProjectManager: Creating directory structure at: {root_path}")
+        log.info("ProjectManager: Creating directory structure at: %s", root_path)
         try:
             # Create project directory if it doesn't exist
             os.makedirs(root_path, exist_ok=True)
@@ -92,10 +103,10 @@ class ProjectManager:
             # Create character_povs directory within fiction
             os.makedirs(os.path.join(content_dir, "fiction", "character_povs"), exist_ok=True)
             
-            print("ProjectManager: Directory structure created successfully.")
+            log.info("ProjectManager: Directory structure created successfully.")
             return True
         except (IOError, OSError) as e:
-            print(f"ERROR creating project directories: {e}")
+            log.error("ERROR creating project directories: %s", e)
             return False
     
     def create_new_project(self, root_path):
@@ -110,17 +121,17 @@ class ProjectManager:
             tuple: (bool success, BookGraph | None) - Tuple containing success status 
                    and the created BookGraph object, or (False, None) on failure.
         """
-        print(f"ProjectManager: Attempting to create new project structure at: {root_path}")
+        log.info("ProjectManager: Attempting to create new project structure at: %s", root_path)
         try:
             # 1. Create project directories
             if not self.create_project_directories(root_path):
-                print("ProjectManager: Failed to create directories.")
+                log.error("ProjectManager: Failed to create directories.")
                 return False, None # Return tuple on failure
             
             # 2. Set the project root for the internal path manager
             #    This path manager is mainly used here for creating the preface file path.
             if not self.set_project_root(root_path):
-                 print("ProjectManager: Failed to set project root after creating directories.")
+                 log.error("ProjectManager: Failed to set project root after creating directories.")
                  return False, None # Return tuple on failure
 
             # 3. Create an empty book graph object
@@ -184,23 +195,22 @@ class ProjectManager:
             }
             preface_full_path = self.path_manager.get_full_content_path(preface_file_path_rel)
             if not preface_full_path:
-                 print("ProjectManager: ERROR - Could not resolve full path for preface node.")
+                 log.error("ProjectManager: ERROR - Could not resolve full path for preface node.")
                  return False, None 
             preface_dir = os.path.dirname(preface_full_path)
             if not self.path_manager.ensure_directory_exists(preface_dir):
-                 print(f"ProjectManager: ERROR - Could not create directory for preface node: {preface_dir}")
+                 log.error("ProjectManager: ERROR - Could not create directory for preface node: %s", preface_dir)
                  return False, None 
-            with open(preface_full_path, 'w', encoding='utf-8') as f:
-                json.dump(preface_content, f, indent=2, ensure_ascii=False)
-            print(f"ProjectManager: Preface content file created at: {preface_full_path}")
+            self.json_file_manager.write_json(preface_full_path, preface_content)
+            log.info("ProjectManager: Preface content file created at: %s", preface_full_path)
 
             # 10. Return success status and the created book graph object
             #     NOTE: Does NOT save book-structure.json here.
-            print("ProjectManager: New project structure prepared successfully (book_structure.json not saved yet).")
+            log.info("ProjectManager: New project structure prepared successfully (book_structure.json not saved yet).")
             return True, book_graph # Return tuple on success
 
         except Exception as e: # Catch potential errors
-            print(f"ERROR creating new project structure: {e}")
+            log.error("ERROR creating new project structure: %s", e)
             traceback.print_exc()
             return False, None # Return tuple on failure
     
@@ -214,7 +224,7 @@ class ProjectManager:
         if not os.path.isdir(content_dir) or not os.path.isfile(structure_file):
              # Allow check during creation where structure file might not exist yet
              if os.path.isdir(content_dir): 
-                  print("ProjectManager: is_valid_project - Content dir exists, structure file might be created.")
+                  log.info("ProjectManager: is_valid_project - Content dir exists, structure file might be created.")
                   return True # Consider it potentially valid during creation steps
              return False
         return True
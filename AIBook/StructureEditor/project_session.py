@@ -0,0 +1,107 @@
+"""
+ProjectSession class for the Interactive Book Editor.
+Holds the state of the open project that used to be duplicated between DataManager
+and the auto-save manager: one set of managers, one structure snapshot (the data
+last loaded or saved) and the dirty state of the in-memory model.
+"""
+
+import threading
+from functools import cached_property
+from path_manager import PathManager
+from character_pov_manager import CharacterPOVManager
+from json_file_manager import JsonFileManager
+
+class ProjectSession:
+    """
+    Shared state of one open project.
+
+    The managers are created (and their modules imported) on first use, one instance
+    each, and all work with this session's structure snapshot. The snapshot is kept by
+    reference: the structure data is rebuilt from the graph on every save, so the data
+    just written becomes the new snapshot without being copied.
+
+    Auto-save settings and the model lock are kept here too, so they can be set and
+    used before the auto-save manager (and its worker thread) exists.
+
+    Dirty state is a revision counter: every queued change bumps the revision, and a
+    save marks the revision it captured as saved once its files are written. A change
+    whose save failed keeps the session dirty until a save that covers it succeeds.
+    """
+
+    def __init__(self, path_manager=None, character_pov_manager=None, json_file_manager=None):
+        """Initialize a new ProjectSession instance."""
+        self.path_manager = path_manager or PathManager()
+        self.character_pov_manager = character_pov_manager or CharacterPOVManager()
+        self.json_file_manager = json_file_manager or JsonFileManager() # Shared so every manager sees the same file digests and journal
+        self.structure_snapshot = None # Structure data last loaded or saved
+        self.revision = 0 # Bumped by every change to the model
+        self.saved_revision = 0 # Latest revision known to be on disk
+        self._revision_lock = threading.Lock() # Changes are queued on the GUI thread, saves may run on the auto-save worker
+        self.model_lock = threading.RLock() # Guards the BookGraph while a save reads it
+        # Auto-save settings, kept here so setting them does not create the auto-save manager
+        self.auto_save_enabled = True
+        self.auto_save_delay = None # Seconds of quiet before a background save, None for synchronous saves
+
+    # --- Managers, created on first use ---
+    @cached_property
+    def project_manager(self):
+        from project_manager import ProjectManager
+        return ProjectManager(self.json_file_manager)
+
+    @cached_property
+    def book_structure_manager(self):
+        from book_structure_manager import BookStructureManager
+        return BookStructureManager(self.path_manager, self.character_pov_manager, self.json_file_manager, session=self)
+
+    @cached_property
+    def node_file_manager(self):
+        from node_file_manager import NodeFileManager
+        return NodeFileManager(self.path_manager, self.character_pov_manager, self.json_file_manager)
+
+    @cached_property
+    def node_content_updater(self):
+        from node_content_updater import SimplifiedNodeContentUpdater
+        return SimplifiedNodeContentUpdater(self.path_manager, self.json_file_manager)
+
+    @cached_property
+    def auto_save_manager(self):
+        from auto_save_manager import SimplifiedAutoSaveManager
+        manager = SimplifiedAutoSaveManager(self.path_manager, self.character_pov_manager, self.json_file_manager,
+                                            self.book_structure_manager, self.node_file_manager, self.node_content_updater)
+        manager.auto_save_enabled = self.auto_save_enabled
+        if self.auto_save_delay is not None: manager.set_save_delay(self.auto_save_delay) # Starts the worker thread
+        return manager
+
+    def has_auto_save_manager(self):
+        """True if the auto-save manager has been created (so it may hold pending changes)."""
+        return "auto_save_manager" in self.__dict__
+
+    # --- Structure snapshot ---
+    def set_structure_snapshot(self, structure_data):
+        """Adopt structure data that was just loaded or written, without copying it."""
+        self.structure_snapshot = structure_data
+
+    # --- Dirty tracking ---
+    def mark_dirty(self):
+        """Record a change to the model and return its revision."""
+        with self._revision_lock:
+            self.revision += 1
+            return self.revision
+
+    def mark_saved(self, revision=None, contiguous=False):
+        """
+        Record that the model as of a revision (default: the current one) is on disk.
+
+        Args:
+            revision (int | None): The revision the save captured.
+            contiguous (bool): The save only wrote the change of this revision, so it
+                counts only if every earlier revision is saved too.
+        """
+        with self._revision_lock:
+            if revision is None: revision = self.revision
+            if contiguous and self.saved_revision < revision - 1: return # An earlier change failed to save
+            self.saved_revision = max(self.saved_revision, revision)
+
+    def is_dirty(self):
+        """True if there are changes that have not been saved yet."""
+        return self.saved_revision < self.revision
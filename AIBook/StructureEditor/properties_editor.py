@@ -1,6 +1,7 @@
 """
 PropertiesEditor class for the Interactive Book Editor.
 ADDED: Print statements for debugging node display flow.
+REVISED: Those messages are debug-level log output (editor_log) instead of print().
 """
 
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QStackedWidget, QLabel
@@ -9,6 +10,9 @@ from PyQt5.QtCore import pyqtSignal
 from node_editor import NodeEditorPanel
 from edge_editor import EdgeEditorPanel
 from book_editor import BookNodeEditor
+from editor_log import get_logger
+
+log = get_logger(__name__)
 
 class PropertiesEditor(QWidget):
     """
@@ -57,14 +61,14 @@ class PropertiesEditor(QWidget):
     
     def set_book_graph(self, book_graph):
         """Set the book graph for the editors."""
-        print("PropertiesEditor: Setting book graph.") # Debug
+        log.debug("PropertiesEditor: Setting book graph.")
         self.book_graph = book_graph
         self.node_editor.set_book_graph(book_graph)
         self.book_editor.set_book_graph(book_graph)
     
     def set_available_chapters(self, chapters):
         """Set the available chapters for the chapter combo box."""
-        print("PropertiesEditor: Setting available chapters.") # Debug
+        log.debug("PropertiesEditor: Setting available chapters.")
         self.available_chapters = chapters
         self.node_editor.set_available_chapters(chapters)
         # Assuming book editor also needs chapters if it manages them
@@ -72,53 +76,49 @@ class PropertiesEditor(QWidget):
     
     def display_node(self, node):
         """Display the properties of a node."""
-        print(f"\nPropertiesEditor: display_node called for node ID: {getattr(node, 'id', 'N/A')}") # Debug
+        log.debug("PropertiesEditor: display_node called for node ID: %s", getattr(node, 'id', 'N/A'))
         if not node:
-             print("PropertiesEditor: Received None node, clearing display.")
+             log.debug("PropertiesEditor: Received None node, clearing display.")
              self.clear_display()
              return
              
         self.current_node = node
         self.current_edge = None
         
-        print(f"PropertiesEditor: Node Type = {getattr(node, 'node_type', 'N/A')}") # Debug
-        
+        log.debug("PropertiesEditor: Node Type = %s", getattr(node, 'node_type', 'N/A'))
         # Check if this is a book node
         if node.node_type == "book":
-            print("PropertiesEditor: Displaying BookNodeEditor.") # Debug
+            log.debug("PropertiesEditor: Displaying BookNodeEditor.")
             # Update the book editor
             self.book_editor.update_for_node(node)
             # Show the book editor
             self.stacked_widget.setCurrentWidget(self.book_editor)
         else:
-            print("PropertiesEditor: Displaying NodeEditorPanel.") # Debug
+            log.debug("PropertiesEditor: Displaying NodeEditorPanel.")
             # Update the node editor
             self.node_editor.update_for_node(node)
             # Show the node editor
             self.stacked_widget.setCurrentWidget(self.node_editor)
             
-        print(f"PropertiesEditor: Current stack index: {self.stacked_widget.currentIndex()}") # Debug
-
+        log.debug("PropertiesEditor: Current stack index: %s", self.stacked_widget.currentIndex())
     def display_edge(self, edge):
         """Display the properties of an edge."""
-        print(f"\nPropertiesEditor: display_edge called for edge: {getattr(edge, 'source_id', 'N/A')}->{getattr(edge, 'target_id', 'N/A')}") # Debug
+        log.debug("PropertiesEditor: display_edge called for edge: %s->%s", getattr(edge, 'source_id', 'N/A'), getattr(edge, 'target_id', 'N/A'))
         if not edge:
-             print("PropertiesEditor: Received None edge, clearing display.")
+             log.debug("PropertiesEditor: Received None edge, clearing display.")
              self.clear_display()
              return
              
         self.current_node = None
         self.current_edge = edge
         
-        print("PropertiesEditor: Displaying EdgeEditorPanel.") # Debug
+        log.debug("PropertiesEditor: Displaying EdgeEditorPanel.")
         self.edge_editor.update_for_edge(edge)
         self.stacked_widget.setCurrentWidget(self.edge_editor)
-        print(f"PropertiesEditor: Current stack index: {self.stacked_widget.currentIndex()}") # Debug
-
-    
+        log.debug("PropertiesEditor: Current stack index: %s", self.stacked_widget.currentIndex())
     def clear_display(self):
         """Clear the display."""
-        print("PropertiesEditor: Clearing display.") # Debug
+        log.debug("PropertiesEditor: Clearing display.")
         self.current_node = None
         self.current_edge = None
         
@@ -129,5 +129,4 @@ class PropertiesEditor(QWidget):
         
         # Show the empty widget
         self.stacked_widget.setCurrentWidget(self.empty_widget)
-        print(f"PropertiesEditor: Current stack index set to empty: {self.stacked_widget.currentIndex()}") # Debug
-
+        log.debug("PropertiesEditor: Current stack index set to empty: %s", self.stacked_widget.currentIndex())
\ No newline at end of file
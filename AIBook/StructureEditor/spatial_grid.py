@@ -0,0 +1,88 @@
+"""
+SpatialGrid class for the Interactive Book Editor.
+A uniform grid over scene coordinates for finding the nodes inside a rectangle
+without looking at every node.
+"""
+
+import math
+
+class SpatialGrid:
+    """
+    Buckets point positions (e.g. node positions) into square cells.
+
+    Responsible for:
+    - Tracking the position of every key
+    - Returning the keys inside a rectangle by visiting only the cells it overlaps
+    - Reporting the bounding box of all positions
+    """
+
+    def __init__(self, cell_size=400.0):
+        """
+        Initialize a new, empty SpatialGrid.
+
+        Args:
+            cell_size (float, optional): Width and height of a cell in scene units.
+        """
+        self.cell_size = float(cell_size)
+        self.positions = {} # key -> (x, y)
+        self.cells = {} # (column, row) -> set of keys
+
+    def __len__(self): return len(self.positions)
+    def __contains__(self, key): return key in self.positions
+
+    def _cell(self, x, y):
+        """Get the (column, row) of the cell containing a point."""
+        return (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+
+    def insert(self, key, x, y):
+        """Add a key at a position, or move it there if it is already present."""
+        if key in self.positions: self.remove(key)
+        self.positions[key] = (x, y)
+        self.cells.setdefault(self._cell(x, y), set()).add(key)
+
+    def move(self, key, x, y):
+        """Update a key's position. Cheap when the key stays in the same cell."""
+        old = self.positions.get(key)
+        if old is not None and self._cell(*old) == self._cell(x, y):
+            self.positions[key] = (x, y); return
+        self.insert(key, x, y)
+
+    def remove(self, key):
+        """Remove a key. Unknown keys are ignored."""
+        position = self.positions.pop(key, None)
+        if position is None: return
+        cell = self._cell(*position)
+        keys = self.cells.get(cell)
+        if keys is not None:
+            keys.discard(key)
+            if not keys: del self.cells[cell]
+
+    def query(self, left, top, right, bottom):
+        """
+        Get the keys whose position lies inside a rectangle (edges included).
+
+        Returns:
+            set: Keys inside the rectangle.
+        """
+        first_column, first_row = self._cell(left, top)
+        last_column, last_row = self._cell(right, bottom)
+        found = set()
+        if (last_column - first_column + 1) * (last_row - first_row + 1) > len(self.cells):
+            # Rectangle spans more cells than are occupied: walk the occupied ones instead
+            cells = [keys for (column, row), keys in self.cells.items()
+                     if first_column <= column <= last_column and first_row <= row <= last_row]
+        else:
+            cells = [self.cells[(column, row)] for column in range(first_column, last_column + 1)
+                     for row in range(first_row, last_row + 1) if (column, row) in self.cells]
+        for keys in cells:
+            for key in keys:
+                x, y = self.positions[key]
+                if left <= x <= right and top <= y <= bottom: found.add(key)
+        return found
+
+    def bounds(self):
+        """Get (left, top, right, bottom) around all positions, or None if the grid is empty."""
+        if not self.positions: return None
+        xs = [x for x, _ in self.positions.values()]
+        ys = [y for _, y in self.positions.values()]
+        return (min(xs), min(ys), max(xs), max(ys))
@@ -0,0 +1,42 @@
+"""
+StartupTimer class for the Interactive Book Editor.
+Measures where cold-start time goes: each call to mark() closes a phase, and
+report() logs every phase with the total once the window is up.
+"""
+
+import time
+import logging
+from editor_log import get_logger
+
+log = get_logger(__name__)
+
+class StartupTimer:
+    """
+    Collects named startup phases.
+
+    Phases are contiguous: a phase lasts from the previous mark (or the start)
+    to its own mark.
+    """
+
+    def __init__(self, start=None):
+        """Start timing now, or from an earlier time.perf_counter() value."""
+        self.start = time.perf_counter() if start is None else start
+        self.last = self.start
+        self.phases = [] # (name, seconds)
+
+    def mark(self, phase):
+        """Close a phase and return its duration in seconds."""
+        now = time.perf_counter()
+        seconds = now - self.last
+        self.phases.append((phase, seconds)); self.last = now
+        return seconds
+
+    def total(self):
+        """Seconds from the start to the last mark."""
+        return self.last - self.start
+
+    def report(self):
+        """Log the phases and the total at INFO level."""
+        if not log.isEnabledFor(logging.INFO): return # Skip building the text when disabled
+        phases = ", ".join(f"{phase} {seconds:.3f}s" for phase, seconds in self.phases)
+        log.info("Startup: %s; interactive after %.3fs.", phases, self.total())
@@ -0,0 +1,215 @@
+"""
+StructureShardManager class for the Interactive Book Editor.
+Reads and writes the optional sharded project format, where the book structure is
+split into content/structure/manifest.json and one shard file per chapter, so a
+save only rewrites the shards a change touches.
+"""
+
+import os
+import re
+import hashlib
+from path_manager import PathManager
+from json_file_manager import JsonFileManager
+from editor_log import get_logger
+
+log = get_logger(__name__)
+
+MANIFEST_FORMAT = "aibook-sharded-structure"
+FORMAT_VERSION = 1
+UNASSIGNED_SHARD = "_unassigned" # Nodes without a chapter, and the edges of the book node
+SHARD_SECTIONS = ("criticalPath", "characterPOVs", "node_positions", "edges")
+
+class StructureShardManager:
+    """
+    Manages the manifest and shard files of a sharded project.
+
+    Layout:
+    - structure/manifest.json: book metadata, chapters (with their node lists),
+      the preserved top-level sections, the ordered list of shards and
+      "nodeIndex" (node_id -> shard id) so a reader can find a node's shard.
+    - structure/shards/<chapter>.json: the criticalPath entries, characterPOVs,
+      node_positions and outgoing edges of the nodes in one chapter.
+
+    A node's shard is its chapter (UNASSIGNED_SHARD if it has none). A
+    characterPOVs entry is stored with its base node, and an edge with its source.
+    The shard of every saved node is remembered so that a node that changes
+    chapter, or is removed, also marks the shard it left as dirty.
+    """
+
+    def __init__(self, path_manager=None, json_file_manager=None):
+        """Initialize a new StructureShardManager instance."""
+        self.path_manager = path_manager or PathManager()
+        self.json_file_manager = json_file_manager or JsonFileManager()
+        self.node_shards = None # node_id -> shard id as last saved or loaded; None until known
+        self.shard_files = {} # shard id -> file relative to the structure directory, as last saved or loaded
+        self.manifest_header = None # Manifest as last saved or loaded, without its node index
+
+    def reset(self):
+        """Forget the remembered shard index (e.g. after the project format changed)."""
+        self.node_shards = None
+        self.shard_files = {}
+        self.manifest_header = None
+
+    def is_sharded(self):
+        """Check whether the current project uses the sharded format (its manifest exists)."""
+        manifest_path = self.path_manager.get_structure_manifest_path()
+        return bool(manifest_path) and self.json_file_manager.exists(manifest_path)
+
+    @staticmethod
+    def get_shard_id(node):
+        """Get the shard a node (Node or NodeView) belongs to."""
+        return node.chapter or UNASSIGNED_SHARD
+
+    @staticmethod
+    def get_shard_file(shard_id):
+        """Get a shard's file name relative to the structure directory. Unsafe characters get a hash suffix."""
+        safe_id = re.sub(r'[^A-Za-z0-9_-]', '_', shard_id)
+        if safe_id != shard_id: safe_id += "-" + hashlib.md5(shard_id.encode('utf-8')).hexdigest()[:8]
+        return f"shards/{safe_id}.json"
+
+    def get_shard_members(self, book_graph, shard_id):
+        """Get the IDs of the nodes (including the book node) stored in a shard."""
+        if shard_id != UNASSIGNED_SHARD: return book_graph.get_node_ids_in_chapter(shard_id)
+        return [node_id for node_id, chapter in book_graph.graph.nodes(data='chapter') if not chapter]
+
+    # --- Loading ---
+
+    def read_manifest(self):
+        """
+        Read and check the manifest.
+
+        Returns:
+            dict: The manifest data.
+        """
+        manifest = self.json_file_manager.read_json(self.path_manager.get_structure_manifest_path())
+        if manifest.get("format") != MANIFEST_FORMAT: raise ValueError(f"Not a sharded structure manifest (format {manifest.get('format')!r})")
+        if manifest.get("formatVersion", 1) > FORMAT_VERSION: log.warning("StructureShardManager: WARNING - Manifest format version %s is newer than %s.", manifest.get('formatVersion'), FORMAT_VERSION)
+        return manifest
+
+    def read_structure_data(self):
+        """
+        Read the manifest and every shard into one dict shaped like book-structure.json.
+        A shard that is missing or unreadable is skipped with a warning.
+
+        Returns:
+            dict: The combined structure data.
+        """
+        manifest = self.read_manifest()
+        structure_data = {key: value for key, value in manifest.items() if key not in ("format", "formatVersion", "shards", "nodeIndex")}
+        structure_data.update(criticalPath=[], characterPOVs={}, node_positions={}, edges=[])
+        structure_dir = self.path_manager.get_structure_dir()
+        for shard in manifest.get("shards", []):
+            try:
+                shard_data = self.json_file_manager.read_json(os.path.join(structure_dir, shard["file"]))
+            except Exception as e:
+                log.warning("StructureShardManager: WARNING - Skipping unreadable shard %s: %s", shard.get('id'), e)
+                continue
+            structure_data["criticalPath"].extend(shard_data.get("criticalPath", []))
+            structure_data["characterPOVs"].update(shard_data.get("characterPOVs", {}))
+            structure_data["node_positions"].update(shard_data.get("node_positions", {}))
+            structure_data["edges"].extend(shard_data.get("edges", []))
+        self._remember_manifest(manifest)
+        log.info("StructureShardManager: Read %s shards.", len(self.shard_files))
+        return structure_data
+
+    def _ensure_index(self):
+        """Load the remembered shard index from the manifest on disk if it is not known yet."""
+        if self.node_shards is not None or not self.is_sharded(): return
+        try:
+            self._remember_manifest(self.read_manifest())
+        except Exception as e:
+            log.warning("StructureShardManager: WARNING - Could not read manifest, saving every shard: %s", e)
+
+    def _remember_manifest(self, manifest):
+        """Keep the shard index, shard files and header of a manifest that is on disk."""
+        self.node_shards = dict(manifest.get("nodeIndex", {}))
+        self.shard_files = {shard["id"]: shard["file"] for shard in manifest.get("shards", [])}
+        self.manifest_header = {key: value for key, value in manifest.items() if key != "nodeIndex"}
+
+    def is_manifest_current(self, manifest):
+        """Check whether a manifest matches the one on disk apart from its node index."""
+        return self.manifest_header == {key: value for key, value in manifest.items() if key != "nodeIndex"}
+
+    # --- Saving ---
+
+    def get_dirty_shards(self, book_graph, node_ids=None):
+        """
+        Work out which shards a change touches and the node index after it.
+
+        Args:
+            book_graph: The book graph, already reflecting the change.
+            node_ids (iterable, optional): IDs of added, updated, moved or removed nodes,
+                and the sources of added, updated or removed edges. None means everything.
+
+        Returns:
+            tuple: (dirty shard ids, new node index, whether shard membership changed).
+        """
+        self._ensure_index()
+        graph = book_graph.graph
+        if node_ids is None or self.node_shards is None:
+            node_shards = {node_id: chapter or UNASSIGNED_SHARD for node_id, chapter in graph.nodes(data='chapter')
+                           if graph.nodes[node_id].get('node_type') != "book"}
+            dirty = set(node_shards.values()) | set(self.shard_files) | {UNASSIGNED_SHARD}
+            return dirty, node_shards, node_shards != self.node_shards
+        node_shards = dict(self.node_shards)
+        dirty = set()
+        for node_id in node_ids:
+            old_shard = node_shards.pop(node_id, None)
+            if old_shard: dirty.add(old_shard)
+            if node_id not in graph: continue
+            node = book_graph.get_node_view(node_id)
+            dirty.add(self.get_shard_id(node))
+            if node.node_type != "book": node_shards[node_id] = self.get_shard_id(node)
+            for base_id, _, edge_type in graph.in_edges(node_id, data='edge_type'):
+                if edge_type == "character-pov": dirty.add(self.get_shard_id(book_graph.get_node_view(base_id))) # Holds this POV's entry
+        return dirty, node_shards, node_shards != self.node_shards
+
+    def build_manifest(self, header, shard_ids, node_shards):
+        """
+        Build the manifest contents.
+
+        Args:
+            header (dict): Top-level structure data other than the shard sections.
+            shard_ids (iterable): IDs of the shards that have content, in reading order.
+            node_shards (dict): node_id -> shard id.
+        """
+        manifest = {"format": MANIFEST_FORMAT, "formatVersion": FORMAT_VERSION}
+        manifest.update(header)
+        manifest["shards"] = [{"id": shard_id, "file": self.get_shard_file(shard_id),
+                               "chapter": None if shard_id == UNASSIGNED_SHARD else shard_id} for shard_id in shard_ids]
+        manifest["nodeIndex"] = node_shards
+        return manifest
+
+    def write_shards(self, shards, manifest=None):
+        """
+        Write shard files and (if given) the manifest. Shards mapped to None are deleted.
+        The remembered index is updated from the manifest once everything is written.
+
+        Args:
+            shards (dict): shard id -> shard data, or None for a shard that is now empty.
+            manifest (dict, optional): New manifest; None when it has not changed.
+
+        Returns:
+            int: Number of shard files written (unchanged ones are skipped).
+        """
+        structure_dir = self.path_manager.get_structure_dir()
+        if not self.path_manager.ensure_directory_exists(os.path.join(structure_dir, "shards")): raise OSError(f"Could not create {structure_dir}")
+        written = 0
+        with self.json_file_manager.transaction():
+            for shard_id, shard_data in shards.items():
+                path = os.path.join(structure_dir, self.shard_files.get(shard_id) or self.get_shard_file(shard_id))
+                if shard_data is None: self.json_file_manager.remove(path)
+                elif self.json_file_manager.write_json(path, shard_data): written += 1
+            if manifest is not None:
+                self.json_file_manager.write_json(self.path_manager.get_structure_manifest_path(), manifest)
+                self.json_file_manager.after_commit(lambda: self._remember_manifest(manifest)) # Not if an enclosing save is aborted
+        return written
+
+    def remove_all(self):
+        """Delete the manifest and every shard file listed in it (when leaving the sharded format)."""
+        self._ensure_index()
+        structure_dir = self.path_manager.get_structure_dir()
+        with self.json_file_manager.transaction():
+            for shard_file in self.shard_files.values(): self.json_file_manager.remove(os.path.join(structure_dir, shard_file))
+            self.json_file_manager.remove(self.path_manager.get_structure_manifest_path())
+        self.reset()
@@ -0,0 +1,101 @@
+"""
+Test script for the array graph backend.
+Applies the same random sequence of BookGraph edits to a networkx-backed and an
+array-backed BookGraph and checks that both report the same nodes, edges, edge
+order and index lookups after every batch of edits.
+"""
+
+import random
+import array_graph
+from editor_log import configure_logging
+from book_graph import BookGraph
+from node import Node, Edge
+
+NODE_TYPES = ["fiction", "character_pov", "nonfiction", None]
+CHAPTERS = ["chapter1", "chapter2", "chapter3", None]
+EDGE_TYPES = ["critical-path", "character-pov", "related-concept", "branch-point"]
+
+def random_node(rng, node_id, step):
+    """Build a node with random attributes."""
+    return Node(node_id=node_id, title=f"Title {step}", node_type=rng.choice(NODE_TYPES), chapter=rng.choice(CHAPTERS),
+                file_path=f"fiction/{node_id}.json" if step % 2 else None, position=(rng.uniform(-500, 500), rng.uniform(-500, 500)),
+                metadata={"step": step} if step % 3 else {})
+
+def apply_random_edit(rng, graphs, step):
+    """Apply one random edit to every graph in the same way."""
+    reference = graphs[0]
+    node_ids = list(reference.graph.nodes())
+    operation = rng.random()
+    if operation < 0.25 or len(node_ids) < 3:
+        node = random_node(rng, f"n{rng.randrange(400)}", step)
+        for graph in graphs: graph.add_node(node) if node.id not in graph.graph else graph.update_node(node)
+    elif operation < 0.55:
+        edge = Edge(source_id=rng.choice(node_ids), target_id=rng.choice(node_ids), edge_type=rng.choice(EDGE_TYPES),
+                    metadata={"condition": f"c{step}"} if step % 5 == 0 else {})
+        for graph in graphs: graph.add_edge(edge) # Updates the edge if it exists
+    elif operation < 0.65:
+        node_id = rng.choice(node_ids)
+        for graph in graphs: graph.remove_node(node_id)
+    elif operation < 0.75 and reference.graph.number_of_edges():
+        source_id, target_id = rng.choice(list(reference.graph.edges()))
+        for graph in graphs: graph.remove_edge(source_id, target_id)
+    elif operation < 0.85:
+        node = reference.get_node(rng.choice(node_ids))
+        node.chapter = rng.choice(CHAPTERS); node.node_type = rng.choice(NODE_TYPES); node.title = f"Renamed {step}"
+        for graph in graphs: graph.update_node(node)
+    else:
+        positions = {node_id: (float(step), float(-step)) for node_id in rng.sample(node_ids, min(5, len(node_ids)))}
+        for graph in graphs: graph.update_node_positions(positions)
+
+def compare_graphs(networkx_graph, array_graph_, step):
+    """Check that both graphs hold the same model. Raises AssertionError on the first difference."""
+    nx_g, ar_g = networkx_graph.graph, array_graph_.graph
+    assert list(nx_g.nodes()) == list(ar_g.nodes()), f"step {step}: node order differs"
+    assert list(nx_g.edges()) == list(ar_g.edges()), f"step {step}: edge order differs"
+    assert [node.to_dict() for node in networkx_graph.get_all_nodes()] == [node.to_dict() for node in array_graph_.get_all_nodes()], f"step {step}: node attributes differ"
+    assert [edge.to_dict() for edge in networkx_graph.get_all_edges()] == [edge.to_dict() for edge in array_graph_.get_all_edges()], f"step {step}: edge attributes differ"
+    for node_id in nx_g.nodes():
+        assert list(nx_g.succ[node_id]) == list(ar_g.succ[node_id]), f"step {step}: successors of {node_id} differ"
+        assert list(nx_g.pred[node_id]) == list(ar_g.pred[node_id]), f"step {step}: predecessors of {node_id} differ"
+        assert list(nx_g.out_edges(node_id, data='edge_type')) == list(ar_g.out_edges(node_id, data='edge_type')), f"step {step}: out-edges of {node_id} differ"
+        assert list(nx_g.in_edges(node_id, data='edge_type')) == list(ar_g.in_edges(node_id, data='edge_type')), f"step {step}: in-edges of {node_id} differ"
+    assert networkx_graph.get_nodes_by_chapter() == array_graph_.get_nodes_by_chapter(), f"step {step}: chapter index differs"
+    for node_type in NODE_TYPES:
+        assert networkx_graph.get_node_ids_by_type(node_type) == array_graph_.get_node_ids_by_type(node_type), f"step {step}: nodes of type {node_type} differ"
+    for edge_type in EDGE_TYPES:
+        # The networkx backend keeps an insertion-ordered index, the array backend scans its type column
+        assert sorted(networkx_graph.get_edges_by_type(edge_type)) == sorted(array_graph_.get_edges_by_type(edge_type)), f"step {step}: edges of type {edge_type} differ"
+    assert networkx_graph.to_dict() == array_graph_.to_dict(), f"step {step}: to_dict differs"
+
+def test_array_graph(seed=0, steps=4000):
+    """Run one random edit sequence on both backends and compare them as it goes."""
+    print(f"Testing the array backend against networkx (seed {seed}, {steps} edits)...")
+    # Small thresholds so index rebuilds and compaction happen many times during the run
+    saved_thresholds = array_graph.MIN_PENDING_EDGES, array_graph.MIN_COMPACT_COUNT
+    array_graph.MIN_PENDING_EDGES, array_graph.MIN_COMPACT_COUNT = 8, 8
+    try:
+        rng = random.Random(seed)
+        graphs = [BookGraph(backend="networkx"), BookGraph(backend="array")]
+        for step in range(steps):
+            apply_random_edit(rng, graphs, step)
+            if step % 100 == 0 or step == steps - 1: compare_graphs(graphs[0], graphs[1], step)
+        print(f"  {graphs[0].graph.number_of_nodes()} nodes, {graphs[0].graph.number_of_edges()} edges, {graphs[1].graph._epoch} compactions: backends agree")
+        return True
+    except AssertionError as e:
+        print(f"Mismatch between backends: {e}")
+        return False
+    except Exception as e:
+        print(f"Error in test_array_graph: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        array_graph.MIN_PENDING_EDGES, array_graph.MIN_COMPACT_COUNT = saved_thresholds
+
+if __name__ == "__main__":
+    print("Testing the array graph backend\n")
+    configure_logging("info,book_graph=error") # Edges added twice are expected to warn
+
+    success = all(test_array_graph(seed) for seed in range(3))
+
+    print(f"\nTests {'succeeded' if success else 'failed'}.")
@@ -0,0 +1,159 @@
+"""
+Test script for AutoSaveScheduler and ChangeSet.
+Drives the scheduler with a fake save callable instead of real files.
+"""
+
+import time
+import threading
+from editor_log import configure_logging
+from auto_save_scheduler import AutoSaveScheduler, ChangeSet
+
+class FakeSave:
+    """Save callable that records every ChangeSet it is given and fails while told to."""
+
+    def __init__(self, failures=0, on_call=None):
+        self.calls = [] # Copies of the ChangeSets in call order
+        self.failures = failures # Number of calls that fail before the saves start succeeding
+        self.on_call = on_call # Optional hook run inside the save, e.g. to schedule more changes
+        self.called = threading.Event()
+
+    def __call__(self, changes):
+        self.calls.append(ChangeSet().merge(changes)) # A copy: a failed ChangeSet is merged into when requeued
+        if self.on_call: self.on_call(len(self.calls))
+        self.called.set()
+        if self.failures: self.failures -= 1; return False
+        return True
+
+def wait_for(condition, timeout=3.0):
+    """Poll until condition() is true or the timeout passes. Returns the last result."""
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline: time.sleep(0.01)
+    return condition()
+
+def test_change_set():
+    """Merging, position-only classification and the structure node IDs."""
+    print("\nTest 1: ChangeSet merge and classification")
+    moved = ChangeSet(moved_node_ids=["a"], context="Node Moved a")
+    assert moved.is_position_only(), "a move alone is position-only"
+    assert moved.get_structure_node_ids() == {"a"}
+    moved.merge(ChangeSet(moved_node_ids=["b"], context="Node Moved b"))
+    assert moved.is_position_only() and moved.moved_node_ids == {"a", "b"}, "merged moves stay position-only"
+    moved.merge(ChangeSet(edges=[("c", "d")], context="Edge Added c->d"))
+    assert not moved.is_position_only(), "an edge change is not position-only"
+    assert moved.get_structure_node_ids() == {"a", "b", "c"}, "edge sources are structure nodes"
+    assert moved.contexts == ["Node Moved a", "Node Moved b", "Edge Added c->d"]
+    assert ChangeSet(chapter_ids=["chapter1"]).get_structure_node_ids() is None, "a chapter change rebuilds everything"
+    assert not ChangeSet(moved_node_ids=["a"], all_navigation=True).is_position_only()
+    print("  ChangeSet OK")
+
+def test_debounce_coalescing():
+    """Events arriving within the quiet period are saved as one merged ChangeSet."""
+    print("\nTest 2: Debounced events are coalesced")
+    save = FakeSave()
+    scheduler = AutoSaveScheduler(save, quiet_period=0.2)
+    try:
+        for index in range(5):
+            scheduler.schedule(ChangeSet(node_ids=[f"n{index}"], context=f"Node Updated n{index}"))
+            time.sleep(0.02)
+        assert not save.calls, "nothing is saved before the quiet period ends"
+        assert save.called.wait(3.0), "the worker flushes after the quiet period"
+        time.sleep(0.3) # No second flush may follow
+        assert len(save.calls) == 1, f"expected one save, got {len(save.calls)}"
+        assert save.calls[0].node_ids == {f"n{index}" for index in range(5)}
+        assert len(save.calls[0].contexts) == 5
+        assert not scheduler.has_pending()
+    finally:
+        scheduler.shutdown(flush=False)
+    print("  5 events -> 1 save")
+
+def test_failed_save_requeued():
+    """A failed save is put back, merged with changes that arrived meanwhile, and retried."""
+    print("\nTest 3: A failed save is requeued and merged with newer changes")
+    scheduler = None
+    def schedule_during_first_save(call_number):
+        if call_number == 1: scheduler.schedule(ChangeSet(node_ids=["newer"], context="Node Updated newer"))
+    save = FakeSave(failures=1, on_call=schedule_during_first_save)
+    scheduler = AutoSaveScheduler(save, quiet_period=0.05)
+    try:
+        scheduler.schedule(ChangeSet(node_ids=["older"], context="Node Updated older"))
+        assert wait_for(lambda: len(save.calls) >= 2), "the failed save is retried"
+        assert save.calls[0].node_ids == {"older"}
+        assert save.calls[1].node_ids == {"older", "newer"}, f"retry holds both changes, got {save.calls[1].node_ids}"
+        time.sleep(0.2)
+        assert len(save.calls) == 2 and not scheduler.has_pending(), "nothing is left after the successful retry"
+    finally:
+        scheduler.shutdown(flush=False)
+    print("  retry saved both changes")
+
+def test_retry_limit():
+    """After MAX_RETRIES automatic retries the changes wait for the next event or flush."""
+    print("\nTest 4: Automatic retries stop after MAX_RETRIES")
+    save = FakeSave(failures=1000)
+    scheduler = AutoSaveScheduler(save, quiet_period=0.03)
+    try:
+        scheduler.schedule(ChangeSet(node_ids=["a"], context="Node Updated a"))
+        expected = 1 + AutoSaveScheduler.MAX_RETRIES
+        assert wait_for(lambda: len(save.calls) >= expected), "the save is retried"
+        time.sleep(0.3)
+        assert len(save.calls) == expected, f"expected {expected} attempts, got {len(save.calls)}"
+        assert scheduler.has_pending(), "the failed changes are kept"
+        save.failures = 0
+        assert scheduler.flush(), "an explicit flush saves the kept changes"
+        assert save.calls[-1].node_ids == {"a"} and not scheduler.has_pending()
+    finally:
+        scheduler.shutdown(flush=False)
+    print(f"  {expected} attempts, then kept until flush")
+
+def test_flush_and_shutdown():
+    """An explicit flush writes pending changes at once; shutdown drains the queue and stops the worker."""
+    print("\nTest 5: flush and shutdown ordering")
+    save = FakeSave()
+    scheduler = AutoSaveScheduler(save, quiet_period=0.2)
+    scheduler.schedule(ChangeSet(node_ids=["a"], context="Node Updated a"))
+    assert scheduler.flush() and len(save.calls) == 1, "flush saves immediately"
+    time.sleep(0.4)
+    assert len(save.calls) == 1, "the worker does not save the flushed changes again"
+    assert scheduler.flush() and len(save.calls) == 1, "flushing with nothing pending does not call the save"
+
+    scheduler.quiet_period = 60 # The worker would not flush on its own during the test
+    scheduler.schedule(ChangeSet(node_ids=["b"], context="Node Updated b"))
+    scheduler.schedule(ChangeSet(edges=[("b", "c")], context="Edge Added b->c"))
+    assert scheduler.shutdown(flush=True), "shutdown flushes"
+    assert len(save.calls) == 2 and save.calls[1].node_ids == {"b"} and save.calls[1].edges == {("b", "c")}
+    assert not scheduler.has_pending() and not scheduler._worker.is_alive(), "the queue is drained and the worker stopped"
+
+    failing = FakeSave(failures=1)
+    scheduler = AutoSaveScheduler(failing, quiet_period=60)
+    scheduler.schedule(ChangeSet(node_ids=["d"], context="Node Updated d"))
+    assert not scheduler.shutdown(flush=True), "shutdown reports a failed final save"
+    assert scheduler.has_pending(), "changes of a failed final save are kept"
+    print("  flush and shutdown OK")
+
+def test_auto_save_scheduler():
+    """Run every scheduler test."""
+    print("Testing the AutoSaveScheduler...")
+    try:
+        test_change_set()
+        test_debounce_coalescing()
+        test_failed_save_requeued()
+        test_retry_limit()
+        test_flush_and_shutdown()
+        return True
+    except AssertionError as e:
+        print(f"Check failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    except Exception as e:
+        print(f"Error in test_auto_save_scheduler: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    print("Testing the AutoSaveScheduler functionality\n")
+    configure_logging("info,auto_save_scheduler=critical") # The failing saves are expected to log
+
+    success = test_auto_save_scheduler()
+
+    print(f"\nTests {'succeeded' if success else 'failed'}.")
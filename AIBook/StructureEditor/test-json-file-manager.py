@@ -0,0 +1,213 @@
+"""
+Test script for JsonFileManager.
+Checks the digest cache that skips unchanged writes, and the journaled
+transactions that a crash either completes or discards.
+"""
+
+import os
+import json
+import time
+import shutil
+import tempfile
+import threading
+from editor_log import configure_logging
+from json_file_manager import JsonFileManager, SaveTransaction, JOURNAL_DIR_NAME, COMMIT_RECORD_PREFIX
+
+def read_text(path):
+    """Read a file as text."""
+    with open(path, 'r', encoding='utf-8') as f: return f.read()
+
+def journal_files(project_root):
+    """List the files left in a project's journal directory."""
+    journal_dir = os.path.join(project_root, JOURNAL_DIR_NAME)
+    return sorted(os.listdir(journal_dir)) if os.path.isdir(journal_dir) else []
+
+def commit_records(project_root):
+    """List the commit records left in a project's journal directory."""
+    return [name for name in journal_files(project_root) if name.startswith(COMMIT_RECORD_PREFIX)]
+
+def check_digest_cache(project_root):
+    """An unchanged write is skipped; a write after an external change happens."""
+    print("\nTest 1: Unchanged writes are skipped")
+    manager = JsonFileManager(project_root)
+    path = os.path.join(project_root, "node.json")
+    assert manager.write_json(path, {"title": "A"}), "the first write happens"
+    mtime = os.stat(path).st_mtime_ns
+    time.sleep(0.01)
+    assert not manager.write_json(path, {"title": "A"}), "writing the same data is skipped"
+    assert os.stat(path).st_mtime_ns == mtime, "a skipped write leaves the mtime alone"
+    assert manager.writes_done == 1 and manager.writes_skipped == 1
+
+    print("Test 2: A file changed outside the editor is written again")
+    with open(path, 'w', encoding='utf-8') as f: f.write('{"title": "Edited elsewhere"}')
+    assert manager.write_json(path, {"title": "A"}), "the external change is detected and overwritten"
+    assert json.loads(read_text(path)) == {"title": "A"}
+    same_size_edit = read_text(path).replace('"A"', '"B"') # Same size, so only the mtime reveals the change
+    with open(path, 'w', encoding='utf-8') as f: f.write(same_size_edit)
+    os.utime(path, ns=(time.time_ns(), os.stat(path).st_mtime_ns + 1_000_000))
+    assert manager.write_json(path, {"title": "A"}), "a same-size external change is detected too"
+    assert json.loads(read_text(path)) == {"title": "A"}
+
+    fresh = JsonFileManager(project_root) # No cached digest: the file on disk is hashed instead
+    assert not fresh.write_json(path, {"title": "A"}), "identical bytes on disk are recognized without a cache"
+    print("  digest cache OK")
+
+def check_recover_committed(project_root):
+    """A commit record left by a crash mid-commit is rolled forward by recover()."""
+    print("\nTest 3: A committed transaction interrupted by a crash is completed on recovery")
+    manager = JsonFileManager(project_root)
+    path_a = os.path.join(project_root, "a.json")
+    path_b = os.path.join(project_root, "b.json")
+    removed = os.path.join(project_root, "removed.json")
+    for path in (path_a, path_b, removed): manager.write_json(path, {"version": 1})
+
+    class Crash(Exception): pass
+    def crash(temp_path, target_path): raise Crash() # Dies after the commit record is written, before any file moves
+    manager._move_into_place = crash
+    try:
+        with manager.transaction():
+            manager.write_json(path_a, {"version": 2})
+            manager.write_json(path_b, {"version": 2})
+            manager.remove(removed)
+        raise AssertionError("the simulated crash did not happen")
+    except Crash:
+        pass
+    assert len(commit_records(project_root)) == 1, "the commit record is left in the journal"
+    assert json.loads(read_text(path_a)) == {"version": 1}, "no file was replaced before the crash"
+
+    rolled_forward, _ = JsonFileManager().set_project_root(project_root) # The next open recovers
+    assert rolled_forward == 3, f"both files and the deletion are completed, got {rolled_forward}"
+    assert json.loads(read_text(path_a)) == {"version": 2} and json.loads(read_text(path_b)) == {"version": 2}
+    assert not os.path.exists(removed), "the journaled deletion is completed"
+    assert journal_files(project_root) == [], "the journal is cleared"
+    print("  rolled forward 3 changes")
+
+def check_concurrent_commits(project_root):
+    """Transactions committed from two threads at once both land, and their crashed commits both recover."""
+    print("\nTest 4: Two threads commit transactions at the same time")
+    manager = JsonFileManager(project_root)
+    paths = {name: os.path.join(project_root, f"{name}.json") for name in ("worker", "gui", "shared")}
+    errors = []
+    for round_number in range(20):
+        barrier = threading.Barrier(2)
+        def save(name):
+            try:
+                with manager.transaction():
+                    manager.write_json(paths[name], {"round": round_number})
+                    manager.write_json(paths["shared"], {"round": round_number, "by": name})
+                    barrier.wait(5) # Both transactions reach their commit together
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=save, args=(name,)) for name in ("worker", "gui")]
+        for thread in threads: thread.start()
+        for thread in threads: thread.join()
+        assert not errors, f"round {round_number}: a commit failed: {errors[0]!r}"
+        assert json.loads(read_text(paths["worker"])) == json.loads(read_text(paths["gui"])) == {"round": round_number}
+        assert json.loads(read_text(paths["shared"]))["round"] == round_number
+        assert journal_files(project_root) == [], f"round {round_number}: the journal is not cleared"
+
+    print("Test 5: Commit records of two crashed transactions are both rolled forward")
+    class Crash(Exception): pass
+    def crash(temp_path, target_path): raise Crash()
+    manager._move_into_place = crash
+    for name in ("worker", "gui"):
+        try:
+            with manager.transaction():
+                manager.write_json(paths[name], {"round": "crashed"})
+                manager.write_json(paths["shared"], {"by": name})
+        except Crash:
+            pass
+        time.sleep(0.01) # Distinct record mtimes give the commit order
+    assert len(commit_records(project_root)) == 2, "each transaction keeps its own commit record"
+    rolled_forward, _ = JsonFileManager().set_project_root(project_root)
+    assert rolled_forward == 4, f"expected 4 files rolled forward, got {rolled_forward}"
+    assert json.loads(read_text(paths["worker"])) == json.loads(read_text(paths["gui"])) == {"round": "crashed"}
+    assert json.loads(read_text(paths["shared"])) == {"by": "gui"}, "the later commit wins"
+    assert journal_files(project_root) == []
+    print("  20 concurrent rounds and 2 crashed commits OK")
+
+def check_discard_uncommitted(project_root):
+    """Staged files of a transaction that never committed are discarded, but not those of one still open."""
+    print("\nTest 6: An uncommitted transaction is discarded")
+    manager = JsonFileManager(project_root)
+    path = os.path.join(project_root, "c.json")
+    manager.write_json(path, {"version": 1})
+
+    # Crash while staging: temp files exist in the journal, but no commit record
+    assert manager._ensure_journal_dir()
+    transaction = SaveTransaction(manager.journal_dir)
+    payload = manager.serialize({"version": 2})
+    transaction.stage(path, payload, manager._digest(payload))
+    assert journal_files(project_root) and not commit_records(project_root)
+    assert JsonFileManager().set_project_root(project_root) == (0, 0), "an open transaction's files are left alone"
+    del transaction # The process that staged it is gone
+    rolled_forward, discarded = JsonFileManager().set_project_root(project_root)
+    assert (rolled_forward, discarded) == (0, 1), f"expected nothing rolled forward and 1 file discarded, got {(rolled_forward, discarded)}"
+    assert json.loads(read_text(path)) == {"version": 1}, "the target is untouched"
+    assert journal_files(project_root) == []
+
+    with manager.transaction(): # Another session opens the same project while this save is staged
+        manager.write_json(path, {"version": 2})
+        other_file = os.path.join(project_root, JOURNAL_DIR_NAME, "notes.txt")
+        with open(other_file, 'w', encoding='utf-8') as f: f.write("not staged by a save")
+        assert JsonFileManager().set_project_root(project_root) == (0, 0), "recovery leaves the open save alone"
+    assert json.loads(read_text(path)) == {"version": 2}, "the save still commits after another session recovered"
+    assert journal_files(project_root) == ["notes.txt"], "files recovery did not stage are kept"
+    os.remove(other_file)
+    manager.write_json(path, {"version": 1})
+
+    print("Test 7: A transaction whose block raises, or that is aborted, changes nothing")
+    try:
+        with manager.transaction():
+            manager.write_json(path, {"version": 3})
+            raise ValueError("failed while saving")
+    except ValueError:
+        pass
+    assert json.loads(read_text(path)) == {"version": 1} and journal_files(project_root) == []
+    committed = []
+    with manager.transaction() as transaction:
+        manager.write_json(path, {"version": 4})
+        manager.remove(path)
+        manager.after_commit(lambda: committed.append(4))
+        transaction.abort("a write failed")
+    assert json.loads(read_text(path)) == {"version": 1} and journal_files(project_root) == [], "an aborted transaction is discarded"
+    assert not committed, "callbacks of an aborted transaction do not run"
+    with manager.transaction():
+        manager.write_json(path, {"version": 5})
+        manager.after_commit(lambda: committed.append(json.loads(read_text(path))["version"]))
+        assert manager.read_json(path) == {"version": 5}, "a staged write is read back inside the transaction"
+        assert json.loads(read_text(path)) == {"version": 1}, "the target changes only on commit"
+        assert not committed, "callbacks wait for the commit"
+    assert json.loads(read_text(path)) == {"version": 5}, "a completed transaction commits"
+    assert committed == [5], "callbacks run after the files are in place"
+    manager.after_commit(lambda: committed.append("now"))
+    assert committed == [5, "now"], "outside a transaction a callback runs right away"
+    print("  discard and abort OK")
+
+def test_json_file_manager():
+    """Run every JsonFileManager test in its own temporary project."""
+    print("Testing JsonFileManager...")
+    try:
+        for check in (check_digest_cache, check_recover_committed, check_concurrent_commits, check_discard_uncommitted):
+            project_root = tempfile.mkdtemp()
+            try: check(project_root)
+            finally: shutil.rmtree(project_root)
+        return True
+    except AssertionError as e:
+        print(f"Check failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    except Exception as e:
+        print(f"Error in test_json_file_manager: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    print("Testing the JsonFileManager functionality\n")
+    configure_logging("warning")
+
+    success = test_json_file_manager()
+
+    print(f"\nTests {'succeeded' if success else 'failed'}.")
@@ -0,0 +1,150 @@
+"""
+Test script for the one-pass navigation table.
+Checks that build_navigation_table gives every node the same navigation block as
+the per-node builder, and as a reference copy of the original per-node lookups, on
+graphs with several 'previous' candidates, POV edges and related-nonfiction edges.
+"""
+
+import random
+from editor_log import configure_logging
+from book_graph import BookGraph
+from node import Node, Edge
+from node_content_updater import SimplifiedNodeContentUpdater, RELATED_NONFICTION_EDGE_TYPES
+
+def reference_navigation(updater, node_id, book_graph):
+    """The navigation block as the per-node lookups computed it before the one-pass table."""
+    graph = book_graph.graph
+    out_edges = list(graph.out_edges(node_id, data=True))
+    in_edges = list(graph.in_edges(node_id, data=True))
+    navigation = {"next": None, "previous": None, "alternateVersions": [], "relatedNonFiction": [], "branchPoints": []}
+    navigation["next"] = next((target for _, target, data in out_edges if data.get("edge_type") == "critical-path"), None)
+    navigation["previous"] = next((source for source, _, data in in_edges if data.get("edge_type") == "critical-path"), None)
+    related = set()
+    for _, target, data in out_edges:
+        target_node = book_graph.get_node_view(target)
+        if data.get("edge_type") == "character-pov":
+            pov_character = target_node.metadata.get("povCharacter") or \
+                            updater.character_pov_manager.get_character_from_pov_node(target) or "Unknown"
+            navigation["alternateVersions"].append({"povCharacter": pov_character, "nodeId": target})
+        elif data.get("edge_type") == "branch-point":
+            text = (data.get("metadata") or {}).get("text", f"Branch to {target}")
+            navigation["branchPoints"].append({"text": text, "targetNodeId": target})
+        elif data.get("edge_type") in RELATED_NONFICTION_EDGE_TYPES and target_node.node_type == "nonfiction":
+            related.add(target)
+    for source, _, data in in_edges:
+        if data.get("edge_type") in RELATED_NONFICTION_EDGE_TYPES and book_graph.get_node_view(source).node_type == "nonfiction":
+            related.add(source)
+    navigation["relatedNonFiction"] = sorted(related)
+    return navigation
+
+def build_fixture_graph(backend):
+    """A small graph covering each kind of navigation edge and its edge cases."""
+    book_graph = BookGraph(backend=backend)
+    nodes = [
+        Node(node_id="late", title="Late", node_type="fiction"), # Added before "early", so its edges come first in graph order
+        Node(node_id="early", title="Early", node_type="fiction"),
+        Node(node_id="scene", title="Scene", node_type="fiction"),
+        Node(node_id="ch1-scene-alice-pov", title="Alice POV", node_type="character_pov", metadata={"povCharacter": "Alice"}),
+        Node(node_id="ch1-scene-bob-pov", title="Bob POV", node_type="character_pov"), # Character taken from the ID
+        Node(node_id="scene_alt", title="Alt", node_type="character_pov"), # Neither: "Unknown"
+        Node(node_id="essay", title="Essay", node_type="nonfiction"),
+        Node(node_id="notes", title="Notes", node_type="nonfiction"),
+        Node(node_id="aside", title="Aside", node_type="fiction"), # Related, but not nonfiction
+        Node(node_id="ending", title="Ending", node_type="fiction"),
+        Node(node_id="loop", title="Loop", node_type="nonfiction"),
+    ]
+    for node in nodes: book_graph.add_node(node)
+    edges = [
+        # "scene" has three critical-path predecessors; in-edge order is early, late, ending
+        Edge("early", "scene", "critical-path"),
+        Edge("late", "scene", "critical-path"),
+        Edge("ending", "scene", "critical-path"),
+        Edge("scene", "ending", "critical-path"),
+        Edge("late", "early", "critical-path"),
+        Edge("scene", "ch1-scene-alice-pov", "character-pov"),
+        Edge("scene", "ch1-scene-bob-pov", "character-pov"),
+        Edge("scene", "scene_alt", "character-pov"),
+        Edge("scene", "essay", "related-concept"),
+        Edge("notes", "scene", "fiction-nonfiction"), # Related in the other direction
+        Edge("essay", "notes", "related-concept"),
+        Edge("aside", "scene", "related-concept"),
+        Edge("scene", "aside", "fiction-nonfiction"),
+        Edge("scene", "late", "branch-point", metadata={"text": "Go back"}),
+        Edge("scene", "early", "branch-point"), # No text: the default label
+        Edge("loop", "loop", "related-concept"), # Self-loops
+        Edge("ending", "ending", "critical-path"),
+    ]
+    for edge in edges: book_graph.add_edge(edge)
+    return book_graph
+
+def build_random_graph(backend, seed, node_count=120, edge_count=600):
+    """A random graph with many parallel critical paths and mixed edge types."""
+    rng = random.Random(seed)
+    book_graph = BookGraph(backend=backend)
+    node_types = ["fiction", "character_pov", "nonfiction"]
+    for index in rng.sample(range(node_count), node_count): # Shuffled insertion order
+        node_type = rng.choice(node_types)
+        node_id = f"ch{index}-scene-c{index}-pov" if node_type == "character_pov" and index % 2 else f"n{index}"
+        metadata = {"povCharacter": f"Character {index}"} if node_type == "character_pov" and index % 3 == 0 else {}
+        book_graph.add_node(Node(node_id=node_id, title=node_id, node_type=node_type, metadata=metadata))
+    node_ids = list(book_graph.graph.nodes())
+    edge_types = ["critical-path", "critical-path", "character-pov", "branch-point"] + list(RELATED_NONFICTION_EDGE_TYPES)
+    for step in range(edge_count):
+        source_id, target_id = rng.choice(node_ids), rng.choice(node_ids)
+        if book_graph.graph.has_edge(source_id, target_id): continue
+        metadata = {"text": f"Choice {step}"} if step % 2 else {}
+        book_graph.add_edge(Edge(source_id, target_id, rng.choice(edge_types), metadata=metadata))
+    return book_graph
+
+def compare_navigation(updater, book_graph, label):
+    """Check the table against the per-node builder and the reference for every node."""
+    table = updater.build_navigation_table(book_graph)
+    assert list(table) == list(book_graph.graph.nodes()), f"{label}: the table does not cover every node"
+    for node_id in book_graph.graph.nodes():
+        expected = reference_navigation(updater, node_id, book_graph)
+        assert updater.build_navigation(node_id, book_graph) == expected, f"{label}: build_navigation differs for {node_id}"
+        assert table[node_id] == expected, f"{label}: the table differs for {node_id}: {table[node_id]} != {expected}"
+    subset = list(book_graph.graph.nodes())[::3]
+    partial = updater.build_navigation_table(book_graph, subset + ["missing"])
+    assert list(partial) == subset, f"{label}: node_ids filter not applied"
+    assert all(partial[node_id] == table[node_id] for node_id in subset), f"{label}: a partial table differs"
+    return table
+
+def test_navigation_table():
+    """Compare the navigation table with per-node navigation on both backends."""
+    print("Testing the navigation table...")
+    try:
+        updater = SimplifiedNodeContentUpdater()
+        for backend in ("networkx", "array"):
+            print(f"\nBackend: {backend}")
+            table = compare_navigation(updater, build_fixture_graph(backend), f"{backend} fixture")
+            scene = table["scene"]
+            assert scene["previous"] == "early", f"first critical-path predecessor in in-edge order, got {scene['previous']}"
+            pov_characters = [version["povCharacter"] for version in scene["alternateVersions"]]
+            assert pov_characters == ["Alice", "Bob", "Unknown"], f"POV character from metadata, then the ID, then Unknown, got {pov_characters}"
+            assert scene["relatedNonFiction"] == ["essay", "notes"], f"got {scene['relatedNonFiction']}"
+            assert scene["branchPoints"] == [{"text": "Go back", "targetNodeId": "late"}, {"text": "Branch to early", "targetNodeId": "early"}]
+            assert table["loop"]["relatedNonFiction"] == ["loop"] and table["ending"]["previous"] == "scene"
+            print("  fixture graph: table matches per-node navigation")
+            for seed in range(5):
+                compare_navigation(updater, build_random_graph(backend, seed), f"{backend} random seed {seed}")
+            print("  5 random graphs: table matches per-node navigation")
+        return True
+    except AssertionError as e:
+        print(f"Check failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    except Exception as e:
+        print(f"Error in test_navigation_table: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+if __name__ == "__main__":
+    print("Testing the navigation table functionality\n")
+    configure_logging("warning")
+
+    success = test_navigation_table()
+
+    print(f"\nTests {'succeeded' if success else 'failed'}.")
@@ -70,4 +70,135 @@ const bookStructure = {
         }
         // Add more chapters as needed
     ]
-};
\ No newline at end of file
+};
+
+/**
+ * On-demand loader for projects saved in the sharded structure format.
+ * content/structure/manifest.json holds the book metadata, chapters and a
+ * nodeIndex (node ID -> shard ID); each shard holds one chapter's criticalPath
+ * entries, characterPOVs, node_positions and edges. Shards are fetched only
+ * when a node in them is needed and merged into one book structure object.
+ */
+class ShardedBookStructure {
+    /**
+     * @param {Object} manifest - Parsed manifest.json
+     * @param {string} baseUrl - URL of the structure directory, ending in '/'
+     */
+    constructor(manifest, baseUrl) {
+        this.manifest = manifest;
+        this.baseUrl = baseUrl;
+        this.shards = {}; // shardId -> loaded shard data
+        this.pending = {}; // shardId -> Promise of a fetch in progress
+        this.shardOrder = (manifest.shards || []).map(shard => shard.id);
+
+        // The merged structure; the same object is updated in place as shards arrive
+        this.structure = {};
+        for (const key in manifest) {
+            if (!["format", "formatVersion", "shards", "nodeIndex"].includes(key)) {
+                this.structure[key] = manifest[key];
+            }
+        }
+        this.structure.criticalPath = [];
+        this.structure.characterPOVs = {};
+        this.structure.node_positions = {};
+        this.structure.edges = [];
+    }
+
+    /**
+     * Fetch the manifest of a sharded project
+     * @param {string} [baseUrl='./content/structure/'] - URL of the structure directory
+     * @returns {Promise<ShardedBookStructure|null>} The loader, or null if the project is not sharded
+     */
+    static async load(baseUrl = './content/structure/') {
+        try {
+            const response = await fetch(`${baseUrl}manifest.json`);
+            if (!response.ok) return null;
+            const manifest = await response.json();
+            if (manifest.format !== "aibook-sharded-structure") return null;
+            return new ShardedBookStructure(manifest, baseUrl);
+        } catch (error) {
+            return null; // No manifest: the project uses book-structure.json
+        }
+    }
+
+    /**
+     * Get the ID of the shard holding a node
+     * @param {string} nodeId - The node ID
+     * @returns {string|null} The shard ID, or null if the node is unknown
+     */
+    getShardId(nodeId) {
+        return (this.manifest.nodeIndex && this.manifest.nodeIndex[nodeId]) || null;
+    }
+
+    /**
+     * Load a shard (once) and merge it into the structure
+     * @param {string} shardId - The shard ID
+     * @returns {Promise<Object|null>} The shard data, or null if it could not be loaded
+     */
+    loadShard(shardId) {
+        if (this.shards[shardId]) return Promise.resolve(this.shards[shardId]);
+        if (this.pending[shardId]) return this.pending[shardId];
+        const shardInfo = (this.manifest.shards || []).find(shard => shard.id === shardId);
+        if (!shardInfo) return Promise.resolve(null);
+
+        this.pending[shardId] = fetch(`${this.baseUrl}${shardInfo.file}`)
+            .then(response => {
+                if (!response.ok) throw new Error(`Failed to load shard ${shardId}: ${response.status}`);
+                return response.json();
+            })
+            .then(shard => {
+                this.shards[shardId] = shard;
+                this._merge();
+                return shard;
+            })
+            .catch(error => {
+                console.error(error);
+                return null;
+            })
+            .finally(() => {
+                delete this.pending[shardId];
+            });
+        return this.pending[shardId];
+    }
+
+    /**
+     * Make sure the shard of a node is loaded, along with the shards before and
+     * after it so critical path navigation can cross chapter boundaries
+     * @param {string} nodeId - The node ID
+     * @returns {Promise<void>}
+     */
+    async ensureNode(nodeId) {
+        const shardId = this.getShardId(nodeId);
+        if (!shardId) return;
+        const index = this.shardOrder.indexOf(shardId);
+        const neighbours = [this.shardOrder[index - 1], shardId, this.shardOrder[index + 1]].filter(Boolean);
+        await Promise.all(neighbours.map(id => this.loadShard(id)));
+    }
+
+    /**
+     * Load every shard
+     * @returns {Promise<Object>} The complete structure
+     */
+    async loadAll() {
+        await Promise.all(this.shardOrder.map(id => this.loadShard(id)));
+        return this.structure;
+    }
+
+    /**
+     * Rebuild the merged sections from the loaded shards, in reading order
+     * @private
+     */
+    _merge() {
+        const structure = this.structure;
+        structure.criticalPath.length = 0;
+        structure.edges.length = 0;
+        for (const shardId of this.shardOrder) {
+            const shard = this.shards[shardId];
+            if (!shard) continue;
+            structure.criticalPath.push(...(shard.criticalPath || []));
+            structure.edges.push(...(shard.edges || []));
+            Object.assign(structure.characterPOVs, shard.characterPOVs || {});
+            Object.assign(structure.node_positions, shard.node_positions || {});
+        }
+    }
+}
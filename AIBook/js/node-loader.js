@@ -12,6 +12,7 @@ class NodeLoader {
         this.characterData = {};
         this.worldData = {};
         this.bookStructure = null;
+        this.shardedStructure = null; // ShardedBookStructure when the project is saved as shards
         this.defaultStartNodeId = null;
         this.defaultPOV = null;
 
@@ -25,12 +26,23 @@ class NodeLoader {
     async initBookStructure() {
         try {
             console.log("Loading book structure...");
-            const response = await fetch('./content/book-structure.json');
-            if (!response.ok) {
-                throw new Error(`Failed to load book structure: ${response.status}`);
+            // A sharded project only needs its manifest up front; shards are fetched on demand
+            if (typeof ShardedBookStructure !== 'undefined') {
+                this.shardedStructure = await ShardedBookStructure.load();
+            }
+            if (this.shardedStructure) {
+                const manifest = this.shardedStructure.manifest;
+                if (manifest.defaultStartNode) await this.shardedStructure.ensureNode(manifest.defaultStartNode);
+                else if (this.shardedStructure.shardOrder.length) await this.shardedStructure.loadShard(this.shardedStructure.shardOrder[0]);
+                this.bookStructure = this.shardedStructure.structure;
+                console.log(`Sharded book structure manifest loaded (${this.shardedStructure.shardOrder.length} shards)`);
+            } else {
+                const response = await fetch('./content/book-structure.json');
+                if (!response.ok) {
+                    throw new Error(`Failed to load book structure: ${response.status}`);
+                }
+                this.bookStructure = await response.json();
             }
-
-            this.bookStructure = await response.json();
             console.log("Book structure loaded successfully:", this.bookStructure.title);
 
             // Set defaults from book structure
@@ -196,6 +208,11 @@ class NodeLoader {
                 });
             }
 
+            // Fetch the shard holding this node (and its neighbours) if not loaded yet
+            if (this.shardedStructure) {
+                await this.shardedStructure.ensureNode(nodeId);
+            }
+
             // Use default POV if none specified or if specified POV doesn't exist for this node
             let effectivePOV = povCharacter || this.defaultPOV || "Omniscient";
             let targetNodeId = nodeId;